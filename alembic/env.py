@@ -1,5 +1,6 @@
 import os
 from email_transaction_extractor.database import Base
+from email_transaction_extractor.models import backfill, mailbox_sync_state, transaction, transaction_body, transaction_daily_count  # noqa: F401
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
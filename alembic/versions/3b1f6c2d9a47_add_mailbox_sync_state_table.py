@@ -0,0 +1,37 @@
+"""Add mailbox_sync_state table
+
+Revision ID: 3b1f6c2d9a47
+Revises: 10cf304fd028
+Create Date: 2026-10-18 09:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b1f6c2d9a47'
+down_revision: Union[str, None] = '10cf304fd028'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('mailbox_sync_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('mailbox', sa.String(), nullable=False),
+    sa.Column('bank_email', sa.String(), nullable=False),
+    sa.Column('uid_validity', sa.BigInteger(), nullable=False),
+    sa.Column('last_uid', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('mailbox', 'bank_email')
+    )
+    op.create_index('ix_mailbox_sync_state_id', 'mailbox_sync_state', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_mailbox_sync_state_id', table_name='mailbox_sync_state')
+    op.drop_table('mailbox_sync_state')
@@ -0,0 +1,40 @@
+"""Add transactions query indexes
+
+Revision ID: 5f2c8e4a7d13
+Revises: e41b7d09c2a6
+Create Date: 2026-10-18 15:02:47.906311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2c8e4a7d13'
+down_revision: Union[str, None] = 'e41b7d09c2a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_transactions_date_id': ['date', 'id'],
+    'ix_transactions_bank_name_date': ['bank_name', 'date'],
+    'ix_transactions_currency_date': ['currency', 'date'],
+    'ix_transactions_business': ['business'],
+}
+
+
+def upgrade() -> None:
+    # Build the indexes without locking out ingest on Postgres; CONCURRENTLY cannot run in a transaction
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, 'transactions', columns, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='transactions',
+                          postgresql_concurrently=True, if_exists=True)
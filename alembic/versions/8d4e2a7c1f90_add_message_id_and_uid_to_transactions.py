@@ -0,0 +1,30 @@
+"""Add message_id and uid to transactions
+
+Revision ID: 8d4e2a7c1f90
+Revises: 3b1f6c2d9a47
+Create Date: 2026-10-18 13:05:27.402871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4e2a7c1f90'
+down_revision: Union[str, None] = '3b1f6c2d9a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('transactions', sa.Column('message_id', sa.String(), nullable=True))
+    op.add_column('transactions', sa.Column('uid', sa.BigInteger(), nullable=True))
+    op.create_index('ix_transactions_message_id', 'transactions', ['message_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_message_id', table_name='transactions')
+    op.drop_column('transactions', 'uid')
+    op.drop_column('transactions', 'message_id')
@@ -0,0 +1,58 @@
+"""Move transaction bodies to a compressed side table
+
+Revision ID: 9a6d3b1e8f24
+Revises: 5f2c8e4a7d13
+Create Date: 2026-10-18 16:31:12.447190
+
+"""
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a6d3b1e8f24'
+down_revision: Union[str, None] = '5f2c8e4a7d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+transactions = sa.table('transactions', sa.column('id', sa.String()), sa.column('body', sa.Text()))
+transaction_bodies = sa.table('transaction_bodies', sa.column('transaction_id', sa.String()),
+                              sa.column('body', sa.LargeBinary()))
+
+
+def upgrade() -> None:
+    op.create_table('transaction_bodies',
+    sa.Column('transaction_id', sa.String(), nullable=False),
+    sa.Column('body', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('transaction_id')
+    )
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(transactions.c.id, transactions.c.body)
+                              .where(transactions.c.body.is_not(None))).yield_per(BATCH_SIZE)
+    for batch in rows.partitions():
+        connection.execute(transaction_bodies.insert(), [
+            {'transaction_id': id, 'body': zlib.compress(body.encode('utf-8'), 6)} for id, body in batch])
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.drop_column('body')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.add_column(sa.Column('body', sa.Text(), nullable=True))
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(transaction_bodies.c.transaction_id, transaction_bodies.c.body)
+                              ).yield_per(BATCH_SIZE)
+    for batch in rows.partitions():
+        for id, body in batch:
+            connection.execute(transactions.update().where(transactions.c.id == id)
+                               .values(body=zlib.decompress(body).decode('utf-8')))
+    op.execute(transactions.update().where(transactions.c.body.is_(None)).values(body=''))
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.alter_column('body', existing_type=sa.Text(), nullable=False)
+    op.drop_table('transaction_bodies')
@@ -0,0 +1,57 @@
+"""Add backfill_jobs and backfill_shards tables
+
+Revision ID: c7a9e3f51b28
+Revises: 8d4e2a7c1f90
+Create Date: 2026-10-18 14:21:09.553120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a9e3f51b28'
+down_revision: Union[str, None] = '8d4e2a7c1f90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+backfill_status = sa.Enum('PENDING', 'RUNNING', 'DONE', 'FAILED', name='backfillstatus')
+
+
+def upgrade() -> None:
+    op.create_table('backfill_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('start_date', sa.DateTime(), nullable=False),
+    sa.Column('end_date', sa.DateTime(), nullable=False),
+    sa.Column('shard_days', sa.Integer(), nullable=False),
+    sa.Column('status', backfill_status, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_backfill_jobs_id', 'backfill_jobs', ['id'], unique=False)
+    op.create_table('backfill_shards',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('start_date', sa.DateTime(), nullable=False),
+    sa.Column('end_date', sa.DateTime(), nullable=False),
+    sa.Column('status', backfill_status, nullable=False),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['job_id'], ['backfill_jobs.id']),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job_id', 'start_date')
+    )
+    op.create_index('ix_backfill_shards_id', 'backfill_shards', ['id'], unique=False)
+    op.create_index('ix_backfill_shards_job_id', 'backfill_shards', ['job_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_backfill_shards_job_id', table_name='backfill_shards')
+    op.drop_index('ix_backfill_shards_id', table_name='backfill_shards')
+    op.drop_table('backfill_shards')
+    op.drop_index('ix_backfill_jobs_id', table_name='backfill_jobs')
+    op.drop_table('backfill_jobs')
+    backfill_status.drop(op.get_bind(), checkfirst=True)
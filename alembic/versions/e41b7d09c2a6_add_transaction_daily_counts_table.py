@@ -0,0 +1,37 @@
+"""Add transaction_daily_counts table
+
+Revision ID: e41b7d09c2a6
+Revises: c7a9e3f51b28
+Create Date: 2026-10-18 14:20:03.512884
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41b7d09c2a6'
+down_revision: Union[str, None] = 'c7a9e3f51b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('transaction_daily_counts',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('bank_name', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'bank_name')
+    )
+    day = 'date(date)' if op.get_bind().dialect.name == 'sqlite' else 'CAST(date AS DATE)'
+    op.execute(
+        f'INSERT INTO transaction_daily_counts (day, bank_name, count) '
+        f'SELECT {day}, bank_name, count(*) FROM transactions '
+        f'WHERE date IS NOT NULL GROUP BY {day}, bank_name'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('transaction_daily_counts')
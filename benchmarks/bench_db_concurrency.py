@@ -0,0 +1,128 @@
+"""
+Read throughput of the transactions API queries while ingest is writing,
+with the 'default' and 'tuned' engine profiles (see DatabaseSettings).
+
+A writer thread bulk inserts batches of transactions the way a refresh does,
+while reader threads serve keyset pages of /transactions and offset pages of
+/transactions/by-date, each request on a session of its own. Reports reads
+per second, their p95 latency, the reads that failed (e.g. 'database is
+locked') and the rows written per second.
+
+    python benchmarks/bench_db_concurrency.py [--url URL] [--seconds N] [--readers N]
+
+Without --url each profile runs on a fresh SQLite file in a temporary
+directory; with --url the tables are created and dropped on that database.
+"""
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy.orm import sessionmaker
+
+from email_transaction_extractor.database import (Base, DatabaseSettings,
+                                                  create_database_engine)
+from email_transaction_extractor.repositories.transaction_repository import \
+    TransactionRepository
+from email_transaction_extractor.services.transaction_service import \
+    TransactionService
+from email_transaction_extractor.utils.dates import DateRange
+
+START = datetime(2024, 1, 1)
+WRITE_BATCH_SIZE = 500
+PAGE_SIZE = 20
+BODY = 'Estimado cliente, le informamos sobre la transaccion realizada con su tarjeta.\n' * 20
+
+
+def make_rows(first: int, count: int) -> List[dict]:
+    return [{'id': f'{i:016d}', 'date': START + timedelta(minutes=7 * i), 'value': 1000.0 + i % 997,
+             'currency': ('CRC', 'USD')[i % 2], 'business': f'Store {i % 50}', 'business_type': None,
+             'bank_name': ('BAC', 'PROMERICA')[i % 2], 'bank_email': 'notificaciones@bench.local',
+             'body': BODY, 'message_id': f'<{i}@bench.local>'}
+            for i in range(first, first + count)]
+
+
+def run(profile: str, url: str, seconds: float, readers: int, seed_rows: int) -> Dict[str, float]:
+    engine = create_database_engine(DatabaseSettings(DATABASE_URL=url, DB_PROFILE=profile))
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with Session() as db:
+        TransactionRepository(db).insert_ignoring_duplicates(make_rows(0, seed_rows))
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies: List[float] = []
+    stats = {'failed_reads': 0, 'written': 0, 'failed_writes': 0}
+
+    def writer():
+        next_row = seed_rows
+        while not stop.is_set():
+            with Session() as db:
+                try:
+                    TransactionRepository(db).insert_ignoring_duplicates(make_rows(next_row, WRITE_BATCH_SIZE))
+                    stats['written'] += WRITE_BATCH_SIZE
+                except Exception:
+                    stats['failed_writes'] += 1
+            next_row += WRITE_BATCH_SIZE
+
+    def reader(index: int):
+        cursor = None
+        day = START + timedelta(days=index)
+        while not stop.is_set():
+            start = time.perf_counter()
+            with Session() as db:
+                service = TransactionService(db)
+                try:
+                    if index % 2:
+                        page = service.get_paginated(PAGE_SIZE, cursor, keyset=True).data
+                        cursor = page.pagination.next_cursor
+                    else:
+                        service.get_by_date(PAGE_SIZE, DateRange(start_date=day, end_date=day + timedelta(days=6)))
+                except Exception:
+                    with lock:
+                        stats['failed_reads'] += 1
+                    continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=writer)] + \
+        [threading.Thread(target=reader, args=(index,)) for index in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+    return {'reads_per_s': len(latencies) / seconds,
+            'p95_read_ms': statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) > 1 else 0.0,
+            'failed_reads': stats['failed_reads'],
+            'rows_per_s': stats['written'] / seconds,
+            'failed_writes': stats['failed_writes']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent read throughput while ingest writes')
+    parser.add_argument('--url', help='database to run on, a temporary SQLite file per profile by default')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seed-rows', type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f'{"profile":<8} {"reads/s":>9} {"p95 ms":>8} {"failed":>7} {"rows/s":>9} {"failed writes":>14}')
+    for profile in ('default', 'tuned'):
+        with tempfile.TemporaryDirectory() as directory:
+            url = args.url or f'sqlite:///{directory}/bench.db'
+            result = run(profile, url, args.seconds, args.readers, args.seed_rows)
+        print(f'{profile:<8} {result["reads_per_s"]:>9.0f} {result["p95_read_ms"]:>8.1f} '
+              f'{result["failed_reads"]:>7} {result["rows_per_s"]:>9.0f} {result["failed_writes"]:>14}')
+
+
+if __name__ == '__main__':
+    main()
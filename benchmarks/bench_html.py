@@ -0,0 +1,30 @@
+"""
+Throughput of the HTML-to-text backends on the notification fixtures.
+
+    python benchmarks/bench_html.py
+"""
+import timeit
+from pathlib import Path
+
+from email_transaction_extractor.utils.html import (BACKENDS,
+                                                    available_backends)
+
+FIXTURES = sorted((Path(__file__).parent.parent / 'tests' / 'fixtures').glob('*.html'))
+NUMBER = 500
+REPEAT = 5
+
+
+def main():
+    documents = [fixture.read_text(encoding='utf-8') for fixture in FIXTURES]
+    size = sum(len(document.encode()) for document in documents)
+    print(f'{"backend":<8} {"docs/s":>10} {"MB/s":>8}')
+    for name in available_backends():
+        backend = BACKENDS[name]
+        elapsed = min(timeit.repeat(lambda: [backend(document) for document in documents],
+                                    number=NUMBER, repeat=REPEAT))
+        print(f'{name:<8} {len(documents) * NUMBER / elapsed:>10.0f} '
+              f'{size * NUMBER / elapsed / 1e6:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Parse throughput of ParsePool with an increasing number of worker processes
+on a batch of HTML Promerica notifications.
+
+    python benchmarks/bench_parse_pool.py [emails]
+"""
+import email
+import os
+import sys
+import time
+from pathlib import Path
+
+from email_transaction_extractor.utils.parsers.pool import ParsePool
+from email_transaction_extractor.utils.parsers.promerica_parser import \
+    PromericaMessageParser
+
+FIXTURE = Path(__file__).parent.parent / 'tests' / 'fixtures' / 'promerica_notification.html'
+
+
+def make_emails(count: int):
+    html = FIXTURE.read_text()
+    raw = ('From: info@promerica.fi.cr\nSubject: Comprobante de compra\n'
+           'Date: Mon, 1 Jul 2024 10:00:00 -0600\nContent-Type: text/html; charset="utf-8"\n\n' + html)
+    return [email.message_from_string(raw) for _ in range(count)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    emails = make_emails(count)
+    print(f'{"workers":>8} {"seconds":>10} {"emails/s":>10}')
+    for workers in sorted({0, 2, 4, os.cpu_count() or 1}):
+        pool = ParsePool(workers=workers, chunk_size=256)
+        try:
+            if workers:
+                pool.parse(PromericaMessageParser, emails[:pool.min_batch])  # start the workers
+            start = time.perf_counter()
+            pool.parse(PromericaMessageParser, emails)
+            elapsed = time.perf_counter() - start
+        finally:
+            pool.close()
+        print(f'{workers:>8} {elapsed:>10.2f} {count / elapsed:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Per-stage cost of turning a raw bank email into a TransactionCreate, on a
+synthetic corpus of BAC and Promerica notifications (see corpus.py).
+
+Each stage is timed on the output of the previous one, so a regression
+shows up in the stage that caused it. Allocation is the tracemalloc peak of
+one pass over the corpus, per email.
+
+    python benchmarks/bench_parse_stages.py [--emails N] [--save FILE] [--compare FILE]
+
+`--save` writes the results as a JSON baseline; `--compare` reports every
+stage that got slower or allocates more than `--tolerance` (default 15%)
+compared with a baseline and exits with status 1 if there is any.
+"""
+import argparse
+import email
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from email.message import Message
+from typing import Callable, Dict, List, Optional, Tuple
+
+from corpus import generate_corpus
+
+from email_transaction_extractor.schemas.transaction import TransactionCreate
+from email_transaction_extractor.utils.html import html_to_text
+from email_transaction_extractor.utils.parsers.pool import parse_fields
+
+REPEAT = 5
+
+
+def text_part(msg: Message) -> Optional[Message]:
+    """The part BaseMessageParser decodes: the first non-attachment part with a payload."""
+    for part in msg.walk():
+        if part.is_multipart():
+            continue
+        disposition = part.get('Content-Disposition')
+        if disposition is None or 'attachment' not in disposition:
+            return part
+    return None
+
+
+def decode(part: Message) -> Tuple[str, str]:
+    charset = part.get_content_charset() or 'utf-8'
+    return part.get_content_type(), part.get_payload(decode=True).decode(charset, errors='replace')
+
+
+def strip_html(decoded: Tuple[str, str]) -> str:
+    content_type, body = decoded
+    return html_to_text(body) if content_type == 'text/html' else body
+
+
+def build_transaction(parser_class, msg: Message, fields) -> TransactionCreate:
+    date, value, currency, business, business_type, body = fields
+    return TransactionCreate(date=date, value=value, currency=currency, business=business,
+                             business_type=business_type, bank_email=parser_class.bank.email,
+                             bank_name=parser_class.bank.name, body=body,
+                             message_id=msg.get('Message-ID'))
+
+
+def end_to_end(parser_class, raw: bytes) -> Optional[TransactionCreate]:
+    msg = email.message_from_bytes(raw)
+    fields = parse_fields(parser_class, msg)
+    return build_transaction(parser_class, msg, fields) if fields else None
+
+
+def measure(stage: Callable[[], List], count: int) -> Dict[str, float]:
+    elapsed = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        stage()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        stage()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'emails_per_s': count / elapsed, 'peak_kib_per_email': peak / count / 1024}
+
+
+def run(size: int, seed: int) -> Dict[str, Dict[str, float]]:
+    corpus = generate_corpus(size, seed)
+    parsers = [parser_class for parser_class, _ in corpus]
+    raws = [raw for _, raw in corpus]
+
+    messages = [email.message_from_bytes(raw) for raw in raws]
+    parts = [text_part(msg) for msg in messages]
+    decoded = [decode(part) for part in parts]
+    texts = [strip_html(item) for item in decoded]
+    fields = [parse_fields(parser_class, msg) for parser_class, msg in zip(parsers, messages)]
+    if None in fields:
+        sys.exit(f'{fields.count(None)} corpus emails did not parse, fix the corpus or the parsers first')
+
+    stages = {
+        'mime_parse': lambda: [email.message_from_bytes(raw) for raw in raws],
+        'mime_walk': lambda: [text_part(msg) for msg in messages],
+        'decode': lambda: [decode(part) for part in parts],
+        'html_strip': lambda: [strip_html(item) for item in decoded],
+        'field_regex': lambda: [parser_class.spec.scan(text) for parser_class, text in zip(parsers, texts)],
+        'transaction': lambda: [build_transaction(parser_class, msg, item)
+                                for parser_class, msg, item in zip(parsers, messages, fields)],
+        'end_to_end': lambda: [end_to_end(parser_class, raw) for parser_class, raw in corpus],
+    }
+    return {name: measure(stage, size) for name, stage in stages.items()}
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    regressions = []
+    for stage, current in results.items():
+        previous = baseline.get(stage)
+        if previous is None:
+            continue
+        if current['emails_per_s'] < previous['emails_per_s'] * (1 - tolerance):
+            regressions.append(f'{stage}: {previous["emails_per_s"]:.0f} -> {current["emails_per_s"]:.0f} emails/s')
+        if current['peak_kib_per_email'] > previous['peak_kib_per_email'] * (1 + tolerance):
+            regressions.append(
+                f'{stage}: {previous["peak_kib_per_email"]:.2f} -> {current["peak_kib_per_email"]:.2f} KiB/email')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-stage parser benchmark')
+    parser.add_argument('--emails', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='write the results to this baseline file')
+    parser.add_argument('--compare', help='compare the results with this baseline file')
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    args = parser.parse_args()
+
+    results = run(args.emails, args.seed)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline['emails'] != args.emails or baseline['seed'] != args.seed:
+            print(f'warning: baseline was taken on {baseline["emails"]} emails with seed {baseline["seed"]}')
+
+    print(f'{"stage":<12} {"emails/s":>10} {"KiB/email":>10}' + ('  vs baseline' if baseline else ''))
+    for stage, result in results.items():
+        line = f'{stage:<12} {result["emails_per_s"]:>10.0f} {result["peak_kib_per_email"]:>10.2f}'
+        if baseline and stage in baseline['stages']:
+            previous = baseline['stages'][stage]
+            line += f'  {result["emails_per_s"] / previous["emails_per_s"] - 1:>+7.1%} ' \
+                    f'{result["peak_kib_per_email"] / previous["peak_kib_per_email"] - 1:>+7.1%}'
+        print(line)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump({'emails': args.emails, 'seed': args.seed, 'python': platform.python_version(),
+                       'stages': results}, file, indent=2)
+        print(f'Saved baseline to {args.save}')
+
+    if baseline:
+        regressions = compare(results, baseline['stages'], args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
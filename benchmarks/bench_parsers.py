@@ -0,0 +1,68 @@
+"""
+Per-email field extraction cost of the bank parsers.
+
+Compares the previous per-call regex usage with the precompiled ParserSpec
+scan, plus a single combined-pattern scan of the same fields for reference.
+
+    python benchmarks/bench_parsers.py
+"""
+import re
+import timeit
+
+from email_transaction_extractor.utils.parsers.bac_parser import \
+    BacMessageParser
+from email_transaction_extractor.utils.parsers.promerica_parser import \
+    PromericaMessageParser
+
+NUMBER = 2000
+REPEAT = 5
+
+FILLER = 'Estimado cliente, le informamos sobre la transaccion realizada con su tarjeta.\n' * 25
+BAC_BODY = (FILLER + 'Comercio:\r\nAUTOMERCADO\nCiudad y pais:\r\nSan Jose\n'
+            'Monto:\r\n CRC 1,500.00\r\n' + FILLER)
+PROMERICA_BODY = (FILLER + 'Comercio  WALMART ESCAZU   T\nTipo de Comercio  SUPERMERCADOS\n'
+                  'Monto  \n CRC: 12,345.67\n' + FILLER)
+
+
+def legacy_bac(body: str):
+    re.compile(r'Comercio:\s*\r\n(?P<business>.+?)\s*\n', re.DOTALL).search(body)
+    re.compile(r'Monto:\s*\r\n\s*(?P<currency>\w+)\s(?P<value>[\d,]+\.\d{2})').search(body)
+
+
+def legacy_promerica(body: str):
+    re.search(r'Comercio\s+([A-Z\s]+)', body)
+    re.search(r'Tipo de Comercio\s+([A-Z\s]+)', body)
+    re.search(r'Monto\s+\n (\w+): ([\d,]+.\d{2})', body)
+
+
+def combined_scan(spec):
+    """One pass of zero-width lookaheads over the body, one per field."""
+    regex = re.compile('|'.join(
+        f'(?=(?P<{name}>{re.sub(r"\(\?P<\w+>", "(?:", pattern.pattern)}))'
+        for name, pattern in spec.fields.items()))
+
+    def scan(body: str):
+        found = {}
+        for match in regex.finditer(body):
+            found.setdefault(match.lastgroup, match)
+        return found
+    return scan
+
+
+def measure(function, *args) -> float:
+    return min(timeit.repeat(lambda: function(*args), number=NUMBER, repeat=REPEAT)) / NUMBER * 1e6
+
+
+def main():
+    cases = [
+        ('BAC', BAC_BODY, legacy_bac, BacMessageParser.spec),
+        ('Promerica', PROMERICA_BODY, legacy_promerica, PromericaMessageParser.spec),
+    ]
+    print(f'{"bank":<10} {"legacy":>10} {"spec":>10} {"combined":>10}  (us per email)')
+    for bank, body, legacy, spec in cases:
+        print(f'{bank:<10} {measure(legacy, body):>10.2f} {measure(spec.scan, body):>10.2f} '
+              f'{measure(combined_scan(spec), body):>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
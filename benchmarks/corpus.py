@@ -0,0 +1,100 @@
+"""
+Synthetic BAC and Promerica notification emails for the parser benchmarks.
+
+Every email is a transaction the parsers should extract, rendered in one of
+four shapes seen in real mailboxes: a plain text body, an HTML body,
+multipart/alternative with both, and multipart/mixed with a PDF receipt
+attached. Text parts are base64 encoded so the CRLF line breaks the BAC
+patterns rely on survive serialization.
+"""
+import random
+from datetime import datetime, timedelta
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import format_datetime
+from typing import List, Tuple, Type
+
+from email_transaction_extractor.utils.parsers import (BacMessageParser,
+                                                       BaseMessageParser,
+                                                       PromericaMessageParser)
+
+SHAPES = ('plain', 'html', 'alternative', 'attachment')
+BUSINESSES = ['AUTOMERCADO', 'WALMART ESCAZU', 'MAS X MENOS', 'UBER TRIP', 'SPOON LINDORA',
+              'FARMACIA FISCHEL', 'GASOLINERA LA GALERA', 'NETFLIX COM', 'AMAZON MKTPLACE']
+BUSINESS_TYPES = ['SUPERMERCADOS', 'RESTAURANTES', 'TRANSPORTE', 'FARMACIAS', 'SERVICIOS']
+CURRENCIES = ['CRC', 'USD']
+FILLER = ('Estimado cliente, le informamos sobre la transaccion realizada con su tarjeta. '
+          'Si no reconoce esta transaccion comuniquese con nosotros.\n') * 6
+
+
+def bac_text(business: str, amount: str, currency: str) -> str:
+    return (f'Hola SEBASTIAN,\n{FILLER}Comercio:\r\n{business}\n'
+            f'Ciudad y pais:\r\nSAN JOSE, Costa Rica\nMonto:\r\n {currency} {amount}\r\n{FILLER}')
+
+
+def bac_html(business: str, amount: str, currency: str) -> str:
+    return (f'<html><body><div style="font-family:Arial"><p>Hola SEBASTIAN,</p><p>{FILLER}</p>'
+            f'<table><tr><td>Comercio:\r\n{business}\n</td></tr>'
+            f'<tr><td>Ciudad y pa&iacute;s:</td><td>SAN JOSE, Costa Rica</td></tr>'
+            f'<tr><td>Monto:\r\n {currency} {amount}\r\n</td></tr></table>'
+            f'<p>{FILLER}</p></div></body></html>')
+
+
+def promerica_text(business: str, business_type: str, amount: str, currency: str) -> str:
+    return (f'{FILLER}Comercio  {business}\nTipo de Comercio  {business_type}\n'
+            f'fecha 01/07/2024\nMonto  \n {currency}: {amount}\n{FILLER}')
+
+
+def promerica_html(business: str, business_type: str, amount: str, currency: str) -> str:
+    return (f'<html><head><style>td {{ padding: 4px; }}</style></head><body><p>{FILLER}</p>'
+            f'<table><tr><td>Comercio  {business}</td></tr>'
+            f'<tr><td>Tipo de Comercio  {business_type}</td></tr>'
+            f'<tr><td>fecha 01/07/2024</td></tr>'
+            f'<tr><td>Monto  \n {currency}: {amount}</td></tr></table><p>{FILLER}</p></body></html>')
+
+
+def render(shape: str, text: str, html: str):
+    if shape == 'plain':
+        return MIMEText(text, 'plain', 'utf-8')
+    if shape == 'html':
+        return MIMEText(html, 'html', 'utf-8')
+    alternative = MIMEMultipart('alternative')
+    alternative.attach(MIMEText(text, 'plain', 'utf-8'))
+    alternative.attach(MIMEText(html, 'html', 'utf-8'))
+    if shape == 'alternative':
+        return alternative
+    mixed = MIMEMultipart('mixed')
+    mixed.attach(alternative)
+    receipt = MIMEApplication(b'%PDF-1.4\n' + bytes(range(256)) * 32, 'pdf')
+    receipt.add_header('Content-Disposition', 'attachment', filename='comprobante.pdf')
+    mixed.attach(receipt)
+    return mixed
+
+
+def make_email(rng: random.Random, index: int, parser_class: Type[BaseMessageParser], shape: str) -> bytes:
+    business = rng.choice(BUSINESSES)
+    business_type = rng.choice(BUSINESS_TYPES)
+    currency = rng.choice(CURRENCIES)
+    amount = f'{rng.uniform(1, 250_000):,.2f}'
+    if parser_class is BacMessageParser:
+        msg = render(shape, bac_text(business, amount, currency),
+                     bac_html(business, amount, currency))
+        msg['Subject'] = 'Notificacion de transaccion'
+    else:
+        msg = render(shape, promerica_text(business, business_type, amount, currency),
+                     promerica_html(business, business_type, amount, currency))
+        msg['Subject'] = 'Comprobante de compra'
+    msg['From'] = f'{parser_class.bank.name} <{parser_class.bank.email}>'
+    msg['To'] = 'someone@example.com'
+    msg['Date'] = format_datetime(datetime(2024, 1, 1, 8) + timedelta(minutes=37 * index))
+    msg['Message-ID'] = f'<{index}.{shape}@bench.local>'
+    return msg.as_bytes()
+
+
+def generate_corpus(size: int, seed: int = 0) -> List[Tuple[Type[BaseMessageParser], bytes]]:
+    """Returns `size` (parser class, raw email) pairs, cycling through banks and shapes."""
+    rng = random.Random(seed)
+    parsers = (BacMessageParser, PromericaMessageParser)
+    return [(parsers[i % 2], make_email(rng, i, parsers[i % 2], SHAPES[(i // 2) % len(SHAPES)]))
+            for i in range(size)]
@@ -1,7 +1,69 @@
-# email_transaction_extractor/__main__.py
+import argparse
+import email
+
 import uvicorn
 
 
 def run():
     uvicorn.run("email_transaction_extractor.main:app",
                 host="127.0.0.1", port=8000, reload=True)
+
+
+def reparse():
+    """Rebuilds transactions from the raw message store without contacting the mail server."""
+    from email_transaction_extractor.config import config
+    from email_transaction_extractor.database import (Base, SessionLocal,
+                                                      engine)
+    from email_transaction_extractor.email.message import IMAPMessage
+    from email_transaction_extractor.email.raw_store import RawMessageStore
+    from email_transaction_extractor.services.transaction_service import \
+        TransactionService
+    from email_transaction_extractor.utils.html import set_backend
+
+    parser = argparse.ArgumentParser(description=reparse.__doc__)
+    parser.add_argument('--store', default=config.RAW_STORE_PATH,
+                        help='Path of the raw message store (defaults to RAW_STORE_PATH)')
+    args = parser.parse_args()
+    if not args.store:
+        parser.error('no store given and RAW_STORE_PATH is not set')
+
+    set_backend(config.HTML_TO_TEXT_BACKEND)
+    Base.metadata.create_all(bind=engine)
+    store = RawMessageStore(args.store)
+    db = SessionLocal()
+    try:
+        emails = (email.message_from_bytes(raw, _class=IMAPMessage)
+                  for raw in store.iter_messages())
+        response = TransactionService(db).reparse_emails(emails)
+        print(response.meta.message)
+    finally:
+        db.close()
+        store.close()
+
+
+def import_archive():
+    """Imports bank transactions from mbox files (e.g. Google Takeout) or directories of .eml files."""
+    from email_transaction_extractor.database import (Base, SessionLocal,
+                                                      engine)
+    from email_transaction_extractor.email.archive import \
+        iter_archive_messages
+    from email_transaction_extractor.services.transaction_service import \
+        TransactionService
+    from email_transaction_extractor.utils.parsers import registry
+
+    parser = argparse.ArgumentParser(description=import_archive.__doc__)
+    parser.add_argument('paths', nargs='+',
+                        help='mbox files, .eml files or directories of .eml files')
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    senders = registry.senders
+    db = SessionLocal()
+    try:
+        service = TransactionService(db)
+        for path in args.paths:
+            response = service.import_emails(
+                iter_archive_messages(path, senders))
+            print(f'{path}: {response.meta.message}')
+    finally:
+        db.close()
@@ -1,21 +1,37 @@
-from typing import Literal
+from typing import Literal, Optional
 from pathlib import Path
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic_settings import SettingsConfigDict
 
+from email_transaction_extractor.database import DatabaseSettings
 
-class Settings(BaseSettings):
+
+class Settings(DatabaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
         env_ignore_empty=True,
         env_file_encoding='utf-8',
         extra="ignore"
     )
+    BACKFILL_SHARD_DAYS: int = 7
+    BACKFILL_WORKERS: int = 3
     DATABASE_URL: str
+    EMAIL_FETCH_BATCH_SIZE: int = 200
+    EMAIL_IDLE_ENABLED: bool = True
+    EMAIL_IDLE_RENEW_SECONDS: int = 29 * 60
+    EMAIL_KEEPALIVE_SECONDS: int = 300
     EMAIL_MAILBOX: str = "inbox"
+    EMAIL_PARTIAL_FETCH: bool = True
     EMAIL_PASSWORD: str
+    EMAIL_POOL_SIZE: int = 4
+    EMAIL_POOL_TIMEOUT_SECONDS: int = 30
     EMAIL_USER: str
     ENVIRONMENT: Literal['local', 'dev', 'prod'] = 'local'
+    HTML_TO_TEXT_BACKEND: Literal['auto', 'stdlib', 'lxml', 'bs4'] = 'auto'
     LOG_FILE: str = "server.log"
+    PARSE_CACHE_SIZE: int = 10_000
+    PARSE_CHUNK_SIZE: int = 64
+    PARSE_WORKERS: int = 0
+    RAW_STORE_PATH: Optional[str] = None
     REFRESH_INTERVAL_IN_MINUTES: int = 60
 
 
@@ -1,10 +1,94 @@
-from sqlalchemy import create_engine
+from typing import Any, Dict, Literal
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
-import os
 
-DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./test.db')
 
-engine = create_engine(DATABASE_URL)
+class DatabaseSettings(BaseSettings):
+    """
+    Engine settings. Kept apart from `config.Settings`, which extends them,
+    because the models import this module and must not need the email
+    credentials `Settings` requires.
+
+    The 'tuned' profile sizes the connection pool, pings connections before
+    use and applies a statement timeout on Postgres, and on SQLite switches
+    to WAL so that readers are not blocked by the ingest writer. The
+    'default' profile leaves SQLAlchemy's defaults untouched.
+    """
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_ignore_empty=True,
+        env_file_encoding='utf-8',
+        extra="ignore"
+    )
+    DATABASE_URL: str = 'sqlite:///./test.db'
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_SIZE: int = 5
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_PROFILE: Literal['default', 'tuned'] = 'tuned'
+    DB_SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    DB_SQLITE_JOURNAL_MODE: Literal['WAL', 'DELETE', 'TRUNCATE', 'MEMORY'] = 'WAL'
+    DB_SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    DB_SQLITE_SYNCHRONOUS: Literal['OFF', 'NORMAL', 'FULL', 'EXTRA'] = 'NORMAL'
+    DB_STATEMENT_TIMEOUT_MS: int = 30_000
+
+
+def engine_options(settings: DatabaseSettings) -> Dict[str, Any]:
+    """Returns the `create_engine` keyword arguments of the settings' profile."""
+    if settings.DB_PROFILE == 'default':
+        return {}
+    url = make_url(settings.DATABASE_URL)
+    options: Dict[str, Any] = {'pool_pre_ping': settings.DB_POOL_PRE_PING}
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            # In-memory databases live in a single connection, there is no pool to size
+            return options
+        return {**options,
+                'pool_size': settings.DB_POOL_SIZE,
+                'max_overflow': settings.DB_MAX_OVERFLOW,
+                'pool_timeout': settings.DB_POOL_TIMEOUT_SECONDS,
+                'connect_args': {'timeout': settings.DB_SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    options.update(pool_size=settings.DB_POOL_SIZE,
+                   max_overflow=settings.DB_MAX_OVERFLOW,
+                   pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+                   pool_recycle=settings.DB_POOL_RECYCLE_SECONDS)
+    if url.get_backend_name() == 'postgresql' and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        options['connect_args'] = {
+            'options': f'-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}'}
+    return options
+
+
+def set_sqlite_pragmas(engine: Engine, settings: DatabaseSettings):
+    """Applies the SQLite pragmas of the settings to every new connection of `engine`."""
+    pragmas = {
+        'journal_mode': settings.DB_SQLITE_JOURNAL_MODE,
+        'synchronous': settings.DB_SQLITE_SYNCHRONOUS,
+        'busy_timeout': settings.DB_SQLITE_BUSY_TIMEOUT_MS,
+        'mmap_size': settings.DB_SQLITE_MMAP_SIZE,
+    }
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def create_database_engine(settings: DatabaseSettings) -> Engine:
+    engine = create_engine(settings.DATABASE_URL, **engine_options(settings))
+    if settings.DB_PROFILE == 'tuned' and engine.dialect.name == 'sqlite':
+        set_sqlite_pragmas(engine, settings)
+    return engine
+
+
+engine = create_database_engine(DatabaseSettings())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
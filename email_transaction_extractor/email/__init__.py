@@ -1,2 +1,4 @@
 from .imap_search_criteria import IMAPSearchCriteria
 from .client import EmailClient
+from .message import IMAPMessage
+from .async_client import AsyncEmailClient
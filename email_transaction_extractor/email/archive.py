@@ -0,0 +1,79 @@
+import email
+import mmap
+import os
+import re
+from email.parser import BytesHeaderParser
+from email.utils import parseaddr
+from pathlib import Path
+from typing import Collection, Iterator, Optional
+
+from email_transaction_extractor.email.message import IMAPMessage
+
+FROM_LINE = b'From '
+QUOTED_FROM_LINE = re.compile(rb'^>(>*From )', re.MULTILINE)
+HEADER_END = re.compile(rb'\r?\n\r?\n')
+
+
+def iter_mbox(path: str) -> Iterator[bytes]:
+    """
+    Yields the raw bytes of every message in an mbox file. The file is
+    memory-mapped and scanned for `From ` separator lines, so only the
+    message being yielded is copied into memory. Lines quoted as `>From `
+    (mboxrd, as written by Google Takeout) are unquoted.
+    """
+    with open(path, 'rb') as mbox:
+        if os.fstat(mbox.fileno()).st_size == 0:
+            return
+        with mmap.mmap(mbox.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(FROM_LINE)] == FROM_LINE:
+                position = 0
+            elif (separator := data.find(b'\n' + FROM_LINE)) != -1:
+                position = separator + 1
+            else:
+                return
+            while position < len(data):
+                start = data.find(b'\n', position) + 1 or len(data)
+                separator = data.find(b'\n' + FROM_LINE, start)
+                end = separator + 1 if separator != -1 else len(data)
+                raw = data[start:end].rstrip(b'\r\n')
+                if b'>From ' in raw:
+                    raw = QUOTED_FROM_LINE.sub(rb'\1', raw)
+                yield raw + b'\n'
+                position = end
+
+
+def iter_eml_directory(path: str) -> Iterator[bytes]:
+    """Yields the raw bytes of every `.eml` file under `path`, one file at a time."""
+    for eml in sorted(Path(path).rglob('*.eml')):
+        yield eml.read_bytes()
+
+
+def iter_archive(path: str) -> Iterator[bytes]:
+    """Yields raw messages from a directory of `.eml` files, a single `.eml` file or an mbox file."""
+    if os.path.isdir(path):
+        yield from iter_eml_directory(path)
+    elif path.lower().endswith('.eml'):
+        yield Path(path).read_bytes()
+    else:
+        yield from iter_mbox(path)
+
+
+def sender_of(raw: bytes) -> str:
+    """Returns the lowercase From address, parsing only the header block."""
+    match = HEADER_END.search(raw)
+    header = raw[:match.end()] if match else raw
+    _, address = parseaddr(BytesHeaderParser().parsebytes(header).get('From', ''))
+    return address.lower()
+
+
+def iter_archive_messages(path: str, senders: Optional[Collection[str]] = None) -> Iterator[IMAPMessage]:
+    """
+    Parses the messages of an archive, see `iter_archive`. When `senders` is
+    given, messages from any other address are skipped after reading only
+    their headers.
+    """
+    senders = {sender.lower() for sender in senders} if senders else None
+    for raw in iter_archive(path):
+        if senders is not None and sender_of(raw) not in senders:
+            continue
+        yield email.message_from_bytes(raw, _class=IMAPMessage)
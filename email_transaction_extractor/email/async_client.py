@@ -0,0 +1,281 @@
+import asyncio
+import itertools
+import logging
+import re
+import ssl
+import time
+from typing import (Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple,
+                    Union)
+
+from email_transaction_extractor.email.bodystructure import (
+    FULL_FETCH_ITEMS, MESSAGE_ID_FETCH_ITEMS, STRUCTURE_FETCH_ITEMS,
+    build_full_messages, build_section_messages, parse_message_ids,
+    plan_text_fetches, section_fetch_items)
+from email_transaction_extractor.email.client import (MessageId,
+                                                      archive_message,
+                                                      build_message_set,
+                                                      chunked)
+from email_transaction_extractor.email.imap_response import \
+    parse_fetch_response
+from email_transaction_extractor.email.imap_search_criteria import \
+    IMAPSearchCriteria
+from email_transaction_extractor.email.message import IMAPMessage
+from email_transaction_extractor.email.raw_store import RawMessageStore
+
+LITERAL_PATTERN = re.compile(rb'\{(\d+)\}$')
+FETCH_RESPONSE_PATTERN = re.compile(rb'^(\d+) FETCH (.*)$', re.DOTALL)
+UID_VALIDITY_PATTERN = re.compile(rb'\[UIDVALIDITY (\d+)\]')
+EXISTS_PATTERN = re.compile(rb'^\* \d+ EXISTS$')
+
+ResponsePart = Union[bytes, Tuple[bytes, bytes]]
+
+
+class AsyncIMAPError(Exception):
+    pass
+
+
+def quote(value: str) -> str:
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+class AsyncEmailClient:
+    """
+    asyncio counterpart of EmailClient. Commands are written and responses
+    read on an asyncio stream, so searches and downloads do not block the
+    event loop. Responses are handed to the same parsers EmailClient uses.
+    """
+
+    def __init__(self, email_user: str, email_pass: str, server: str, mailbox: str = "inbox",
+                 batch_size: int = 200, partial_fetch: bool = True, port: int = 993,
+                 raw_store: Optional[RawMessageStore] = None):
+        self.server = server
+        self.port = port
+        self.email_user = email_user
+        self.email_pass = email_pass
+        self.mailbox = mailbox
+        self.batch_size = batch_size
+        self.partial_fetch = partial_fetch
+        self.raw_store = raw_store
+        self.uid_validity: Optional[int] = None
+        self.logger = logging.getLogger(__name__)
+        self.__reader: Optional[asyncio.StreamReader] = None
+        self.__writer: Optional[asyncio.StreamWriter] = None
+        self.__tags = itertools.count(1)
+
+    def spawn(self) -> 'AsyncEmailClient':
+        """Returns a new, not yet connected client with the same settings."""
+        return AsyncEmailClient(self.email_user, self.email_pass, self.server, self.mailbox,
+                                batch_size=self.batch_size, partial_fetch=self.partial_fetch, port=self.port,
+                                raw_store=self.raw_store)
+
+    @property
+    def connected(self) -> bool:
+        return self.__writer is not None
+
+    async def connect(self):
+        try:
+            self.__reader, self.__writer = await asyncio.open_connection(
+                self.server, self.port, ssl=ssl.create_default_context(), limit=2 ** 20)
+            await self.__reader.readline()
+            # Like imaplib's login, a NO to LOGIN or SELECT fails the connection
+            status, _ = await self.__command('LOGIN', quote(self.email_user), quote(self.email_pass))
+            if status != 'OK':
+                raise AsyncIMAPError(f'LOGIN failed for {self.email_user}: {status}')
+            status, responses = await self.__command('SELECT', quote(self.mailbox))
+            if status != 'OK':
+                raise AsyncIMAPError(f'SELECT {self.mailbox} failed: {status}')
+            for response in responses:
+                match = isinstance(response[0], bytes) and UID_VALIDITY_PATTERN.search(response[0])
+                if match:
+                    self.uid_validity = int(match.group(1))
+            self.logger.info('Connected to the email server')
+        except Exception as e:
+            self.logger.exception(
+                f'Failed to connect to the email server: {e}')
+            if self.__writer is not None:
+                self.__writer.close()
+                self.__writer = self.__reader = None
+            raise
+
+    async def capabilities(self) -> List[str]:
+        _, responses = await self.__command('CAPABILITY')
+        return [capability.decode().upper() for response in responses
+                if isinstance(response[0], bytes) and response[0].startswith(b'CAPABILITY')
+                for capability in response[0].split()[1:]]
+
+    async def idle(self, timeout: float) -> bool:
+        """
+        Enters IDLE (RFC 2177) and waits up to `timeout` seconds for the server
+        to announce new messages, then sends DONE. Returns True when an EXISTS
+        response was received, including ones queued before IDLE started.
+        """
+        tag = self.__next_tag()
+        self.__writer.write(tag + b' IDLE\r\n')
+        await self.__writer.drain()
+
+        has_new_mail = False
+        while not (line := await self.__readline()).startswith(b'+'):
+            if line.startswith(tag + b' '):
+                raise AsyncIMAPError(line.decode(errors='replace'))
+            has_new_mail = has_new_mail or bool(EXISTS_PATTERN.match(line))
+
+        deadline = time.monotonic() + timeout
+        while not has_new_mail and (remaining := deadline - time.monotonic()) > 0:
+            try:
+                line = await asyncio.wait_for(self.__readline(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if line.startswith(b'* BYE'):
+                raise AsyncIMAPError(line.decode(errors='replace'))
+            has_new_mail = bool(EXISTS_PATTERN.match(line))
+
+        self.__writer.write(b'DONE\r\n')
+        await self.__writer.drain()
+        while not (line := await self.__readline()).startswith(tag + b' '):
+            has_new_mail = has_new_mail or bool(EXISTS_PATTERN.match(line))
+        return has_new_mail
+
+    async def fetch_email_ids(self, criteria: IMAPSearchCriteria) -> Optional[List[bytes]]:
+        return await self.__search(('SEARCH', criteria.build()))
+
+    async def fetch_email_uids(self, criteria: IMAPSearchCriteria) -> Optional[List[int]]:
+        ids = await self.__search(('UID', 'SEARCH', criteria.build()))
+        return None if ids is None else [int(uid) for uid in ids]
+
+    async def fetch_message_ids(self, email_ids: List[MessageId], uid: bool = False) -> Dict[int, Optional[str]]:
+        """See EmailClient.fetch_message_ids."""
+        message_ids: Dict[int, Optional[str]] = {}
+        for batch in chunked(email_ids, self.batch_size):
+            message_set = build_message_set(batch)
+            try:
+                message_ids.update(parse_message_ids(
+                    await self.__fetch(message_set, MESSAGE_ID_FETCH_ITEMS, uid), uid))
+            except Exception as e:
+                self.logger.exception(
+                    f'Error fetching Message-IDs for {message_set}: {e}')
+        return message_ids
+
+    async def iter_emails(self, email_ids: List[MessageId], uid: bool = False) -> AsyncIterator[IMAPMessage]:
+        """Fetches the given messages in batches of `batch_size` and yields them as each batch arrives, see EmailClient.iter_emails."""
+        for batch in chunked(email_ids, self.batch_size):
+            message_set = build_message_set(batch)
+            try:
+                if self.partial_fetch:
+                    messages = await self.__fetch_text_parts(message_set, uid)
+                else:
+                    messages = list(build_full_messages(await self.__fetch(message_set, FULL_FETCH_ITEMS, uid)))
+            except Exception as e:
+                self.logger.exception(
+                    f'Error fetching emails with IDs {message_set}: {e}')
+                continue
+            for msg in messages:
+                archive_message(self.raw_store, msg, self.uid_validity)
+                yield msg
+
+    async def get_emails(self, email_ids: List[MessageId], uid: bool = False) -> List[IMAPMessage]:
+        return [msg async for msg in self.iter_emails(email_ids, uid=uid)]
+
+    async def disconnect(self):
+        if self.__writer is None:
+            return
+        try:
+            await self.__command('LOGOUT')
+            self.logger.info('Disconnected from the email server')
+        except Exception as e:
+            self.logger.error(
+                f'Failed to disconnect from the email server: {e}')
+        finally:
+            self.__writer.close()
+            self.__writer = self.__reader = None
+
+    async def __search(self, command: Tuple[str, ...]) -> Optional[List[bytes]]:
+        try:
+            status, responses = await self.__command(*command)
+            if status == 'OK':
+                return [email_id for response in responses
+                        if isinstance(response[0], bytes) and response[0].startswith(b'SEARCH')
+                        for email_id in response[0].split()[1:]]
+            self.logger.error(f'Status not OK: {status}')
+        except Exception as e:
+            self.logger.exception(f'Error fetching email IDs: {e}')
+        return None
+
+    async def __fetch(self, message_set: str, items: str, uid: bool) -> List[Tuple[int, Dict[bytes, Any]]]:
+        command = ('UID', 'FETCH') if uid else ('FETCH',)
+        status, responses = await self.__command(*command, message_set, items)
+        if status != 'OK':
+            self.logger.error(f'Failed to get emails with IDs {message_set}')
+            return []
+        return list(parse_fetch_response(self.__to_imaplib_fetch_data(responses)))
+
+    async def __fetch_text_parts(self, message_set: str, uid: bool) -> List[IMAPMessage]:
+        sections, full_ids = plan_text_fetches(
+            await self.__fetch(message_set, STRUCTURE_FETCH_ITEMS, uid), uid)
+        emails: List[IMAPMessage] = []
+        for section, text_parts in sections.items():
+            responses = await self.__fetch(build_message_set(text_parts), section_fetch_items(section), uid)
+            emails += build_section_messages(responses,
+                                             section, text_parts, uid)
+        if full_ids:
+            emails += build_full_messages(await self.__fetch(build_message_set(full_ids), FULL_FETCH_ITEMS, uid))
+        return emails
+
+    async def __command(self, *args: str) -> Tuple[str, List[List[ResponsePart]]]:
+        """
+        Sends a tagged command and collects its untagged responses until the
+        tagged completion. Each response is a list of parts shaped like
+        imaplib's: bytes for plain lines, `(line, literal)` for literals.
+        """
+        tag = self.__next_tag()
+        self.__writer.write(tag + b' ' + ' '.join(args).encode() + b'\r\n')
+        await self.__writer.drain()
+
+        responses: List[List[ResponsePart]] = []
+        while True:
+            line = await self.__readline()
+            if line.startswith(tag + b' '):
+                status = line[len(tag) + 1:].split(b' ', 1)[0].decode()
+                if status == 'BAD':
+                    raise AsyncIMAPError(line.decode(errors='replace'))
+                return status, responses
+            if line.startswith(b'* BYE') and args[0] != 'LOGOUT':
+                raise AsyncIMAPError(line.decode(errors='replace'))
+            if not line.startswith(b'* '):
+                continue
+            parts: List[ResponsePart] = []
+            line = line[2:]
+            while (match := LITERAL_PATTERN.search(line)):
+                literal = await self.__reader.readexactly(int(match.group(1)))
+                parts.append((line, literal))
+                line = await self.__readline()
+            parts.append(line)
+            responses.append(parts)
+
+    def __next_tag(self) -> bytes:
+        return f'A{next(self.__tags):04d}'.encode()
+
+    async def __readline(self) -> bytes:
+        line = await self.__reader.readline()
+        if not line:
+            raise AsyncIMAPError('Connection closed by the server')
+        return line.rstrip(b'\r\n')
+
+    @staticmethod
+    def __to_imaplib_fetch_data(responses: List[List[ResponsePart]]) -> Iterator[ResponsePart]:
+        """Drops the FETCH keyword so responses read like imaplib's fetch data."""
+        for parts in responses:
+            first = parts[0]
+            line = first[0] if isinstance(first, tuple) else first
+            match = FETCH_RESPONSE_PATTERN.match(line)
+            if not match:
+                continue
+            line = match.group(1) + b' ' + match.group(2)
+            yield (line, first[1]) if isinstance(first, tuple) else line
+            yield from parts[1:]
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.disconnect()
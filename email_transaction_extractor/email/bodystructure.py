@@ -0,0 +1,148 @@
+import email
+from email.parser import BytesHeaderParser
+from itertools import takewhile
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from email_transaction_extractor.email.message import IMAPMessage
+
+FULL_FETCH_ITEMS = '(UID BODY.PEEK[])'
+STRUCTURE_FETCH_ITEMS = '(UID BODYSTRUCTURE)'
+MESSAGE_ID_FETCH_ITEMS = '(UID BODY.PEEK[HEADER.FIELDS (MESSAGE-ID)])'
+CONTENT_HEADERS = (b'content-type', b'content-transfer-encoding', b'content-disposition')
+
+FetchResponse = Iterable[Tuple[int, Dict[bytes, Any]]]
+
+
+class TextPart(NamedTuple):
+    section: str
+    subtype: str
+    charset: Optional[str]
+    encoding: str
+
+
+def _decode(value: Any) -> str:
+    return value.decode(errors='replace') if isinstance(value, bytes) else ''
+
+
+def _iter_leaf_parts(structure: list, section: str = '') -> Iterator[Tuple[str, list]]:
+    if structure and isinstance(structure[0], list):
+        children = takewhile(lambda child: isinstance(child, list), structure)
+        for index, child in enumerate(children, start=1):
+            yield from _iter_leaf_parts(
+                child, f'{section}.{index}' if section else str(index))
+    else:
+        yield section or '1', structure
+
+
+def find_text_part(structure: list) -> Optional[TextPart]:
+    """
+    Returns the first non-attachment text/plain or text/html part of a parsed
+    BODYSTRUCTURE, mirroring the part BaseMessageParser would pick from the
+    full message. Returns None when the body cannot be resolved from the
+    structure alone (no text part, or an encapsulated message comes first),
+    in which case the full message should be fetched.
+    """
+    for section, part in _iter_leaf_parts(structure):
+        main_type, subtype = _decode(part[0]).lower(), _decode(part[1]).lower()
+        if main_type == 'message':
+            return None
+        if main_type != 'text' or subtype not in ('plain', 'html'):
+            continue
+        disposition = part[9] if len(part) > 9 else None
+        if isinstance(disposition, list) and 'attachment' in _decode(disposition[0]).lower():
+            continue
+        if not int(part[6] or 0):
+            continue
+        params = part[2] if isinstance(part[2], list) else []
+        charset = next((_decode(value) for key, value in zip(params[::2], params[1::2])
+                        if _decode(key).lower() == 'charset'), None)
+        return TextPart(section, subtype, charset, _decode(part[5]).lower() or '7bit')
+    return None
+
+
+def parse_message(raw: bytes) -> IMAPMessage:
+    msg = email.message_from_bytes(raw, _class=IMAPMessage)
+    msg.raw = raw
+    return msg
+
+
+def build_text_message(header: bytes, text_part: TextPart, payload: bytes) -> IMAPMessage:
+    """
+    Builds a single-part message out of the fetched header block and the raw
+    bytes of one body section, rewriting the content headers so that
+    `get_payload(decode=True)` decodes the section like the original part.
+    Every other header line and the section are kept byte for byte, and the
+    result is the message's `raw`.
+    """
+    lines: List[bytes] = []
+    skipping = False
+    for line in header.splitlines(keepends=True):
+        if not line.strip():
+            break
+        if line[:1] not in (b' ', b'\t'):
+            skipping = line.split(b':', 1)[0].strip().lower() in CONTENT_HEADERS
+        if not skipping:
+            lines.append(line)
+    content_type = f'text/{text_part.subtype}'
+    if text_part.charset:
+        content_type += f'; charset="{text_part.charset}"'
+    lines.append(f'Content-Type: {content_type}\r\n'.encode())
+    lines.append(f'Content-Transfer-Encoding: {text_part.encoding}\r\n'.encode())
+    return parse_message(b''.join(lines) + b'\r\n' + payload)
+
+
+def section_fetch_items(section: str) -> str:
+    return f'(UID BODY.PEEK[HEADER] BODY.PEEK[{section}])'
+
+
+def parse_message_ids(responses: FetchResponse, uid: bool) -> Dict[int, Optional[str]]:
+    """
+    Maps each message of a MESSAGE_ID_FETCH_ITEMS fetch to its Message-ID
+    header, or None when it has none. Messages are keyed by UID when `uid` is
+    set, otherwise by sequence number.
+    """
+    message_ids: Dict[int, Optional[str]] = {}
+    for sequence_number, items in responses:
+        header = next((value for key, value in items.items()
+                       if key.startswith(b'BODY[HEADER.FIELDS')), None) or b''
+        message_id = BytesHeaderParser().parsebytes(header).get('Message-ID')
+        message_ids[items.get(b'UID') if uid else sequence_number] = \
+            message_id.strip() if message_id and message_id.strip() else None
+    return message_ids
+
+
+def plan_text_fetches(responses: FetchResponse, uid: bool) -> Tuple[Dict[str, Dict[int, TextPart]], List[int]]:
+    """
+    Groups the messages of a BODYSTRUCTURE fetch by the section number of
+    their text part, so each group can be downloaded with a single FETCH.
+    Messages without a resolvable text part are returned separately to be
+    fetched in full. Messages are keyed by UID when `uid` is set, otherwise
+    by sequence number.
+    """
+    sections: Dict[str, Dict[int, TextPart]] = {}
+    full_ids: List[int] = []
+    for sequence_number, items in responses:
+        message_id = items.get(b'UID') if uid else sequence_number
+        text_part = find_text_part(items.get(b'BODYSTRUCTURE') or [])
+        if text_part is None:
+            full_ids.append(message_id)
+        else:
+            sections.setdefault(text_part.section, {})[message_id] = text_part
+    return sections, full_ids
+
+
+def build_section_messages(responses: FetchResponse, section: str, text_parts: Dict[int, TextPart], uid: bool) -> Iterator[IMAPMessage]:
+    section_key = f'BODY[{section}]'.encode()
+    for sequence_number, items in responses:
+        text_part = text_parts[items.get(b'UID') if uid else sequence_number]
+        msg = build_text_message(
+            items.get(b'BODY[HEADER]') or b'', text_part, items.get(section_key) or b'')
+        msg.uid = items.get(b'UID')
+        yield msg
+
+
+def build_full_messages(responses: FetchResponse) -> Iterator[IMAPMessage]:
+    for _, items in responses:
+        msg = parse_message(items.get(b'BODY[]') or b'')
+        msg.uid = items.get(b'UID')
+        yield msg
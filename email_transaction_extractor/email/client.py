@@ -1,37 +1,99 @@
-import email
 import imaplib
 import logging
-from email.message import Message
-from typing import List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
+from email_transaction_extractor.email.bodystructure import (
+    FULL_FETCH_ITEMS, MESSAGE_ID_FETCH_ITEMS, STRUCTURE_FETCH_ITEMS,
+    build_full_messages, build_section_messages, parse_message_ids,
+    plan_text_fetches, section_fetch_items)
+from email_transaction_extractor.email.imap_response import \
+    parse_fetch_response
 from email_transaction_extractor.email.imap_search_criteria import \
     IMAPSearchCriteria
+from email_transaction_extractor.email.message import IMAPMessage
+from email_transaction_extractor.email.pool import IMAPSession, IMAPSessionPool
+from email_transaction_extractor.email.raw_store import RawMessageStore
 from email_transaction_extractor.utils.dates import DateRange
 
+MessageId = Union[bytes, str, int]
+
+
+def build_message_set(email_ids: Iterable[MessageId]) -> str:
+    """
+    Builds an IMAP message set from a list of message IDs, collapsing
+    consecutive IDs into ranges, e.g. [1, 2, 3, 7, 9, 10] -> "1:3,7,9:10".
+    """
+    ranges: List[List[int]] = []
+    for current in sorted({int(email_id) for email_id in email_ids}):
+        if ranges and current == ranges[-1][1] + 1:
+            ranges[-1][1] = current
+        else:
+            ranges.append([current, current])
+    return ','.join(str(start) if start == end else f'{start}:{end}'
+                    for start, end in ranges)
+
+
+def chunked(items: Sequence, size: int) -> Iterator[Sequence]:
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+def archive_message(raw_store: Optional[RawMessageStore], msg: IMAPMessage, uid_validity: Optional[int]):
+    if raw_store is None:
+        return
+    try:
+        raw = msg.raw if msg.raw is not None else msg.as_bytes()
+        raw_store.put(raw, message_id=msg.get('Message-ID'),
+                      uid_validity=uid_validity, uid=msg.uid)
+    except Exception as e:
+        logging.getLogger(__name__).exception(
+            f'Failed to archive message with UID {msg.uid}: {e}')
+
 
 class EmailClient:
-    def __init__(self, email_user: str, email_pass: str, server: str, mailbox: str = "inbox"):
+    def __init__(self, email_user: str, email_pass: str, server: str, mailbox: str = "inbox",
+                 batch_size: int = 200, partial_fetch: bool = True, pool: Optional[IMAPSessionPool] = None,
+                 raw_store: Optional[RawMessageStore] = None):
         self.server = server
         self.email_user = email_user
         self.email_pass = email_pass
         self.mailbox = mailbox
+        self.batch_size = batch_size
+        self.partial_fetch = partial_fetch
+        self.pool = pool
+        self.raw_store = raw_store
+        self.session: Optional[IMAPSession] = None
         self.connection: Optional[imaplib.IMAP4_SSL] = None
+        self.uid_validity: Optional[int] = None
         self.logger = logging.getLogger(__name__)
 
     def connect(self):
         try:
-            self.connection = imaplib.IMAP4_SSL(self.server)
-            self.connection.login(self.email_user, self.email_pass)
-            self.connection.select(self.mailbox)
+            if self.pool is not None:
+                self.session = self.pool.acquire()
+            else:
+                self.session = IMAPSession.open(
+                    self.server, self.email_user, self.email_pass, self.mailbox)
+            self.connection = self.session.connection
+            self.uid_validity = self.session.uid_validity
             self.logger.info('Connected to the email server')
         except Exception as e:
             self.logger.exception(
                 f'Failed to connect to the email server: {e}')
             raise
 
+    def spawn(self) -> 'EmailClient':
+        """
+        Returns a new, not yet connected client with the same settings and
+        pool, for work that needs a connection of its own (e.g. another thread).
+        """
+        return EmailClient(self.email_user, self.email_pass, self.server, self.mailbox,
+                           batch_size=self.batch_size, partial_fetch=self.partial_fetch, pool=self.pool,
+                           raw_store=self.raw_store)
+
     def fetch_email_ids(self, criteria: IMAPSearchCriteria) -> Optional[List[str]]:
         try:
-            status, data = self.connection.search(None, criteria.build())
+            status, data = self.__execute('search', None, criteria.build())
             if status == 'OK':
                 return data[0].split()
             self.logger.error(f'Status not OK: {status}')
@@ -39,25 +101,74 @@ class EmailClient:
             self.logger.exception(f'Error fetching email IDs: {e}')
         return None
 
-    def get_emails(self, email_ids: List[str]) -> List[Message]:
-        emails: List[Message] = []
-        for email_id in email_ids:
+    def fetch_email_uids(self, criteria: IMAPSearchCriteria) -> Optional[List[int]]:
+        try:
+            status, data = self.__execute(
+                'uid', 'SEARCH', None, criteria.build())
+            if status == 'OK':
+                return [int(uid) for uid in data[0].split()]
+            self.logger.error(f'Status not OK: {status}')
+        except Exception as e:
+            self.logger.exception(f'Error fetching email UIDs: {e}')
+        return None
+
+    def fetch_message_ids(self, email_ids: List[MessageId], uid: bool = False) -> Dict[int, Optional[str]]:
+        """
+        Fetches only the Message-ID header of the given messages, so callers
+        can drop already ingested messages before downloading their bodies.
+        """
+        message_ids: Dict[int, Optional[str]] = {}
+        for batch in chunked(email_ids, self.batch_size):
+            message_set = build_message_set(batch)
             try:
-                status, msg_data = self.connection.fetch(email_id, "(RFC822)")
-                if status != 'OK':
-                    self.logger.error(
-                        f'Failed to get email with ID {email_id}')
-                    continue
-                for response_part in msg_data:
-                    if isinstance(response_part, tuple):
-                        msg = email.message_from_bytes(response_part[1])
-                        emails.append(msg)
+                message_ids.update(parse_message_ids(
+                    self.__fetch(message_set, MESSAGE_ID_FETCH_ITEMS, uid), uid))
             except Exception as e:
                 self.logger.exception(
-                    f'Error fetching email with ID {email_id}: {e}')
-        return emails
+                    f'Error fetching Message-IDs for {message_set}: {e}')
+        return message_ids
+
+    def iter_emails(self, email_ids: List[MessageId], uid: bool = False,
+                    failed: Optional[List[MessageId]] = None) -> Iterator[IMAPMessage]:
+        """
+        Fetches the given messages in batches of `batch_size`, issuing one
+        FETCH per message set instead of one per message, and yields each
+        message as soon as its batch arrives. When `uid` is set the IDs are
+        treated as UIDs and a `UID FETCH` is issued instead.
+
+        With `partial_fetch` enabled only the header and the text part the
+        parsers use are downloaded; otherwise the whole message is. Both modes
+        use BODY.PEEK so messages are not marked as seen.
+
+        When a `raw_store` is set every fetched message is archived in it.
+        A batch that fails is logged and skipped; its IDs are added to
+        `failed` when given, so callers can tell which messages never arrived.
+        """
+        for batch in chunked(email_ids, self.batch_size):
+            message_set = build_message_set(batch)
+            try:
+                if self.partial_fetch:
+                    messages = self.__fetch_text_parts(message_set, uid)
+                else:
+                    messages = self.__fetch_full(message_set, uid)
+                for msg in messages:
+                    archive_message(self.raw_store, msg, self.uid_validity)
+                    yield msg
+            except Exception as e:
+                self.logger.exception(
+                    f'Error fetching emails with IDs {message_set}: {e}')
+                if failed is not None:
+                    failed.extend(batch)
+
+    def get_emails(self, email_ids: List[MessageId], uid: bool = False) -> List[IMAPMessage]:
+        return list(self.iter_emails(email_ids, uid=uid))
 
     def disconnect(self):
+        if self.pool is not None and self.session is not None:
+            self.pool.release(self.session)
+            self.session = self.connection = None
+            self.logger.info('Returned the session to the pool')
+            return
         if self.connection:
             try:
                 self.connection.logout()
@@ -66,6 +177,57 @@ class EmailClient:
                 self.logger.error(
                     f'Failed to disconnect from the email server: {e}')
 
+    def __execute(self, command: str, *args):
+        """
+        Runs an imaplib command, reconnecting once if the server closed the
+        session (BYE or a dropped socket surface as IMAP4.abort).
+        """
+        try:
+            return getattr(self.connection, command)(*args)
+        except imaplib.IMAP4.abort as e:
+            self.logger.warning(f'IMAP session aborted ({e}), reconnecting')
+            self.__reconnect()
+            return getattr(self.connection, command)(*args)
+
+    def __reconnect(self):
+        if self.session is not None:
+            if self.pool is not None:
+                self.pool.release(self.session, discard=True)
+            else:
+                self.session.close()
+        self.session = self.connection = None
+        self.connect()
+
+    def __fetch(self, message_set: str, items: str, uid: bool) -> Iterator[Tuple[int, Dict[bytes, Any]]]:
+        if uid:
+            status, msg_data = self.__execute(
+                'uid', 'FETCH', message_set, items)
+        else:
+            status, msg_data = self.__execute(
+                'fetch', message_set, items)
+        if status != 'OK':
+            self.logger.error(f'Failed to get emails with IDs {message_set}')
+            return
+        yield from parse_fetch_response(msg_data)
+
+    def __fetch_full(self, message_set: str, uid: bool) -> Iterator[IMAPMessage]:
+        yield from build_full_messages(self.__fetch(message_set, FULL_FETCH_ITEMS, uid))
+
+    def __fetch_text_parts(self, message_set: str, uid: bool) -> Iterator[IMAPMessage]:
+        """
+        Fetches BODYSTRUCTURE for the message set, then the header and the
+        selected text section with one FETCH per distinct section number.
+        Messages without a resolvable text part are fetched in full.
+        """
+        sections, full_ids = plan_text_fetches(
+            self.__fetch(message_set, STRUCTURE_FETCH_ITEMS, uid), uid)
+        for section, text_parts in sections.items():
+            responses = self.__fetch(build_message_set(
+                text_parts), section_fetch_items(section), uid)
+            yield from build_section_messages(responses, section, text_parts, uid)
+        if full_ids:
+            yield from self.__fetch_full(build_message_set(full_ids), uid)
+
     def __enter__(self):
         self.connect()
         return self
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from email_transaction_extractor.email.async_client import AsyncEmailClient
+
+
+class IdleListener:
+    """
+    Keeps one connection in IMAP IDLE and awaits `on_new_mail` whenever the
+    server announces new messages. IDLE is renewed every `renew_interval`
+    seconds, below the 30 minute limit RFC 2177 gives servers to drop idle
+    clients. `on_new_mail` also runs after every (re)connect to catch up on
+    mail that arrived while the listener was not connected.
+    """
+
+    def __init__(self, client: AsyncEmailClient, on_new_mail: Callable[[], Awaitable[None]],
+                 renew_interval: float = 29 * 60, reconnect_delay: float = 30):
+        self.client = client
+        self.on_new_mail = on_new_mail
+        self.renew_interval = renew_interval
+        self.reconnect_delay = reconnect_delay
+        self.logger = logging.getLogger(__name__)
+
+    async def supports_idle(self) -> bool:
+        try:
+            if not self.client.connected:
+                await self.client.connect()
+            supported = 'IDLE' in await self.client.capabilities()
+        except Exception as e:
+            self.logger.error(f'Could not check the server for IDLE support: {e}')
+            supported = False
+        if not supported:
+            await self.client.disconnect()
+        return supported
+
+    async def run(self):
+        catch_up = True
+        while True:
+            try:
+                if not self.client.connected:
+                    await self.client.connect()
+                    catch_up = True
+                if catch_up:
+                    catch_up = False
+                    await self.on_new_mail()
+                if await self.client.idle(self.renew_interval):
+                    self.logger.info('New mail announced by the server')
+                    await self.on_new_mail()
+            except asyncio.CancelledError:
+                await self.client.disconnect()
+                raise
+            except Exception as e:
+                self.logger.exception(
+                    f'IDLE listener failed, reconnecting in {self.reconnect_delay}s: {e}')
+                await self.client.disconnect()
+                await asyncio.sleep(self.reconnect_delay)
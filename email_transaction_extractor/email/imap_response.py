@@ -0,0 +1,90 @@
+import re
+from typing import Any, Dict, Iterator, List, Tuple
+
+LITERAL_PATTERN = re.compile(rb'\{\d+\}\s*$')
+
+OPEN = object()
+CLOSE = object()
+
+
+def tokenize(data: bytes) -> Iterator[Any]:
+    """
+    Splits an IMAP response line into tokens: OPEN/CLOSE for parentheses,
+    bytes for atoms and quoted strings, and None for NIL. Section specifiers
+    such as `BODY[HEADER.FIELDS (MESSAGE-ID)]` are kept as a single atom.
+    """
+    index, length = 0, len(data)
+    while index < length:
+        char = data[index:index + 1]
+        if char in b' \r\n':
+            index += 1
+        elif char == b'(':
+            index += 1
+            yield OPEN
+        elif char == b')':
+            index += 1
+            yield CLOSE
+        elif char == b'"':
+            index += 1
+            value = bytearray()
+            while index < length and data[index:index + 1] != b'"':
+                if data[index:index + 1] == b'\\':
+                    index += 1
+                value += data[index:index + 1]
+                index += 1
+            index += 1
+            yield bytes(value)
+        else:
+            start, depth = index, 0
+            while index < length:
+                char = data[index:index + 1]
+                if char == b'[':
+                    depth += 1
+                elif char == b']':
+                    depth -= 1
+                elif depth == 0 and char in b' ()\r\n':
+                    break
+                index += 1
+            atom = data[start:index]
+            yield None if atom.upper() == b'NIL' else atom
+
+
+def parse_fetch_response(msg_data: list) -> Iterator[Tuple[int, Dict[bytes, Any]]]:
+    """
+    Parses the data returned by imaplib for a FETCH (or UID FETCH) command and
+    yields `(sequence_number, items)` per message, where `items` maps each
+    data item name (e.g. b'UID', b'BODY[]', b'BODYSTRUCTURE') to its value.
+    Literals are returned as bytes, parenthesized lists as Python lists and
+    UIDs as ints.
+    """
+    stack: List[list] = [[]]
+    for response_part in msg_data:
+        if isinstance(response_part, tuple):
+            raw, literal = response_part
+            raw = LITERAL_PATTERN.sub(b'', raw)
+        else:
+            raw, literal = response_part, None
+        if raw is None:
+            continue
+        for token in tokenize(raw):
+            if token is OPEN:
+                stack.append([])
+            elif token is CLOSE and len(stack) > 1:
+                completed = stack.pop()
+                stack[-1].append(completed)
+                if len(stack) == 1:
+                    yield _to_fetch_items(stack[0])
+                    stack = [[]]
+            elif token is not CLOSE:
+                stack[-1].append(token)
+        if literal is not None:
+            stack[-1].append(literal)
+
+
+def _to_fetch_items(response: list) -> Tuple[int, Dict[bytes, Any]]:
+    sequence_number, values = response[0], response[-1]
+    items = {key.upper(): value
+             for key, value in zip(values[::2], values[1::2])}
+    if items.get(b'UID') is not None:
+        items[b'UID'] = int(items[b'UID'])
+    return int(sequence_number), items
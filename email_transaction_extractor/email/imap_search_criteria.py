@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 
 class IMAPSearchCriteria:
@@ -27,11 +27,17 @@ class IMAPSearchCriteria:
         return self
 
     def date_range(self, start_date: datetime, end_date: datetime):
+        # IMAP dates have day granularity and BEFORE is exclusive, so the
+        # day after `end_date` is used to keep the end date inclusive.
         start = start_date.strftime("%d-%b-%Y")
-        end = end_date.strftime("%d-%b-%Y")
+        end = (end_date + timedelta(days=1)).strftime("%d-%b-%Y")
         self.criteria.append(f'SINCE "{start}" BEFORE "{end}"')
         return self
 
+    def uid_range(self, start: int, end: int | None = None):
+        self.criteria.append(f'UID {start}:{end if end is not None else "*"}')
+        return self
+
     def unseen(self):
         self.criteria.append('UNSEEN')
         return self
@@ -66,6 +72,17 @@ class IMAPSearchCriteria:
         self.criteria.append(f'(OR {combined})')
         return self
 
+    def any_(self, *criteria):
+        """Matches any of `criteria`, nesting IMAP's two-operand OR for more than two."""
+        if not criteria:
+            return self
+        terms = [f'({c})' for c in criteria]
+        combined = terms[-1]
+        for term in reversed(terms[:-1]):
+            combined = f'(OR {term} {combined})'
+        self.criteria.append(combined)
+        return self
+
     def not_(self, criterion):
         self.criteria.append(f'(NOT {criterion})')
         return self
@@ -0,0 +1,12 @@
+from email.message import Message
+from typing import Optional
+
+
+class IMAPMessage(Message):
+    """
+    An email Message that remembers the UID it was fetched with and the raw
+    bytes it was parsed from, which are archived as they are: re-serializing
+    the Message turns the CRLF line breaks of 7bit bodies into LF.
+    """
+    uid: Optional[int] = None
+    raw: Optional[bytes] = None
@@ -0,0 +1,149 @@
+import imaplib
+import logging
+import threading
+import time
+from typing import List, Optional
+
+
+class IMAPSession:
+    """An authenticated IMAP connection with `mailbox` already selected."""
+
+    def __init__(self, connection: imaplib.IMAP4, uid_validity: Optional[int] = None):
+        self.connection = connection
+        self.uid_validity = uid_validity
+        self.last_used = time.monotonic()
+
+    @classmethod
+    def open(cls, server: str, email_user: str, email_pass: str, mailbox: str = "inbox") -> 'IMAPSession':
+        connection = imaplib.IMAP4_SSL(server)
+        connection.login(email_user, email_pass)
+        connection.select(mailbox)
+        _, data = connection.response('UIDVALIDITY')
+        uid_validity = int(data[0]) if data and data[0] else None
+        return cls(connection, uid_validity)
+
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self.last_used
+
+    def touch(self) -> None:
+        self.last_used = time.monotonic()
+
+    def noop(self) -> bool:
+        """Pings the server, returning False when the session is no longer usable."""
+        try:
+            status, _ = self.connection.noop()
+        except (imaplib.IMAP4.error, OSError):
+            return False
+        self.touch()
+        return status == 'OK'
+
+    def close(self) -> None:
+        try:
+            self.connection.logout()
+        except Exception:
+            pass
+
+
+class IMAPSessionPool:
+    """
+    Bounded pool of authenticated IMAP sessions shared across threads.
+    Sessions idle for longer than `keepalive_interval` are checked with a NOOP
+    before being handed out, and `keepalive` can be scheduled to ping idle
+    sessions so the server does not drop them. Sessions that fail a check, or
+    that a client reports as broken (e.g. after a BYE), are discarded and
+    replaced by a fresh login on the next acquire.
+    """
+
+    def __init__(self, email_user: str, email_pass: str, server: str, mailbox: str = "inbox",
+                 max_size: int = 4, keepalive_interval: float = 300, acquire_timeout: float = 30):
+        self.email_user = email_user
+        self.email_pass = email_pass
+        self.server = server
+        self.mailbox = mailbox
+        self.max_size = max_size
+        self.keepalive_interval = keepalive_interval
+        self.acquire_timeout = acquire_timeout
+        self.logger = logging.getLogger(__name__)
+        self._condition = threading.Condition()
+        self._idle: List[IMAPSession] = []
+        self._size = 0
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def acquire(self, timeout: Optional[float] = None) -> IMAPSession:
+        deadline = time.monotonic() + (self.acquire_timeout if timeout is None else timeout)
+        while True:
+            session = self.__take(deadline)
+            if session is None:
+                return self.__open()
+            if session.idle_seconds() < self.keepalive_interval or session.noop():
+                return session
+            self.logger.info('Discarding stale IMAP session')
+            self.__discard(session)
+
+    def release(self, session: IMAPSession, discard: bool = False) -> None:
+        if discard or self._closed:
+            self.__discard(session)
+            return
+        session.touch()
+        with self._condition:
+            self._idle.append(session)
+            self._condition.notify()
+
+    def keepalive(self) -> None:
+        with self._condition:
+            stale = [session for session in self._idle
+                     if session.idle_seconds() >= self.keepalive_interval]
+            self._idle = [session for session in self._idle
+                          if session not in stale]
+        for session in stale:
+            self.release(session, discard=not session.noop())
+        if stale:
+            self.logger.debug(f'Sent keepalive to {len(stale)} IMAP sessions')
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for session in idle:
+            session.close()
+        self.logger.info('Closed the IMAP session pool')
+
+    def __take(self, deadline: float) -> Optional[IMAPSession]:
+        """Returns an idle session, or None after reserving a slot for a new one."""
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError('IMAP session pool is closed')
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    raise TimeoutError(
+                        f'Timed out waiting for one of {self.max_size} IMAP sessions')
+
+    def __open(self) -> IMAPSession:
+        try:
+            session = IMAPSession.open(
+                self.server, self.email_user, self.email_pass, self.mailbox)
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        self.logger.info(f'Opened IMAP session {self._size}/{self.max_size}')
+        return session
+
+    def __discard(self, session: IMAPSession) -> None:
+        session.close()
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
@@ -0,0 +1,109 @@
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Iterator, NamedTuple, Optional
+
+SEGMENT_FILE = 'messages.seg'
+INDEX_FILE = 'index.sqlite3'
+
+
+class StoredMessage(NamedTuple):
+    digest: str
+    offset: int
+    length: int
+    message_id: Optional[str]
+    uid_validity: Optional[int]
+    uid: Optional[int]
+
+
+class RawMessageStore:
+    """
+    Content-addressed archive of fetched messages. Messages are zlib
+    compressed and appended to a single segment file; a SQLite index maps the
+    SHA-256 of the raw bytes, the Message-ID and the (UIDVALIDITY, UID) pair
+    to the record's offset. Storing the same bytes twice is a no-op.
+
+    Reads go through a memory map of the segment, so iterating a multi-GB
+    archive only keeps the message being decoded in memory.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.segment_path = os.path.join(path, SEGMENT_FILE)
+        self.__lock = threading.RLock()
+        self.__index = sqlite3.connect(
+            os.path.join(path, INDEX_FILE), check_same_thread=False)
+        self.__index.execute(
+            'CREATE TABLE IF NOT EXISTS messages ('
+            'digest TEXT PRIMARY KEY, offset INTEGER NOT NULL, length INTEGER NOT NULL, '
+            'message_id TEXT, uid_validity INTEGER, uid INTEGER)')
+        self.__index.execute(
+            'CREATE INDEX IF NOT EXISTS ix_messages_message_id ON messages (message_id)')
+        self.__index.execute(
+            'CREATE INDEX IF NOT EXISTS ix_messages_uid ON messages (uid_validity, uid)')
+        self.__index.commit()
+
+    def put(self, raw: bytes, message_id: Optional[str] = None,
+            uid_validity: Optional[int] = None, uid: Optional[int] = None) -> str:
+        """Appends `raw` to the segment unless it is already stored and returns its digest."""
+        digest = hashlib.sha256(raw).hexdigest()
+        with self.__lock:
+            if self.__lookup('digest = ?', (digest,)) is not None:
+                return digest
+            record = zlib.compress(raw)
+            with open(self.segment_path, 'ab') as segment:
+                offset = segment.tell()
+                segment.write(record)
+                segment.flush()
+                os.fsync(segment.fileno())
+            self.__index.execute(
+                'INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?)',
+                (digest, offset, len(record), message_id, uid_validity, uid))
+            self.__index.commit()
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        return self.__read(self.__lookup('digest = ?', (digest,)))
+
+    def get_by_message_id(self, message_id: str) -> Optional[bytes]:
+        return self.__read(self.__lookup('message_id = ?', (message_id,)))
+
+    def get_by_uid(self, uid_validity: int, uid: int) -> Optional[bytes]:
+        return self.__read(self.__lookup('uid_validity = ? AND uid = ?', (uid_validity, uid)))
+
+    def iter_messages(self) -> Iterator[bytes]:
+        """Yields every stored message in the order it was archived."""
+        if not os.path.exists(self.segment_path) or os.path.getsize(self.segment_path) == 0:
+            return
+        with self.__lock:
+            records = [StoredMessage(*row) for row in self.__index.execute(
+                'SELECT * FROM messages ORDER BY offset')]
+        with open(self.segment_path, 'rb') as segment, \
+                mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for record in records:
+                yield zlib.decompress(data[record.offset:record.offset + record.length])
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return self.__index.execute('SELECT COUNT(*) FROM messages').fetchone()[0]
+
+    def close(self):
+        with self.__lock:
+            self.__index.close()
+
+    def __lookup(self, where: str, params: tuple) -> Optional[StoredMessage]:
+        with self.__lock:
+            row = self.__index.execute(
+                f'SELECT * FROM messages WHERE {where} LIMIT 1', params).fetchone()
+        return StoredMessage(*row) if row else None
+
+    def __read(self, record: Optional[StoredMessage]) -> Optional[bytes]:
+        if record is None:
+            return None
+        with open(self.segment_path, 'rb') as segment, \
+                mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return zlib.decompress(data[record.offset:record.offset + record.length])
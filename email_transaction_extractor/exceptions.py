@@ -3,3 +3,11 @@ class TransactionIDExistsError(Exception):
         self.transaction_id = transaction_id
         super().__init__(
             f"Transaction with ID {transaction_id} already exists.")
+
+
+class MessageIDExistsError(Exception):
+    def __init__(self, message_id: str, transaction_id: str):
+        self.message_id = message_id
+        self.transaction_id = transaction_id
+        super().__init__(
+            f"Email {message_id} is already stored as transaction {transaction_id}.")
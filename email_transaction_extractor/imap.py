@@ -0,0 +1,44 @@
+from email_transaction_extractor.config import config
+from email_transaction_extractor.email import AsyncEmailClient, EmailClient
+from email_transaction_extractor.email.pool import IMAPSessionPool
+from email_transaction_extractor.email.raw_store import RawMessageStore
+from email_transaction_extractor.models.enums import ImapServer
+
+session_pool = IMAPSessionPool(
+    email_user=config.EMAIL_USER,
+    email_pass=config.EMAIL_PASSWORD,
+    server=ImapServer.GOOGLE.value,
+    mailbox=config.EMAIL_MAILBOX,
+    max_size=config.EMAIL_POOL_SIZE,
+    keepalive_interval=config.EMAIL_KEEPALIVE_SECONDS,
+    acquire_timeout=config.EMAIL_POOL_TIMEOUT_SECONDS
+)
+
+raw_store = RawMessageStore(
+    config.RAW_STORE_PATH) if config.RAW_STORE_PATH else None
+
+
+def new_email_client() -> EmailClient:
+    """Returns an EmailClient that borrows its session from the shared pool."""
+    return EmailClient(
+        email_user=config.EMAIL_USER,
+        email_pass=config.EMAIL_PASSWORD,
+        server=ImapServer.GOOGLE.value,
+        mailbox=config.EMAIL_MAILBOX,
+        batch_size=config.EMAIL_FETCH_BATCH_SIZE,
+        partial_fetch=config.EMAIL_PARTIAL_FETCH,
+        pool=session_pool,
+        raw_store=raw_store
+    )
+
+
+def new_async_email_client() -> AsyncEmailClient:
+    return AsyncEmailClient(
+        email_user=config.EMAIL_USER,
+        email_pass=config.EMAIL_PASSWORD,
+        server=ImapServer.GOOGLE.value,
+        mailbox=config.EMAIL_MAILBOX,
+        batch_size=config.EMAIL_FETCH_BATCH_SIZE,
+        partial_fetch=config.EMAIL_PARTIAL_FETCH,
+        raw_store=raw_store
+    )
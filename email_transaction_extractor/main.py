@@ -1,9 +1,9 @@
 from mangum import Mangum
 from datetime import datetime, timedelta
 
-from email_transaction_extractor.models.enums import ImapServer
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 import os
 
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -14,29 +14,28 @@ from email_transaction_extractor.config import config
 from email_transaction_extractor.utils.dates import DateRange
 
 from .database import Base, engine, get_db
-from .email import EmailClient
-from .routers import transactions
+from .email.idle import IdleListener
+from .imap import new_async_email_client, new_email_client, session_pool
+from .routers import backfill, transactions
 from .services.transaction_service import TransactionService
+from .utils.html import set_backend as set_html_backend
 from .utils.logging import configure_root_logger
+from .utils.parsers import pool as parse_pool
 
 
 def check_emails():
     logger = logging.getLogger('check_emails')
     db: Session = next(get_db())
-    with EmailClient(
-        email_user=config.EMAIL_USER,
-        email_pass=config.EMAIL_PASSWORD,
-        server=ImapServer.GOOGLE.value,
-        mailbox=config.EMAIL_MAILBOX
-    ) as client:
+    with new_email_client() as client:
         transaction_service = TransactionService(db)
         today = datetime.now()
         logger.info(f'Starting job to fetch new transaction emails')
-        transaction_service.__refresh_database_with_emails_from_date(
+        transaction_service.sync_new_emails(
             client,
             DateRange(
-                today - timedelta(minutes=config.REFRESH_INTERVAL_IN_MINUTES),
-                today
+                start_date=today -
+                timedelta(minutes=config.REFRESH_INTERVAL_IN_MINUTES),
+                end_date=today
             )
         )
     logger.info(f'Finished scheduled job: check_emails')
@@ -56,20 +55,51 @@ async def lifespan(app: FastAPI):
         raise
 
     logger = logging.getLogger('lifespan')
+    db: Session = next(get_db())
+    try:
+        TransactionService(db).rebuild_daily_counts_if_missing()
+    finally:
+        db.close()
+    set_html_backend(config.HTML_TO_TEXT_BACKEND)
+    parse_pool.configure(config.PARSE_WORKERS, config.PARSE_CHUNK_SIZE,
+                         config.HTML_TO_TEXT_BACKEND, config.PARSE_CACHE_SIZE)
     scheduler = BackgroundScheduler()
-    logger.info(
-        f'JOB: check_emails set to run every {config.REFRESH_INTERVAL_IN_MINUTES} minutes')
-    scheduler.add_job(check_emails, 'interval',
-                      minutes=config.REFRESH_INTERVAL_IN_MINUTES)
+    idle_task = None
+    if config.EMAIL_IDLE_ENABLED:
+        listener = IdleListener(
+            new_async_email_client(),
+            on_new_mail=lambda: asyncio.to_thread(check_emails),
+            renew_interval=config.EMAIL_IDLE_RENEW_SECONDS
+        )
+        if await listener.supports_idle():
+            idle_task = asyncio.create_task(listener.run())
+            logger.info('JOB: check_emails set to run on IMAP IDLE notifications')
+        else:
+            logger.warning('IMAP IDLE is not available, falling back to polling')
+    if idle_task is None:
+        logger.info(
+            f'JOB: check_emails set to run every {config.REFRESH_INTERVAL_IN_MINUTES} minutes')
+        scheduler.add_job(check_emails, 'interval',
+                          minutes=config.REFRESH_INTERVAL_IN_MINUTES)
+    scheduler.add_job(session_pool.keepalive, 'interval',
+                      seconds=config.EMAIL_KEEPALIVE_SECONDS)
+    scheduler.add_job(backfill.resume_unfinished_backfills)
     scheduler.start()
     logger.info("Scheduler started")
     yield
+    if idle_task is not None:
+        idle_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await idle_task
     scheduler.shutdown()
     logger.info("Scheduler shutdown")
+    session_pool.close()
+    parse_pool.default_pool().close()
 
 
 app = FastAPI(lifespan=lifespan)
 app.include_router(transactions.router)
+app.include_router(backfill.router)
 if config.ENVIRONMENT == "prod":
     app = Mangum(app)
 
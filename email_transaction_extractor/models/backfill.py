@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import (Column, DateTime, Enum, ForeignKey, Integer, Text,
+                        UniqueConstraint)
+from sqlalchemy.orm import relationship
+
+from ..database import Base
+from ..models.enums import BackfillStatus
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class BackfillJobTable(Base):
+    """A historical import of a date range, split into shards that are checkpointed as they finish."""
+    __tablename__ = 'backfill_jobs'
+
+    id = Column(Integer, primary_key=True, index=True)
+    start_date = Column(DateTime, nullable=False)
+    end_date = Column(DateTime, nullable=False)
+    shard_days = Column(Integer, nullable=False)
+    status = Column(Enum(BackfillStatus), nullable=False,
+                    default=BackfillStatus.PENDING)
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
+
+    shards = relationship('BackfillShardTable', back_populates='job', cascade='all, delete-orphan',
+                          order_by='BackfillShardTable.start_date')
+
+
+class BackfillShardTable(Base):
+    __tablename__ = 'backfill_shards'
+    __table_args__ = (UniqueConstraint('job_id', 'start_date'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey('backfill_jobs.id'),
+                    nullable=False, index=True)
+    start_date = Column(DateTime, nullable=False)
+    end_date = Column(DateTime, nullable=False)
+    status = Column(Enum(BackfillStatus), nullable=False,
+                    default=BackfillStatus.PENDING)
+    message = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
+
+    job = relationship('BackfillJobTable', back_populates='shards')
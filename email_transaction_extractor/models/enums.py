@@ -22,6 +22,13 @@ class Bank(Enum):
         return None
 
 
+class BackfillStatus(Enum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
 class ExpensePriority(Enum):
     MUST = auto()
     WANT = auto()
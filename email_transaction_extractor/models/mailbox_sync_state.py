@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, UniqueConstraint
+
+from ..database import Base
+
+
+class MailboxSyncStateTable(Base):
+    """
+    High-water mark of the last UID ingested for a bank in a mailbox. The mark
+    is only valid while the mailbox keeps the same UIDVALIDITY.
+    """
+    __tablename__ = 'mailbox_sync_state'
+    __table_args__ = (UniqueConstraint('mailbox', 'bank_email'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    mailbox = Column(String, nullable=False)
+    bank_email = Column(String, nullable=False)
+    uid_validity = Column(BigInteger, nullable=False)
+    last_uid = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc),
+                        onupdate=lambda: datetime.now(timezone.utc))
@@ -1,10 +1,14 @@
 import hashlib
 from datetime import datetime, timezone
+from typing import Optional
 
-from sqlalchemy import Column, DateTime, Enum, Float, String, Text
+from sqlalchemy import (BigInteger, Column, DateTime, Enum, Float, Index, String,
+                        inspect)
+from sqlalchemy.orm import relationship
 
 from ..database import Base
 from ..models.enums import ExpensePriority, ExpenseType
+from ..models.transaction_body import TransactionBodyTable
 
 
 def generate_transaction_id(bank: str, value: float, date: datetime) -> str:
@@ -17,6 +21,14 @@ def generate_transaction_id(bank: str, value: float, date: datetime) -> str:
 
 class TransactionTable(Base):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        # Date ranges and keyset pages ordered by (date, id)
+        Index('ix_transactions_date_id', 'date', 'id'),
+        # Filters on a bank, currency or business, usually within a date range
+        Index('ix_transactions_bank_name_date', 'bank_name', 'date'),
+        Index('ix_transactions_currency_date', 'currency', 'date'),
+        Index('ix_transactions_business', 'business'),
+    )
 
     id = Column(String, primary_key=True, index=True)
     date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -28,4 +40,27 @@ class TransactionTable(Base):
     bank_email = Column(String, nullable=False)
     expense_priority = Column(Enum(ExpensePriority), nullable=True)
     expense_type = Column(Enum(ExpenseType), nullable=True)
-    body = Column(Text, nullable=False)
+    message_id = Column(String, nullable=True, unique=True, index=True)
+    uid = Column(BigInteger, nullable=True)
+
+    # Only loaded when a query asks for it, e.g. with selectinload(TransactionTable.body_row).
+    # passive_updates=False so a changed id is written to the loaded body row too.
+    body_row = relationship(TransactionBodyTable, uselist=False, lazy='raise',
+                            cascade='all, delete-orphan', passive_deletes=True, passive_updates=False)
+
+    @property
+    def body(self) -> Optional[str]:
+        """The email body, or None when the query did not load it."""
+        if 'body_row' in inspect(self).unloaded or self.body_row is None:
+            return None
+        return self.body_row.body
+
+    @body.setter
+    def body(self, body: Optional[str]):
+        if 'body_row' not in inspect(self).unloaded and self.body_row is not None:
+            if body is None:
+                self.body_row = None
+            else:
+                self.body_row.body = body
+        elif body is not None:
+            self.body_row = TransactionBodyTable(body=body)
@@ -0,0 +1,32 @@
+import zlib
+
+from sqlalchemy import Column, ForeignKey, LargeBinary, String
+from sqlalchemy.types import TypeDecorator
+
+from ..database import Base
+
+COMPRESSION_LEVEL = 6
+
+
+class CompressedText(TypeDecorator):
+    """Text stored zlib compressed in a binary column."""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else zlib.compress(value.encode('utf-8'), COMPRESSION_LEVEL)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else zlib.decompress(value).decode('utf-8')
+
+
+class TransactionBodyTable(Base):
+    """
+    Email body of a transaction, kept out of `transactions` so that list
+    queries do not read it. Bank notifications are mostly boilerplate and
+    compress to a fraction of their size.
+    """
+    __tablename__ = 'transaction_bodies'
+
+    transaction_id = Column(String, ForeignKey('transactions.id', ondelete='CASCADE'), primary_key=True)
+    body = Column(CompressedText, nullable=False)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Date, Integer, String
+
+from ..database import Base
+
+
+class TransactionDailyCountTable(Base):
+    """
+    Number of transactions per calendar day and bank. Kept in step with
+    `transactions` by `TransactionRepository` in the same DB transaction as
+    every insert, update and delete, so totals can be summed from a few
+    hundred rows instead of counting the whole table.
+    """
+    __tablename__ = 'transaction_daily_counts'
+
+    day = Column(Date, primary_key=True)
+    bank_name = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
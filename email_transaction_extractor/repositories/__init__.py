@@ -1 +1,4 @@
 from .transaction_repository import TransactionRepository
+from .transaction_daily_count_repository import TransactionDailyCountRepository
+from .mailbox_sync_state_repository import MailboxSyncStateRepository
+from .backfill_repository import BackfillRepository
@@ -0,0 +1,66 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from email_transaction_extractor.models.backfill import (BackfillJobTable,
+                                                         BackfillShardTable)
+from email_transaction_extractor.models.enums import BackfillStatus
+from email_transaction_extractor.repositories.generic_repository import \
+    GenericRepository
+from email_transaction_extractor.utils.dates import DateRange
+from email_transaction_extractor.utils.decorators import timed_operation
+
+
+class BackfillRepository(GenericRepository[BackfillJobTable]):
+    def __init__(self, db: Session):
+        super().__init__(db, BackfillJobTable)
+
+    @timed_operation
+    def create_job(self, date_range: DateRange, shard_days: int) -> Tuple[BackfillJobTable, float]:
+        job = self.model(start_date=date_range.start_date,
+                         end_date=date_range.end_date, shard_days=shard_days)
+        job.shards = [BackfillShardTable(start_date=shard.start_date, end_date=shard.end_date)
+                      for shard in date_range.split(shard_days)]
+        self.db.add(job)
+        try:
+            self.db.commit()
+            self.db.refresh(job)
+            return job
+        except IntegrityError as e:
+            self.db.rollback()
+            raise e
+
+    @timed_operation
+    def get_unfinished_jobs(self) -> Tuple[List[BackfillJobTable], float]:
+        return self.db.query(self.model).filter(
+            self.model.status.in_([BackfillStatus.PENDING, BackfillStatus.RUNNING])
+        ).all()
+
+    @timed_operation
+    def get_shards_to_run(self, job_id: int) -> Tuple[List[BackfillShardTable], float]:
+        """Shards that are not done, including ones left running by an interrupted process."""
+        return self.db.query(BackfillShardTable).filter(
+            BackfillShardTable.job_id == job_id,
+            BackfillShardTable.status != BackfillStatus.DONE
+        ).order_by(BackfillShardTable.start_date).all()
+
+    @timed_operation
+    def set_job_status(self, job_id: int, status: BackfillStatus) -> Tuple[Optional[BackfillJobTable], float]:
+        job, _ = self.update(job_id, {'status': status})
+        return job
+
+    @timed_operation
+    def set_shard_status(self, shard_id: int, status: BackfillStatus, message: Optional[str] = None) -> Tuple[Optional[BackfillShardTable], float]:
+        shard = self.db.get(BackfillShardTable, shard_id)
+        if shard is None:
+            return None
+        shard.status = status
+        shard.message = message
+        try:
+            self.db.commit()
+            self.db.refresh(shard)
+            return shard
+        except IntegrityError as e:
+            self.db.rollback()
+            raise e
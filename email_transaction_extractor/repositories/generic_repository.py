@@ -1,5 +1,6 @@
-from typing import Callable, Generic, List, Optional, Tuple, Type
+from typing import Any, Callable, Generic, List, Optional, Sequence, Tuple, Type
 
+from sqlalchemy import literal, tuple_
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
@@ -33,7 +34,7 @@ class GenericRepository(Generic[ModelType]):
 
     @timed_operation
     def update(self, id: str, obj_in: dict) -> Tuple[Optional[ModelType], float]:
-        db_obj = self.get(id)
+        db_obj, _ = self.get(id)
         if db_obj:
             for key, value in obj_in.items():
                 setattr(db_obj, key, value)
@@ -48,7 +49,7 @@ class GenericRepository(Generic[ModelType]):
 
     @timed_operation
     def delete(self, id: str) -> Tuple[Optional[ModelType], float]:
-        db_obj = self.get(id)
+        db_obj, _ = self.get(id)
         if db_obj:
             self.db.delete(db_obj)
             try:
@@ -60,12 +61,40 @@ class GenericRepository(Generic[ModelType]):
         return None
 
     @timed_operation
-    def get_paginated(self, offset: int, limit: int, filter: Optional[Callable[[ModelType], bool]] = None) -> Tuple[List[ModelType], float]:
-        query = self.db.query(self.model)
+    def get_paginated(self, offset: int, limit: int, filter: Optional[Callable[[ModelType], bool]] = None,
+                      options: Sequence[Any] = ()) -> Tuple[List[ModelType], float]:
+        query = self.db.query(self.model).options(*options)
         if filter is not None:
             query = query.filter(filter)
         return query.offset(offset).limit(limit).all()
 
+    @timed_operation
+    def get_keyset_page(self, columns: Sequence[Any], limit: int, after: Optional[Sequence[Any]] = None,
+                        before: Optional[Sequence[Any]] = None,
+                        filter: Optional[Callable[[ModelType], bool]] = None,
+                        options: Sequence[Any] = ()) -> Tuple[List[ModelType], float]:
+        """
+        Returns up to `limit` rows ordered by `columns` descending, seeking
+        past the `after` key (the last row of the previous page) or back from
+        the `before` key (the first row of the next page) with a row-value
+        comparison instead of an OFFSET, so every page costs the same.
+        `options` are loader options, e.g. to load a deferred relationship.
+        """
+        def key(values: Sequence[Any]):
+            # Bind with the column types so e.g. datetimes compare in their stored format
+            return tuple_(*(literal(value, column.type) for column, value in zip(columns, values)))
+
+        query = self.db.query(self.model).options(*options)
+        if filter is not None:
+            query = query.filter(filter)
+        if before is not None:
+            rows = query.filter(tuple_(*columns) > key(before)) \
+                .order_by(*(column.asc() for column in columns)).limit(limit).all()
+            return rows[::-1]
+        if after is not None:
+            query = query.filter(tuple_(*columns) < key(after))
+        return query.order_by(*(column.desc() for column in columns)).limit(limit).all()
+
     @timed_operation
     def count(self, filter: Optional[Callable[[ModelType], bool]] = None) -> Tuple[int, float]:
         query = self.db.query(self.model)
@@ -0,0 +1,38 @@
+from typing import Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from email_transaction_extractor.models.mailbox_sync_state import \
+    MailboxSyncStateTable
+from email_transaction_extractor.repositories.generic_repository import \
+    GenericRepository
+from email_transaction_extractor.utils.decorators import timed_operation
+
+
+class MailboxSyncStateRepository(GenericRepository[MailboxSyncStateTable]):
+    def __init__(self, db: Session):
+        super().__init__(db, MailboxSyncStateTable)
+
+    @timed_operation
+    def get_by_mailbox(self, mailbox: str, bank_email: str) -> Tuple[Optional[MailboxSyncStateTable], float]:
+        return self.db.query(self.model).filter(
+            self.model.mailbox == mailbox,
+            self.model.bank_email == bank_email
+        ).first()
+
+    @timed_operation
+    def save_mark(self, mailbox: str, bank_email: str, uid_validity: int, last_uid: int) -> Tuple[MailboxSyncStateTable, float]:
+        state, _ = self.get_by_mailbox(mailbox, bank_email)
+        if state is None:
+            state = self.model(mailbox=mailbox, bank_email=bank_email)
+            self.db.add(state)
+        state.uid_validity = uid_validity
+        state.last_uid = last_uid
+        try:
+            self.db.commit()
+            self.db.refresh(state)
+            return state
+        except IntegrityError as e:
+            self.db.rollback()
+            raise e
@@ -0,0 +1,94 @@
+from collections import Counter
+from datetime import date, datetime
+from typing import Iterable, Mapping, Optional, Tuple
+
+from sqlalchemy import Date, cast, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from email_transaction_extractor.models.transaction import TransactionTable
+from email_transaction_extractor.models.transaction_daily_count import \
+    TransactionDailyCountTable
+from email_transaction_extractor.repositories.generic_repository import \
+    GenericRepository
+from email_transaction_extractor.utils.decorators import timed_operation
+
+# (day, bank_name) -> change in the number of transactions
+CountDeltas = Mapping[Tuple[date, str], int]
+
+UPSERT_BY_DIALECT = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+class TransactionDailyCountRepository(GenericRepository[TransactionDailyCountTable]):
+    def __init__(self, db: Session):
+        super().__init__(db, TransactionDailyCountTable)
+
+    def add(self, deltas: CountDeltas):
+        """
+        Adds `deltas` to the daily counts without committing, so the change
+        lands in the same DB transaction as the rows it accounts for.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        upsert = UPSERT_BY_DIALECT.get(self.db.get_bind().dialect.name)
+        if upsert is None:
+            raise NotImplementedError(
+                f'Daily counts are not supported on {self.db.get_bind().dialect.name}')
+        statement = upsert(self.model).values(
+            [{'day': day, 'bank_name': bank_name, 'count': delta} for (day, bank_name), delta in deltas.items()])
+        self.db.execute(statement.on_conflict_do_update(
+            index_elements=[self.model.day, self.model.bank_name],
+            set_={'count': self.model.count + statement.excluded.count}))
+
+    @timed_operation
+    def sum(self, first_day: Optional[date] = None, last_day: Optional[date] = None) -> Tuple[int, float]:
+        """Returns the number of transactions from `first_day` to `last_day`, both included and both optional."""
+        query = self.db.query(func.coalesce(func.sum(self.model.count), 0))
+        if first_day is not None:
+            query = query.filter(self.model.day >= first_day)
+        if last_day is not None:
+            query = query.filter(self.model.day <= last_day)
+        return query.scalar()
+
+    @timed_operation
+    def rebuild_if_missing(self) -> Tuple[bool, float]:
+        """
+        Rebuilds the daily counts when the table is empty but `transactions`
+        is not, e.g. after `create_all` added the table to an existing DB.
+        """
+        if self.db.query(self.model.day).first() is not None \
+                or self.db.query(TransactionTable.id).first() is None:
+            return False
+        self.rebuild()
+        return True
+
+    @timed_operation
+    def rebuild(self) -> Tuple[int, float]:
+        """Recomputes every daily count from `transactions` and returns how many days were written."""
+        day = func.date(TransactionTable.date) if self.db.get_bind().dialect.name == 'sqlite' \
+            else cast(TransactionTable.date, Date)
+        try:
+            self.db.execute(delete(self.model))
+            result = self.db.execute(insert(self.model).from_select(
+                ['day', 'bank_name', 'count'],
+                select(day, TransactionTable.bank_name, func.count())
+                .where(TransactionTable.date.is_not(None))
+                .group_by(day, TransactionTable.bank_name)))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return result.rowcount
+
+
+def count_deltas(keys: Iterable[Tuple[Optional[datetime], str]], sign: int = 1) -> Counter:
+    """Tallies (date, bank_name) pairs into `CountDeltas`. Pairs without a date are not counted."""
+    deltas: Counter = Counter()
+    for transaction_date, bank_name in keys:
+        if transaction_date is not None:
+            deltas[transaction_date.date(), bank_name] += sign
+    return deltas
@@ -1,11 +1,173 @@
-from typing import List, Tuple
+from collections import Counter
+from datetime import datetime, time, timedelta, timezone
+from typing import Any, Collection, Dict, List, Optional, Sequence, Set, Tuple
 from requests import Session
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from email_transaction_extractor.repositories.generic_repository import GenericRepository
+from email_transaction_extractor.repositories.transaction_daily_count_repository import (
+    TransactionDailyCountRepository, count_deltas)
 from email_transaction_extractor.models.transaction import TransactionTable
+from email_transaction_extractor.models.transaction_body import \
+    TransactionBodyTable
 from email_transaction_extractor.utils.dates import DateRange
 from email_transaction_extractor.utils.decorators import timed_operation
 
 
 class TransactionRepository(GenericRepository[TransactionTable]):
+    """
+    Every write also adjusts `daily_counts` before it commits, so the daily
+    counts change in the same DB transaction as the rows they count.
+
+    Email bodies live in `transaction_bodies` and are only loaded by `get`
+    and by queries given `WITH_BODY` as options.
+    """
+    WITH_BODY = (selectinload(TransactionTable.body_row),)
+
     def __init__(self, db: Session):
         super().__init__(db, TransactionTable)
+        self.daily_counts = TransactionDailyCountRepository(db)
+
+    @timed_operation
+    def get(self, id: str) -> Tuple[Optional[TransactionTable], float]:
+        return self.db.query(self.model).options(*self.WITH_BODY).filter(self.model.id == id).first()
+
+    @timed_operation
+    def get_by_message_id(self, message_id: str) -> Tuple[Optional[TransactionTable], float]:
+        return self.db.query(self.model).options(*self.WITH_BODY).filter(self.model.message_id == message_id).first()
+
+    @timed_operation
+    def create(self, obj_in: TransactionTable) -> Tuple[TransactionTable, float]:
+        if obj_in.date is None:
+            obj_in.date = datetime.now(timezone.utc)
+        self.db.add(obj_in)
+        self.__commit_counting(obj_in, Counter())
+        self.db.refresh(obj_in)
+        self.db.refresh(obj_in, ['body_row'])
+        return obj_in
+
+    @timed_operation
+    def update(self, id: str, obj_in: dict) -> Tuple[Optional[TransactionTable], float]:
+        db_obj, _ = self.get(id)
+        if db_obj is None:
+            return None
+        deltas = count_deltas([(db_obj.date, db_obj.bank_name)], sign=-1)
+        for key, value in obj_in.items():
+            setattr(db_obj, key, value)
+        self.__commit_counting(db_obj, deltas)
+        self.db.refresh(db_obj)
+        return db_obj
+
+    def __commit_counting(self, db_obj: TransactionTable, deltas: Counter):
+        """
+        Flushes `db_obj` and commits it together with `deltas` plus its own
+        day. The day is read back from the DB, like the RETURNING rows of
+        `insert_ignoring_duplicates`, so it is the day the row is stored on.
+        """
+        try:
+            self.db.flush()
+            self.db.refresh(db_obj, ['date', 'bank_name'])
+            deltas.update(count_deltas([(db_obj.date, db_obj.bank_name)]))
+            self.daily_counts.add(deltas)
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise
+
+    @timed_operation
+    def delete(self, id: str) -> Tuple[Optional[TransactionTable], float]:
+        db_obj, _ = self.get(id)
+        if db_obj is not None:
+            self.daily_counts.add(count_deltas([(db_obj.date, db_obj.bank_name)], sign=-1))
+        db_obj, _ = super().delete(id)
+        return db_obj
+
+    @timed_operation
+    def count_by_date(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      estimate: bool = False) -> Tuple[int, float]:
+        """
+        Counts the transactions dated from `start` to `end`, both included and
+        both optional. Whole days are summed from the daily counts and only
+        the partial days at either end are counted on `transactions`; with
+        `estimate`, partial days are taken whole and nothing is counted.
+        """
+        first_day = start.date() if start is not None else None
+        last_day = end.date() if end is not None else None
+        if estimate:
+            return self.daily_counts.sum(first_day, last_day)[0]
+        if first_day is not None and first_day == last_day:
+            return self.count(self.model.date.between(start, end))[0]
+
+        partial_days = []
+        if start is not None and start.time() != time.min:
+            first_day += timedelta(days=1)
+            partial_days.append(and_(self.model.date >= start,
+                                     self.model.date < datetime.combine(first_day, time.min, start.tzinfo)))
+        if end is not None and end.time() != time.max:
+            partial_days.append(and_(self.model.date >= datetime.combine(last_day, time.min, end.tzinfo),
+                                     self.model.date <= end))
+            last_day -= timedelta(days=1)
+        total, _ = self.daily_counts.sum(first_day, last_day)
+        if partial_days:
+            total += self.count(or_(*partial_days))[0]
+        return total
+
+    @timed_operation
+    def get_existing_message_ids(self, message_ids: Collection[str], chunk_size: int = 500) -> Tuple[Set[str], float]:
+        """Returns the subset of `message_ids` that already belong to a transaction."""
+        return self.__existing(self.model.message_id, message_ids, chunk_size)
+
+    @timed_operation
+    def get_existing_ids(self, ids: Collection[str], chunk_size: int = 500) -> Tuple[Set[str], float]:
+        """Returns the subset of `ids` that are already taken by a transaction."""
+        return self.__existing(self.model.id, ids, chunk_size)
+
+    def __existing(self, column, values: Collection[str], chunk_size: int) -> Set[str]:
+        existing: Set[str] = set()
+        values = list(values)
+        for index in range(0, len(values), chunk_size):
+            chunk = values[index:index + chunk_size]
+            existing.update(row[0] for row in self.db.query(column).filter(column.in_(chunk)))
+        return existing
+
+    @timed_operation
+    def insert_ignoring_duplicates(self, rows: Sequence[Dict[str, Any]], chunk_size: int = 500) -> Tuple[List[str], float]:
+        """
+        Inserts `rows` with `INSERT ... ON CONFLICT DO NOTHING RETURNING id`,
+        `chunk_size` rows per statement, and commits once. Rows whose id or
+        Message-ID already exists are skipped; only the inserted rows have
+        their `body` written to `transaction_bodies` and are added to the
+        daily counts. Returns the ids of the rows that were inserted.
+        """
+        insert = INSERT_BY_DIALECT.get(self.db.get_bind().dialect.name)
+        if insert is None:
+            raise NotImplementedError(
+                f'Bulk insert is not supported on {self.db.get_bind().dialect.name}')
+        inserted: List[str] = []
+        try:
+            for index in range(0, len(rows), chunk_size):
+                chunk = rows[index:index + chunk_size]
+                bodies = {row['id']: row.get('body') for row in chunk}
+                statement = insert(self.model).values([{key: value for key, value in row.items() if key != 'body'}
+                                                       for row in chunk]) \
+                    .on_conflict_do_nothing().returning(self.model.id, self.model.date, self.model.bank_name)
+                returned = self.db.execute(statement).all()
+                body_rows = [{'transaction_id': row.id, 'body': bodies[row.id]}
+                             for row in returned if bodies[row.id] is not None]
+                if body_rows:
+                    self.db.execute(insert(TransactionBodyTable), body_rows)
+                self.daily_counts.add(count_deltas((row.date, row.bank_name) for row in returned))
+                inserted += [row.id for row in returned]
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return inserted
+
+
+INSERT_BY_DIALECT = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
@@ -0,0 +1,82 @@
+import logging
+import threading
+from typing import Optional, Set
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Query
+from sqlalchemy.orm import Session
+
+from email_transaction_extractor.config import config
+from email_transaction_extractor.database import SessionLocal, get_db
+from email_transaction_extractor.imap import new_email_client
+from email_transaction_extractor.schemas.api_response import (ApiResponse,
+                                                              SingleResponse)
+from email_transaction_extractor.schemas.backfill import BackfillJob
+from email_transaction_extractor.services.backfill_service import \
+    BackfillService
+from email_transaction_extractor.utils.dates import DateRange
+
+router = APIRouter(prefix='/backfill')
+
+logger = logging.getLogger(__name__)
+
+_running_jobs: Set[int] = set()
+_running_jobs_lock = threading.Lock()
+
+
+def run_backfill(job_id: int):
+    """Runs a backfill job unless it is already running in this process."""
+    with _running_jobs_lock:
+        if job_id in _running_jobs:
+            logger.info(f'Backfill job {job_id} is already running')
+            return
+        _running_jobs.add(job_id)
+    db = SessionLocal()
+    try:
+        BackfillService(db, SessionLocal).run(
+            job_id, new_email_client(), workers=config.BACKFILL_WORKERS)
+    except Exception as e:
+        logger.exception(f'Backfill job {job_id} failed: {e}')
+    finally:
+        db.close()
+        with _running_jobs_lock:
+            _running_jobs.discard(job_id)
+
+
+def resume_unfinished_backfills():
+    db = SessionLocal()
+    try:
+        job_ids = BackfillService(db, SessionLocal).get_unfinished_job_ids()
+    finally:
+        db.close()
+    for job_id in job_ids:
+        logger.info(f'Resuming backfill job {job_id}')
+        run_backfill(job_id)
+
+
+@router.post("/", response_model=ApiResponse[SingleResponse[BackfillJob]])
+def start_backfill(range: DateRange, background_tasks: BackgroundTasks, shard_days: Optional[int] = Query(None, ge=1), db: Session = Depends(get_db)):
+    """
+    Splits the date range into shards of `shard_days` days (BACKFILL_SHARD_DAYS
+    by default) and imports them in the background. Progress is available at
+    GET /backfill/{job_id}.
+    """
+    service = BackfillService(db, SessionLocal)
+    response = service.create_job(
+        range, shard_days or config.BACKFILL_SHARD_DAYS)
+    background_tasks.add_task(run_backfill, response.data.item.id)
+    return response
+
+
+@router.get("/{job_id}", response_model=ApiResponse[SingleResponse[BackfillJob]])
+def get_backfill(job_id: int, db: Session = Depends(get_db)):
+    service = BackfillService(db, SessionLocal)
+    return service.get_job(job_id)
+
+
+@router.post("/{job_id}/resume", response_model=ApiResponse[SingleResponse[BackfillJob]])
+def resume_backfill(job_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    service = BackfillService(db, SessionLocal)
+    response = service.get_job(job_id)
+    if response.data is not None:
+        background_tasks.add_task(run_backfill, job_id)
+    return response
@@ -1,33 +1,48 @@
 from datetime import datetime
 from http import HTTPStatus
 import logging
-from typing import List, Optional
+from typing import List, Literal, Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from email_transaction_extractor.config import config
 from email_transaction_extractor.database import get_db
-from email_transaction_extractor.email.client import EmailClient
-from email_transaction_extractor.models.enums import ImapServer
+from email_transaction_extractor.imap import new_async_email_client
 from email_transaction_extractor.schemas.api_response import ApiResponse, Meta, PaginatedResponse, SingleResponse
 from email_transaction_extractor.schemas.transaction import Transaction, TransactionCreate
 from email_transaction_extractor.services.transaction_service import TransactionService
 from email_transaction_extractor.utils.dates import DateRange
+from email_transaction_extractor.utils.pagination import TotalsMode
 
 router = APIRouter(prefix='/transactions')
 
 logger = logging.getLogger(__name__)
 
 
+PaginationMode = Literal['offset', 'keyset']
+# Optional fields that list endpoints leave out unless asked for
+Include = Literal['body']
+
+
 @router.get("/", response_model=ApiResponse[PaginatedResponse[Transaction]])
-def get_all(cursor: Optional[str] = Query(None), page_size: int = Query(10), db: Session = Depends(get_db)):
+def get_all(cursor: Optional[str] = Query(None), page_size: int = Query(10), mode: PaginationMode = Query('offset'),
+            totals: TotalsMode = Query('exact'), include: List[Include] = Query([]), db: Session = Depends(get_db)):
+    """
+    `mode=keyset` pages newest first by (date, id) without totals; a cursor keeps the mode it was issued in.
+    `totals=estimate` or `totals=none` makes offset pages cheaper on large tables.
+    Email bodies are null unless requested with `include=body`.
+    """
     service = TransactionService(db)
-    return service.get_paginated(cursor=cursor, page_size=page_size)
+    return service.get_paginated(cursor=cursor, page_size=page_size, keyset=mode == 'keyset', totals=totals,
+                                 include_body='body' in include)
 
 
 @router.get("/by-date", response_model=ApiResponse[PaginatedResponse[Transaction]])
-def get_by_date(date_range: DateRange, cursor: Optional[str] = Query(None), page_size: int = Query(10), db: Session = Depends(get_db)):
+def get_by_date(date_range: DateRange, cursor: Optional[str] = Query(None), page_size: int = Query(10),
+                mode: PaginationMode = Query('offset'), totals: TotalsMode = Query('exact'),
+                include: List[Include] = Query([]), db: Session = Depends(get_db)):
     service = TransactionService(db)
-    return service.get_by_date(cursor=cursor, page_size=page_size, date_range=DateRange(**date_range.model_dump()))
+    return service.get_by_date(cursor=cursor, page_size=page_size, date_range=DateRange(**date_range.model_dump()),
+                               keyset=mode == 'keyset', totals=totals, include_body='body' in include)
 
 
 @router.get("/{transaction_id}", response_model=ApiResponse[SingleResponse[Transaction]])
@@ -57,7 +72,7 @@ def create(transaction: TransactionCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/refresh", response_model=ApiResponse)
-def refresh_transactions_by_date(range: DateRange, db: Session = Depends(get_db)):
+async def refresh_transactions_by_date(range: DateRange, db: Session = Depends(get_db)):
     """
     Create transactions based on the start date provided in the request.
 
@@ -86,15 +101,10 @@ def refresh_transactions_by_date(range: DateRange, db: Session = Depends(get_db)
     date_range = DateRange(start_date=range.start_date,
                            end_date=range.end_date, days_ago=range.days_ago)
 
-    with EmailClient(
-        email_user=config.EMAIL_USER,
-        email_pass=config.EMAIL_PASSWORD,
-        server=ImapServer.GOOGLE.value,
-        mailbox=config.EMAIL_MAILBOX
-    ) as email_client:
+    async with new_async_email_client() as email_client:
         logger.info(
             f"Starting transaction creation process for date range: {date_range}")
-        response = service.fetch_emails_from_date(
+        response = await service.fetch_emails_from_date_async(
             email_client,
             date_range
         )
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, computed_field
+
+from email_transaction_extractor.models.enums import BackfillStatus
+
+
+class BackfillShard(BaseModel):
+    id: int
+    start_date: datetime
+    end_date: datetime
+    status: BackfillStatus
+    message: Optional[str] = None
+
+    model_config = ConfigDict(
+        from_attributes=True
+    )
+
+
+class BackfillJob(BaseModel):
+    id: int
+    start_date: datetime
+    end_date: datetime
+    shard_days: int
+    status: BackfillStatus
+    shards: List[BackfillShard] = []
+
+    model_config = ConfigDict(
+        from_attributes=True
+    )
+
+    @computed_field
+    @property
+    def total_shards(self) -> int:
+        return len(self.shards)
+
+    @computed_field
+    @property
+    def done_shards(self) -> int:
+        return sum(shard.status == BackfillStatus.DONE for shard in self.shards)
+
+    @computed_field
+    @property
+    def failed_shards(self) -> int:
+        return sum(shard.status == BackfillStatus.FAILED for shard in self.shards)
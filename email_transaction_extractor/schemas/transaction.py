@@ -16,6 +16,8 @@ class TransactionBase(BaseModel):
     business_type: Optional[str] = None
     expense_priority: Optional[ExpensePriority] = None
     expense_type: Optional[ExpenseType] = None
+    message_id: Optional[str] = None
+    uid: Optional[int] = None
 
 
 class TransactionCreate(TransactionBase):
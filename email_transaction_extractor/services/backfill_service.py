@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from logging import getLogger
+from typing import Callable, List
+
+from sqlalchemy.orm import Session
+
+from email_transaction_extractor.email.client import EmailClient
+from email_transaction_extractor.models.enums import BackfillStatus
+from email_transaction_extractor.repositories.backfill_repository import \
+    BackfillRepository
+from email_transaction_extractor.schemas.api_response import (ApiResponse,
+                                                              Meta,
+                                                              SingleResponse)
+from email_transaction_extractor.schemas.backfill import BackfillJob
+from email_transaction_extractor.services.transaction_service import \
+    TransactionService
+from email_transaction_extractor.utils.dates import DateRange
+
+
+class BackfillService:
+    """
+    Imports long date ranges as jobs of day or week shards. Shards run in
+    parallel, each on its own IMAP connection and DB session, and are
+    checkpointed as they finish, so running an interrupted job again only
+    processes the shards that are not done yet.
+    """
+
+    def __init__(self, db: Session, session_factory: Callable[[], Session]):
+        self.repository = BackfillRepository(db)
+        self.session_factory = session_factory
+        self.logger = getLogger(self.__class__.__name__)
+
+    def create_job(self, date_range: DateRange, shard_days: int) -> ApiResponse[SingleResponse[BackfillJob]]:
+        job, elapsed_time = self.repository.create_job(date_range, shard_days)
+        self.logger.info(
+            f'Created backfill job\tid={job.id}\tshards={len(job.shards)}\t{date_range}')
+        return ApiResponse(
+            meta=Meta(status=HTTPStatus.ACCEPTED, request_time=elapsed_time,
+                      message=f'Backfill job {job.id} created with {len(job.shards)} shards'),
+            data=SingleResponse(item=BackfillJob.model_validate(job))
+        )
+
+    def get_job(self, job_id: int) -> ApiResponse[SingleResponse[BackfillJob]]:
+        job, elapsed_time = self.repository.get(job_id)
+        if job is None:
+            return ApiResponse(meta=Meta(status=HTTPStatus.NOT_FOUND, request_time=elapsed_time,
+                                         message=f'Backfill job {job_id} not found'))
+        item = BackfillJob.model_validate(job)
+        return ApiResponse(
+            meta=Meta(status=HTTPStatus.OK, request_time=elapsed_time,
+                      message=f'{item.done_shards}/{item.total_shards} shards done, {item.failed_shards} failed'),
+            data=SingleResponse(item=item)
+        )
+
+    def get_unfinished_job_ids(self) -> List[int]:
+        jobs, _ = self.repository.get_unfinished_jobs()
+        return [job.id for job in jobs]
+
+    def run(self, job_id: int, client: EmailClient, workers: int) -> ApiResponse[SingleResponse[BackfillJob]]:
+        """
+        Runs every shard of the job that is not done yet with up to `workers`
+        shards in flight. `client` is only used as a template: each shard
+        connects a client of its own through `client.spawn()`.
+        """
+        shards, _ = self.repository.get_shards_to_run(job_id)
+        pending = [(shard.id, DateRange(start_date=shard.start_date, end_date=shard.end_date))
+                   for shard in shards]
+        self.repository.set_job_status(job_id, BackfillStatus.RUNNING)
+        self.logger.info(
+            f'Running backfill job\tid={job_id}\tpending_shards={len(pending)}\tworkers={workers}')
+
+        with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='backfill') as executor:
+            succeeded = list(executor.map(
+                lambda shard: self.__run_shard(*shard, client.spawn()), pending))
+
+        status = BackfillStatus.DONE if all(succeeded) else BackfillStatus.FAILED
+        self.repository.set_job_status(job_id, status)
+        self.logger.info(f'Backfill job finished\tid={job_id}\tstatus={status.value}')
+        return self.get_job(job_id)
+
+    def __run_shard(self, shard_id: int, date_range: DateRange, client: EmailClient) -> bool:
+        db = self.session_factory()
+        repository = BackfillRepository(db)
+        try:
+            repository.set_shard_status(shard_id, BackfillStatus.RUNNING)
+            with client:
+                response = TransactionService(db).fetch_emails_from_date(
+                    client, date_range)
+            repository.set_shard_status(
+                shard_id, BackfillStatus.DONE, response.meta.message)
+            return True
+        except Exception as e:
+            self.logger.exception(
+                f'Backfill shard failed\tid={shard_id}\t{date_range}: {e}')
+            db.rollback()
+            repository.set_shard_status(shard_id, BackfillStatus.FAILED, str(e))
+            return False
+        finally:
+            db.close()
@@ -1,15 +1,32 @@
+import asyncio
 import copy
 from email.message import Message
-from typing import List, Optional
+from typing import (AsyncIterator, Callable, Collection, Dict, Iterable,
+                    Iterator, List, Optional, Set, Tuple, Union)
 
-from email_transaction_extractor.email import EmailClient, IMAPSearchCriteria
+from email_transaction_extractor.email import (AsyncEmailClient, EmailClient,
+                                               IMAPSearchCriteria)
+from email_transaction_extractor.email.client import MessageId
 from email_transaction_extractor.models.enums import Bank
 from email_transaction_extractor.utils.dates import DateRange
 
 
+KnownMessageIds = Callable[[Collection[str]], Set[str]]
+# (sender address, subject filter)
+Source = Tuple[str, Optional[str]]
+
+
 class EmailService:
-    def __init__(self, client: EmailClient, default_criteria: Optional[IMAPSearchCriteria] = None):
+    """
+    Searches and downloads bank emails. When `known_message_ids` is given,
+    the Message-ID header of every search hit is fetched first and the
+    messages it reports as already ingested are not downloaded.
+    """
+
+    def __init__(self, client: Union[EmailClient, AsyncEmailClient], default_criteria: Optional[IMAPSearchCriteria] = None,
+                 known_message_ids: Optional[KnownMessageIds] = None):
         self.client = client
+        self.known_message_ids = known_message_ids
         self.__default_criteria = default_criteria or IMAPSearchCriteria()
 
     @property
@@ -20,13 +37,103 @@ class EmailService:
     def default_criteria(self, criteria: IMAPSearchCriteria) -> None:
         self.__default_criteria = criteria
 
-    def get_mail_from_bank(self, bank: Bank, subject_filter: Optional[str] = None) -> List[Message]:
-        criteria = copy.deepcopy(self.__default_criteria).from_(bank.email)
-        if subject_filter:
-            criteria = criteria.subject(subject_filter)
-        final_criteria = IMAPSearchCriteria().and_(criteria.build())
-        ids = self.client.fetch_email_ids(final_criteria)
+    def sources_criteria(self, sources: Iterable[Source]) -> IMAPSearchCriteria:
+        """
+        Builds one search for the mail of every source, a (sender, subject
+        filter) pair: the default criteria and an OR of one term per source.
+        """
+        return self.__combine(copy.deepcopy(self.__default_criteria), sources, {})
+
+    def get_mail_from_senders(self, sources: Iterable[Source]) -> List[Message]:
+        return list(self.iter_mail_from_senders(sources))
+
+    def iter_mail_from_senders(self, sources: Iterable[Source]) -> Iterator[Message]:
+        """
+        Searches the mail of all `sources` with a single SEARCH and drops what
+        has already been ingested. The search runs immediately; the messages
+        are downloaded batch by batch as the returned iterator is consumed.
+        """
+        ids = self.client.fetch_email_ids(self.sources_criteria(sources))
         if ids is None:
-            return []
-        emails = self.client.get_emails(ids)
-        return emails
+            return iter(())
+        ids = self.__without_ingested(ids)
+        return self.client.iter_emails(ids)
+
+    async def get_mail_from_senders_async(self, sources: Iterable[Source]) -> List[Message]:
+        return [msg async for msg in self.iter_mail_from_senders_async(sources)]
+
+    async def iter_mail_from_senders_async(self, sources: Iterable[Source]) -> AsyncIterator[Message]:
+        """Same as `iter_mail_from_senders` for a service built on an AsyncEmailClient."""
+        ids = await self.client.fetch_email_ids(self.sources_criteria(sources))
+        if ids is None:
+            return
+        ids = await self.__without_ingested_async(ids)
+        async for msg in self.client.iter_emails(ids):
+            yield msg
+
+    def get_new_mail_from_senders(self, sources: Iterable[Source], last_uids: Dict[str, int]) -> Tuple[List[int], List[Message]]:
+        uids, emails = self.iter_new_mail_from_senders(sources, last_uids)
+        return uids, list(emails)
+
+    def iter_new_mail_from_senders(self, sources: Iterable[Source], last_uids: Dict[str, int],
+                                   failed: Optional[List[int]] = None) -> Tuple[List[int], Iterator[Message]]:
+        """
+        Returns the UIDs and messages of all `sources` newer than each
+        sender's entry in `last_uids`, with a single UID SEARCH. Senders
+        without a mark (0 or missing) are restricted by the default criteria
+        instead. Messages are downloaded as the returned iterator is consumed;
+        the UIDs of batches that could not be downloaded are added to `failed`.
+        """
+        sources = list(sources)
+        criteria_by_sender = {
+            sender: IMAPSearchCriteria().uid_range(last_uids[sender] + 1) if last_uids.get(sender)
+            else self.__default_criteria
+            for sender, _ in sources}
+        uids = self.client.fetch_email_uids(
+            self.__combine(IMAPSearchCriteria(), sources, criteria_by_sender))
+        if uids is None:
+            return [], iter(())
+        # "UID n:*" always matches the newest message, even when its UID is below n
+        lowest_mark = min(last_uids.get(sender, 0) for sender, _ in sources)
+        uids = [uid for uid in uids if uid > lowest_mark]
+        if not uids:
+            return [], iter(())
+        return uids, self.client.iter_emails(self.__without_ingested(uids, uid=True), uid=True, failed=failed)
+
+    def get_mail_from_bank(self, bank: Bank, subject_filter: Optional[str] = None) -> List[Message]:
+        return self.get_mail_from_senders([(bank.email, subject_filter)])
+
+    async def get_mail_from_bank_async(self, bank: Bank, subject_filter: Optional[str] = None) -> List[Message]:
+        return await self.get_mail_from_senders_async([(bank.email, subject_filter)])
+
+    def get_new_mail_from_bank(self, bank: Bank, last_uid: int, subject_filter: Optional[str] = None) -> Tuple[List[int], List[Message]]:
+        return self.get_new_mail_from_senders([(bank.email, subject_filter)], {bank.email: last_uid})
+
+    @staticmethod
+    def __combine(criteria: IMAPSearchCriteria, sources: Iterable[Source],
+                  criteria_by_sender: Dict[str, IMAPSearchCriteria]) -> IMAPSearchCriteria:
+        terms = []
+        for sender, subject_filter in sources:
+            term = copy.deepcopy(criteria_by_sender.get(sender) or IMAPSearchCriteria())
+            terms.append(term.from_(sender).subject(subject_filter).build())
+        return criteria.any_(*terms)
+
+    def __without_ingested(self, ids: List[MessageId], uid: bool = False) -> List[MessageId]:
+        if self.known_message_ids is None or not ids:
+            return ids
+        message_ids = self.client.fetch_message_ids(ids, uid=uid)
+        return self.__drop_known(ids, message_ids, self.known_message_ids(
+            {message_id for message_id in message_ids.values() if message_id}))
+
+    async def __without_ingested_async(self, ids: List[MessageId], uid: bool = False) -> List[MessageId]:
+        if self.known_message_ids is None or not ids:
+            return ids
+        message_ids = await self.client.fetch_message_ids(ids, uid=uid)
+        known = await asyncio.to_thread(self.known_message_ids,
+                                        {message_id for message_id in message_ids.values() if message_id})
+        return self.__drop_known(ids, message_ids, known)
+
+    @staticmethod
+    def __drop_known(ids: List[MessageId], message_ids: Dict[int, Optional[str]], known: Set[str]) -> List[MessageId]:
+        return [email_id for email_id in ids
+                if message_ids.get(int(email_id)) not in known]
@@ -1,6 +1,6 @@
 from http import HTTPStatus
 from logging import getLogger
-from typing import Callable, Generic, List, Optional, Type
+from typing import Any, Callable, Generic, List, Optional, Sequence, Tuple, Type
 
 from sqlalchemy.orm import Session
 
@@ -11,11 +11,14 @@ from email_transaction_extractor.schemas.api_response import (
 from email_transaction_extractor.typing import (CreateSchemaType, ModelType,
                                                 ReturnSchemaType,
                                                 UpdateSchemaType)
-from email_transaction_extractor.utils.pagination import (decode_cursor,
-                                                          encode_cursor)
+from email_transaction_extractor.utils.pagination import (
+    decode_cursor, decode_keyset_key, encode_cursor, encode_keyset_cursor)
 
 
 class GenericService(Generic[ModelType, CreateSchemaType, UpdateSchemaType, ReturnSchemaType]):
+    # Unique sort key for keyset pagination, newest first
+    keyset_columns: Sequence[Any] = ()
+
     def __init__(self, model: Type[ModelType], create_schema: Type[CreateSchemaType], update_schema: Type[UpdateSchemaType], return_schema: Type[ReturnSchemaType], repository: GenericRepository):
         self.model = model
         self.create_schema = create_schema
@@ -43,25 +46,48 @@ class GenericService(Generic[ModelType, CreateSchemaType, UpdateSchemaType, Retu
         data, elapsed_time = self.repository.get_all()
         return ApiResponse(meta=Meta(status=HTTPStatus.OK, request_time=elapsed_time), data=data)
 
-    def get_paginated(self, page_size: int, cursor: Optional[str] = None, filter: Optional[Callable[[ModelType], bool]] = None) -> ApiResponse[PaginatedResponse[ReturnSchemaType]]:
+    def get_paginated(self, page_size: int, cursor: Optional[str] = None, filter: Optional[Callable[[ModelType], bool]] = None,
+                      keyset: bool = False, count_items: Optional[Callable[[], Tuple[Optional[int], float]]] = None,
+                      options: Sequence[Any] = ()) -> ApiResponse[PaginatedResponse[ReturnSchemaType]]:
+        """
+        Returns a page of items. Offset pages carry the page number in their
+        cursor; with `keyset` set, or a cursor from a keyset page, pages are
+        sought by `keyset_columns` instead, see `get_keyset_paginated`.
+
+        `count_items` returns the total number of items and the time it took,
+        and defaults to a COUNT over `filter`. When it returns None the page
+        has no totals, and one extra row is fetched to tell if there is a next
+        page.
+        """
+        cursor_data = None
         if cursor:
             cursor_data = decode_cursor(cursor)
             if cursor_data is None:
                 raise ValueError("Invalid cursor")
-            current_page = cursor_data['page']
-        else:
-            current_page = 1
-
-        total_items, count_elapsed_time = self.repository.count(filter)
+            keyset = 'after' in cursor_data or 'before' in cursor_data
+        if keyset:
+            return self.get_keyset_paginated(page_size, cursor_data, filter, options)
+        current_page = cursor_data['page'] if cursor_data else 1
+
+        if count_items is None:
+            def count_items():
+                return self.repository.count(filter)
+        total_items, count_elapsed_time = count_items()
         offset = (current_page - 1) * page_size
         db_objs, paginated_elapsed_time = self.repository.get_paginated(
-            offset, page_size, filter)
+            offset, page_size if total_items is not None else page_size + 1, filter, options)
 
-        total_pages = (total_items + page_size - 1) // page_size
+        if total_items is None:
+            total_pages = None
+            has_next = len(db_objs) > page_size
+            db_objs = db_objs[:page_size]
+        else:
+            total_pages = (total_items + page_size - 1) // page_size
+            has_next = current_page < total_pages
         request_time = count_elapsed_time + paginated_elapsed_time
 
         next_cursor = encode_cursor(
-            current_page + 1, page_size) if current_page < total_pages else None
+            current_page + 1, page_size) if has_next else None
         prev_cursor = encode_cursor(
             current_page - 1, page_size) if current_page > 1 else None
 
@@ -82,6 +108,51 @@ class GenericService(Generic[ModelType, CreateSchemaType, UpdateSchemaType, Retu
             pagination=pagination, items=items))
         return response
 
+    def get_keyset_paginated(self, page_size: int, cursor_data: Optional[dict] = None,
+                             filter: Optional[Callable[[ModelType], bool]] = None,
+                             options: Sequence[Any] = ()) -> ApiResponse[PaginatedResponse[ReturnSchemaType]]:
+        """
+        Returns a page ordered by `keyset_columns` descending. The cursors hold
+        the key of the last (next) or first (previous) item of the page, so
+        every page costs one indexed seek however deep it is, and rows inserted
+        meanwhile do not shift items between pages. No totals are counted.
+        """
+        columns = self.keyset_columns
+        if not columns:
+            raise ValueError(f'{self.model.__name__} does not support keyset pagination')
+        direction = key = None
+        if cursor_data:
+            direction = 'after' if 'after' in cursor_data else 'before'
+            key = decode_keyset_key(columns, cursor_data[direction])
+            if key is None:
+                raise ValueError("Invalid cursor")
+
+        db_objs, request_time = self.repository.get_keyset_page(
+            columns, page_size + 1, filter=filter, options=options, **({direction: key} if direction else {}))
+        has_more = len(db_objs) > page_size
+        if direction == 'before':
+            db_objs = db_objs[-page_size:]
+            has_next, has_prev = True, has_more
+        else:
+            db_objs = db_objs[:page_size]
+            has_next, has_prev = has_more, direction is not None
+
+        def key_of(obj: ModelType) -> List[Any]:
+            return [getattr(obj, column.key) for column in columns]
+
+        pagination = PaginationMeta(
+            page_size=page_size,
+            next_cursor=encode_keyset_cursor(
+                'after', key_of(db_objs[-1]), page_size) if has_next and db_objs else None,
+            prev_cursor=encode_keyset_cursor(
+                'before', key_of(db_objs[0]), page_size) if has_prev and db_objs else None
+        )
+        items = [self.return_schema.model_validate(obj) for obj in db_objs]
+        meta = Meta(status=HTTPStatus.OK, request_time=request_time,
+                    message="Transactions retrieved successfully")
+        return ApiResponse(meta=meta, data=PaginatedResponse(
+            pagination=pagination, items=items))
+
     def update(self, id: str, obj_in: UpdateSchemaType) -> ApiResponse[SingleResponse[ReturnSchemaType]]:
         obj_in_data = obj_in.model_dump()
         db_obj, elapsed_time = self.repository.update(id, obj_in_data)
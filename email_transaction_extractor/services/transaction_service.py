@@ -1,17 +1,29 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import Counter
+from email.message import Message
 from http import HTTPStatus
-from typing import List, Optional, Tuple, override
+from datetime import datetime
+from typing import (AsyncIterator, Callable, Collection, Dict, Iterable,
+                    Iterator, List, Optional, Set, Tuple, Type, override)
 
+from pydantic import ValidationError
 from sqlalchemy import and_
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from email_transaction_extractor.email.async_client import AsyncEmailClient
 from email_transaction_extractor.email.client import EmailClient
 from email_transaction_extractor.email.imap_search_criteria import \
     IMAPSearchCriteria
-from email_transaction_extractor.exceptions import TransactionIDExistsError
-from email_transaction_extractor.models.enums import Bank
+from email_transaction_extractor.exceptions import (MessageIDExistsError,
+                                                     TransactionIDExistsError)
 from email_transaction_extractor.models.transaction import (
     TransactionTable, generate_transaction_id)
+from email_transaction_extractor.repositories.mailbox_sync_state_repository import \
+    MailboxSyncStateRepository
 from email_transaction_extractor.repositories.transaction_repository import \
     TransactionRepository
 from email_transaction_extractor.schemas.api_response import (
@@ -23,15 +35,33 @@ from email_transaction_extractor.services.email_service import EmailService
 from email_transaction_extractor.services.generic_service import GenericService
 from email_transaction_extractor.utils.dates import DateRange
 from email_transaction_extractor.utils.decorators import timed_operation
-from email_transaction_extractor.utils.parsers.bac_parser import \
-    BacMessageParser
-from email_transaction_extractor.utils.parsers.promerica_parser import \
-    PromericaMessageParser
+from email_transaction_extractor.utils.pagination import TotalsMode
+from email_transaction_extractor.utils.parsers import (BaseMessageParser,
+                                                       registry)
+from email_transaction_extractor.utils.parsers.base_parser import \
+    sender_address
+from email_transaction_extractor.utils.parsers.pool import (ParsePool,
+                                                             default_pool)
+from email_transaction_extractor.utils.pipeline import (prefetch,
+                                                        prefetch_async)
+
+# Downloaded emails waiting to be parsed, and parsed transactions waiting to be saved
+EMAIL_QUEUE_SIZE = 256
+TRANSACTION_QUEUE_SIZE = 256
+# Batches of emails waiting to be parsed and saved by the async refresh
+ASYNC_BATCH_QUEUE_SIZE = 2
+# Transactions written per INSERT ... ON CONFLICT DO NOTHING and commit
+SAVE_BATCH_SIZE = 500
 
 
 class TransactionService(GenericService[TransactionTable, TransactionCreate, TransactionUpdate, Transaction]):
-    def __init__(self, db: Session):
+    keyset_columns = (TransactionTable.date, TransactionTable.id)
+
+    def __init__(self, db: Session, parse_pool: Optional[ParsePool] = None):
         self.repository: TransactionRepository = TransactionRepository(db)
+        self.parse_pool = parse_pool or default_pool()
+        self.sync_state_repository = MailboxSyncStateRepository(db)
+        self.__db_lock = threading.Lock()
         super().__init__(TransactionTable,
                          TransactionCreate, TransactionUpdate, Transaction, self.repository)
 
@@ -46,6 +76,11 @@ class TransactionService(GenericService[TransactionTable, TransactionCreate, Tra
             db_obj, elapsed_time = self.repository.create(db_obj)
             # TODO: Add bank and bank_email to the transaction model to avoid type missmatch error
         except IntegrityError:
+            # Both the id and the Message-ID are unique, tell which one was taken
+            if obj_in.message_id:
+                owner, _ = self.repository.get_by_message_id(obj_in.message_id)
+                if owner is not None:
+                    raise MessageIDExistsError(obj_in.message_id, owner.id)
             raise TransactionIDExistsError(transaction_id)
 
         transaction = self.return_schema.model_validate(db_obj)
@@ -56,25 +91,368 @@ class TransactionService(GenericService[TransactionTable, TransactionCreate, Tra
             data=SingleResponse(item=transaction)
         )
 
-    def get_by_date(self, page_size: int, date_range: DateRange, cursor: Optional[str] = None) -> ApiResponse[PaginatedResponse[Transaction]]:
+    @override
+    def get_paginated(self, page_size: int, cursor: Optional[str] = None, filter=None, keyset: bool = False,
+                      count_items: Optional[Callable[[], Tuple[Optional[int], float]]] = None,
+                      totals: TotalsMode = 'exact', include_body: bool = False) -> ApiResponse[PaginatedResponse[Transaction]]:
+        """
+        Same as `GenericService.get_paginated`, except that unfiltered totals
+        are summed from the daily counts rather than counted, and `totals`
+        can make them estimated or skip them, see `get_by_date`. Email bodies
+        are left out of the page unless `include_body` is set.
+        """
+        if count_items is None and (filter is None or totals == 'none'):
+            count_items = self.__counter(totals)
+        return super().get_paginated(page_size, cursor, filter=filter, keyset=keyset, count_items=count_items,
+                                     options=self.repository.WITH_BODY if include_body else ())
 
+    def get_by_date(self, page_size: int, date_range: DateRange, cursor: Optional[str] = None, keyset: bool = False,
+                    totals: TotalsMode = 'exact', include_body: bool = False) -> ApiResponse[PaginatedResponse[Transaction]]:
+        """
+        Returns a page of the transactions within `date_range`. With 'exact'
+        totals the whole days of the range are summed from the daily counts
+        and only partial days are counted; 'estimate' takes partial days whole
+        and counts nothing, and 'none' skips totals altogether.
+        """
         filter = and_(TransactionTable.date >= date_range.start_date,
                       TransactionTable.date <= date_range.end_date)
-        response = self.get_paginated(page_size, cursor, filter=filter)
+        response = self.get_paginated(page_size, cursor, filter=filter, keyset=keyset,
+                                      count_items=self.__counter(totals, date_range.start_date, date_range.end_date),
+                                      include_body=include_body)
         response.meta.message = \
             f'Transactions from {str(date_range)} retrieved successfuly'
         return response
 
+    def rebuild_daily_counts_if_missing(self) -> bool:
+        rebuilt, elapsed_time = self.repository.daily_counts.rebuild_if_missing()
+        if rebuilt:
+            self.logger.info(
+                f'Rebuilt transaction daily counts\ttime={elapsed_time:.3f}s')
+        return rebuilt
+
     def fetch_emails_from_date(self, client: EmailClient, date_range: DateRange) -> ApiResponse[SingleResponse]:
         meta, time = self.__refresh_database_with_emails_from_date(
             client, date_range)
         meta.request_time = time
         return ApiResponse(meta=meta)
 
+    async def fetch_emails_from_date_async(self, client: AsyncEmailClient, date_range: DateRange) -> ApiResponse[SingleResponse]:
+        """
+        Async counterpart of `fetch_emails_from_date`. The search and download
+        run on the event loop, while each downloaded batch is parsed and saved
+        in a worker thread, so the loop stays free for other requests and at
+        most a few batches are held in memory.
+        """
+        start_time = time.time()
+        criteria = IMAPSearchCriteria().date_range(
+            date_range.start_date, date_range.end_date)
+        emails = EmailService(client, default_criteria=criteria, known_message_ids=self.__known_message_ids
+                              ).iter_mail_from_senders_async(registry.sources())
+
+        processed = created = 0
+        fetched: Dict[str, List[float]] = {}
+        timed_emails = self.__timed_by_bank_async(emails, fetched)
+        async for batch in prefetch_async(self.__batched_async(timed_emails), ASYNC_BATCH_QUEUE_SIZE):
+            batch_processed, batch_created = await asyncio.to_thread(
+                lambda: self.__save_transactions(self.__parse_routed(batch)))
+            processed += batch_processed
+            created += batch_created
+
+        meta = self.__saved_meta(processed, created)
+        meta.message += self.__describe_fetched(fetched)
+        meta.request_time = time.time() - start_time
+        return ApiResponse(meta=meta)
+
+    def sync_new_emails(self, client: EmailClient, fallback_range: DateRange) -> ApiResponse[SingleResponse]:
+        """
+        Ingests only the bank emails that arrived after the last UID seen for
+        each bank. Banks without a valid mark (first run, or the mailbox
+        UIDVALIDITY changed) are searched within `fallback_range` instead.
+        """
+        if client.uid_validity is None:
+            self.logger.warning(
+                'Mailbox did not report UIDVALIDITY, falling back to a date range refresh')
+            return self.fetch_emails_from_date(client, fallback_range)
+        meta, time = self.__refresh_database_with_new_emails(
+            client, fallback_range)
+        meta.request_time = time
+        return ApiResponse(meta=meta)
+
+    def reparse_emails(self, emails: Iterable[Message]) -> ApiResponse[SingleResponse]:
+        """
+        Rebuilds transactions from emails that were already downloaded, e.g.
+        the raw message store, without contacting the mail server. Each email
+        is routed to its bank's parser by sender and subject. Transactions that
+        already exist are updated with the re-parsed fields, one row at a time.
+        Emails are read and parsed SAVE_BATCH_SIZE at a time, so `emails` can
+        be a lazy iterator over a large archive.
+        """
+        return self.__ingest_emails(emails, update_existing=True, action='reparsed')
+
+    def import_emails(self, emails: Iterable[Message]) -> ApiResponse[SingleResponse]:
+        """
+        Same as `reparse_emails` for emails read from an export such as an mbox
+        file, except that transactions that already exist are left untouched,
+        so new ones are saved with the bulk insert of the refresh.
+        """
+        return self.__ingest_emails(emails, update_existing=False, action='imported')
+
+    def __ingest_emails(self, emails: Iterable[Message], update_existing: bool, action: str,
+                        log_every: int = 10_000) -> ApiResponse[SingleResponse]:
+        start_time = time.time()
+        processed = 0
+        counts: Counter = Counter()
+        routed = (email for email in emails if registry.parser_for(email) is not None)
+        for chunk in itertools.batched(routed, SAVE_BATCH_SIZE):
+            chunk = list(chunk)
+            try:
+                if update_existing:
+                    self.__reparse_chunk(chunk, counts)
+                else:
+                    self.__import_chunk(chunk, counts)
+            except Exception as e:
+                counts['failed'] += len(chunk)
+                self.logger.exception(
+                    f'Failed to ingest {len(chunk)} emails starting at {chunk[0].get("Message-ID")}: {e}')
+            processed += len(chunk)
+            if processed // log_every > (processed - len(chunk)) // log_every:
+                self.logger.info(
+                    f'{processed} Emails {action}\trate={processed / (time.time() - start_time):.0f} emails/s')
+
+        elapsed_time = time.time() - start_time
+        message = (f'{processed} Emails {action} in {elapsed_time:.1f}s ({processed / elapsed_time if elapsed_time else 0:.0f} emails/s). '
+                   f'Created {counts["created"]}, updated {counts["updated"]} and skipped {counts["skipped"]} entries in the DB, '
+                   f'{counts["conflicts"]} conflicted with another email and {counts["failed"]} failed')
+        self.logger.info(message)
+        return ApiResponse(meta=Meta(status=HTTPStatus.OK, message=message,
+                                     request_time=elapsed_time))
+
+    def __import_chunk(self, emails: List[Message], counts: Counter):
+        """
+        Saves the transactions of `emails` with the bulk insert of the refresh.
+        Emails whose Message-ID is already stored are skipped before parsing.
+        Rows the insert leaves out are told apart afterwards: a stored
+        Message-ID is a duplicate, an id taken by another email a conflict,
+        and anything else failed to save.
+        """
+        known = self.__known_message_ids({email.get('Message-ID', '').strip() for email in emails} - {''})
+        new_emails = [email for email in emails if email.get('Message-ID', '').strip() not in known]
+        transactions = self.__parse_routed(new_emails)
+        counts['skipped'] += len(emails) - len(transactions)
+        processed, created = self.__save_transactions(transactions)
+        counts['created'] += created
+        if created == processed:
+            return
+
+        stored, _ = self.repository.get_existing_message_ids(
+            {obj.message_id for obj in transactions if obj.message_id})
+        unstored = {generate_transaction_id(obj.bank_email, obj.value, obj.date): obj
+                    for obj in transactions if obj.message_id and obj.message_id not in stored}
+        taken, _ = self.repository.get_existing_ids(unstored)
+        for transaction_id, obj in unstored.items():
+            if transaction_id in taken:
+                counts['conflicts'] += 1
+                self.logger.warning(
+                    f'Transaction ID {transaction_id} belongs to another email, not storing {obj.message_id}')
+            else:
+                counts['failed'] += 1
+        counts['skipped'] += processed - created - len(unstored)
+
+    def __reparse_chunk(self, emails: List[Message], counts: Counter):
+        """Parses `emails` as one batch, then updates the transaction of each one, or creates it, row by row."""
+        transactions = self.__parse_routed(emails)
+        counts['skipped'] += len(emails) - len(transactions)
+        for obj in transactions:
+            try:
+                transaction_id = generate_transaction_id(
+                    obj.bank_email, obj.value, obj.date)
+                existing = self.__find_existing(obj, transaction_id)
+                if existing is None:
+                    self.create(obj)
+                    counts['created'] += 1
+                else:
+                    # A parser fix can change the value or date, and with them the id
+                    changes = {key: value for key, value in obj.model_dump().items()
+                               if value is not None or key not in ('message_id', 'uid')}
+                    self.repository.update(existing.id, {**changes, 'id': transaction_id})
+                    counts['updated'] += 1
+            except MessageIDExistsError:
+                counts['skipped'] += 1
+            except TransactionIDExistsError as e:
+                counts['conflicts'] += 1
+                self.logger.warning(
+                    f'Transaction ID {e.transaction_id} belongs to another email, not storing {obj.message_id}')
+            except Exception as e:
+                counts['failed'] += 1
+                self.logger.exception(
+                    f'Failed to ingest email {obj.message_id}: {e}')
+
+    def __find_existing(self, obj: TransactionCreate, transaction_id: str) -> Optional[TransactionTable]:
+        """
+        Returns the transaction stored for the same email. The Message-ID
+        identifies it even after a parser change altered the generated id;
+        emails without one, or rows stored without one, are matched by the id.
+        """
+        if obj.message_id:
+            existing, _ = self.repository.get_by_message_id(obj.message_id)
+            if existing is not None:
+                return existing
+        existing, _ = self.repository.get(transaction_id)
+        if existing is not None and obj.message_id and existing.message_id is not None:
+            # Same id but a different Message-ID: another email, not this one
+            return None
+        return existing
+
     @timed_operation
     def __refresh_database_with_emails_from_date(self, client: EmailClient, date_range: DateRange) -> Tuple[Meta, float]:
-        transactions = self.__fetch_from_email_by_date(
-            client, date_range)
+        """
+        Searches the transaction emails of every registered bank within `date_range` with a single search, then streams
+        them through the download, parse and save stages.
+        """
+        criteria = IMAPSearchCriteria().date_range(
+            date_range.start_date, date_range.end_date)
+        emails = EmailService(client, default_criteria=criteria, known_message_ids=self.__known_message_ids
+                              ).iter_mail_from_senders(registry.sources())
+        return self.__ingest_stream(emails)
+
+    @timed_operation
+    def __refresh_database_with_new_emails(self, client: EmailClient, fallback_range: DateRange) -> Tuple[Meta, float]:
+        """
+        Streams the transaction emails that arrived after each bank's sync mark, found with a single UID SEARCH for
+        every registered bank, then advances the marks up to the newest UID below the first message that could not be
+        downloaded or saved, so that message is searched again on the next sync.
+        """
+        last_uids: Dict[str, int] = {}
+        for sender in registry.senders:
+            state, _ = self.sync_state_repository.get_by_mailbox(
+                client.mailbox, sender)
+            last_uids[sender] = state.last_uid if state and state.uid_validity == client.uid_validity else 0
+
+        criteria = IMAPSearchCriteria().date_range(
+            fallback_range.start_date, fallback_range.end_date)
+        failed_uids: List[int] = []
+        uids, emails = EmailService(client, default_criteria=criteria, known_message_ids=self.__known_message_ids
+                                    ).iter_new_mail_from_senders(registry.sources(), last_uids, failed=failed_uids)
+        self.logger.info(
+            f'Found {len(uids)} new bank emails\tlast_uids={last_uids}')
+        meta = self.__ingest_stream(emails, failed_uids)
+
+        if failed_uids:
+            self.logger.warning(
+                f'Holding sync marks below UIDs that were not stored\tfailed={sorted(failed_uids)}')
+        last_uid = max((uid for uid in uids if uid < min(failed_uids)), default=0) if failed_uids \
+            else max(uids, default=0)
+        # The search covered every sender, so all of them have been seen up to last_uid
+        for bank_email, previous_uid in last_uids.items():
+            if last_uid <= previous_uid:
+                continue
+            self.sync_state_repository.save_mark(
+                client.mailbox, bank_email, client.uid_validity, last_uid)
+            self.logger.info(
+                f'Saved sync mark\tbank={bank_email}\tlast_uid={last_uid}')
+        return meta
+
+    def __ingest_stream(self, emails: Iterator[Message], failed_uids: Optional[List[int]] = None) -> Meta:
+        """
+        Downloads, parses and saves `emails` as three overlapping stages: the
+        download and the parsing each run on a thread of their own, feeding the
+        next stage through a bounded queue, and transactions are saved on this
+        thread, which owns the DB session. Memory use is bounded by the queue
+        sizes rather than by the number of emails. The UIDs of transactions
+        that could not be saved are added to `failed_uids`.
+        """
+        fetched: Dict[str, List[float]] = {}
+        downloaded = prefetch(self.__timed_by_bank(emails, fetched), EMAIL_QUEUE_SIZE, 'ingest-download')
+        transactions = prefetch(self.__iter_parsed(downloaded),
+                                TRANSACTION_QUEUE_SIZE, 'ingest-parse')
+        meta = self.__saved_meta(*self.__save_transactions(transactions, failed_uids))
+        meta.message += self.__describe_fetched(fetched)
+        return meta
+
+    def __timed_by_bank(self, emails: Iterator[Message], fetched: Dict[str, List[float]]) -> Iterator[Message]:
+        """
+        Yields `emails`, tallying in `fetched` how many were downloaded per bank
+        and how long each bank's emails took, as [count, seconds]. A single
+        search covers every bank, so emails arrive one FETCH batch at a time
+        and a batch's wait is charged to the bank of its first email: the
+        split between banks is approximate, their total is not.
+        """
+        while True:
+            start = time.perf_counter()
+            email = next(emails, None)
+            if email is None:
+                return
+            self.__tally_fetched(fetched, email, time.perf_counter() - start)
+            yield email
+
+    async def __timed_by_bank_async(self, emails: AsyncIterator[Message],
+                                    fetched: Dict[str, List[float]]) -> AsyncIterator[Message]:
+        """Async counterpart of `__timed_by_bank`."""
+        while True:
+            start = time.perf_counter()
+            email = await anext(emails, None)
+            if email is None:
+                return
+            self.__tally_fetched(fetched, email, time.perf_counter() - start)
+            yield email
+
+    @staticmethod
+    def __tally_fetched(fetched: Dict[str, List[float]], email: Message, elapsed_time: float):
+        parser_class = registry.parser_for(email)
+        tally = fetched.setdefault(parser_class.bank.name if parser_class else sender_address(email), [0, 0.0])
+        tally[0] += 1
+        tally[1] += elapsed_time
+
+    def __describe_fetched(self, fetched: Dict[str, List[float]]) -> str:
+        for bank_name, (count, elapsed_time) in fetched.items():
+            self.logger.info(
+                f'Fetched {bank_name} emails\tcount={count}\ttime={elapsed_time:.3f}s')
+        if not fetched:
+            return ''
+        return '. Fetched per bank: ' + ', '.join(
+            f'{bank_name}={count} emails in {elapsed_time:.2f}s' for bank_name, (count, elapsed_time) in fetched.items())
+
+    def __iter_parsed(self, emails: Iterable[Message]) -> Iterator[TransactionCreate]:
+        batch_size = self.parse_pool.chunk_size * max(self.parse_pool.workers, 1)
+        for batch in itertools.batched(emails, batch_size):
+            yield from self.__parse_routed(list(batch))
+
+    async def __batched_async(self, emails: AsyncIterator[Message]) -> AsyncIterator[List[Message]]:
+        batch: List[Message] = []
+        async for email in emails:
+            batch.append(email)
+            if len(batch) >= self.parse_pool.chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def __save_transactions(self, transactions: Iterable[TransactionCreate],
+                            failed_uids: Optional[List[int]] = None) -> Tuple[int, int]:
+        """
+        Saves `transactions` in batches of SAVE_BATCH_SIZE, each with one
+        INSERT ... ON CONFLICT DO NOTHING and a single commit, and returns how
+        many were processed and how many were new. A batch the bulk insert
+        rejects is saved row by row, so one bad row does not drop the others;
+        the UIDs of the rows that still fail are added to `failed_uids`.
+        """
+        processed = new_count = 0
+        for batch in itertools.batched(transactions, SAVE_BATCH_SIZE):
+            processed += len(batch)
+            try:
+                inserted, elapsed_time = self.repository.insert_ignoring_duplicates(
+                    [self.__to_row(obj) for obj in batch])
+            except Exception as e:
+                self.logger.exception(
+                    f'Bulk insert of {len(batch)} transactions failed, saving them one by one: {e}')
+                new_count += self.__save_one_by_one(batch, failed_uids)
+                continue
+            new_count += len(inserted)
+            self.logger.info(
+                f'Saved transactions\tbatch={len(batch)}\tnew={len(inserted)}\tduplicates={len(batch) - len(inserted)}\ttime={elapsed_time:.3f}s')
+        return processed, new_count
+
+    def __save_one_by_one(self, transactions: Iterable[TransactionCreate], failed_uids: Optional[List[int]] = None) -> int:
         new_count = 0
         for obj in transactions:
             try:
@@ -82,70 +460,115 @@ class TransactionService(GenericService[TransactionTable, TransactionCreate, Tra
                     f'Processing transaction\tday={obj.date.isoformat()}\tbusiness={obj.business}')
                 self.create(obj)
                 new_count += 1
-            except TransactionIDExistsError as e:
+            except MessageIDExistsError as e:
                 self.logger.info(
-                    f'Transaction ID {e.transaction_id} already exists for {obj.business}, skipping.')
+                    f'Email {e.message_id} is already stored as {e.transaction_id} for {obj.business}, skipping.')
+                continue
+            except TransactionIDExistsError as e:
+                # Not retried: the same email would collide again on every sync
+                self.logger.warning(
+                    f'Transaction ID {e.transaction_id} belongs to another email, skipping {obj.message_id} for {obj.business}.')
                 continue
             except IntegrityError as e:
                 self.logger.error(
                     f'Integrity error while processing {obj.business}')
+                self.__record_failure(obj, failed_uids)
                 continue
             except Exception as e:
                 self.logger.error(
                     f'Unexpected error while processing {obj.business}')
                 self.logger.exception(e)
+                self.__record_failure(obj, failed_uids)
                 continue
+        return new_count
+
+    @staticmethod
+    def __record_failure(obj: TransactionCreate, failed_uids: Optional[List[int]]):
+        if failed_uids is not None and obj.uid is not None:
+            failed_uids.append(obj.uid)
+
+    @staticmethod
+    def __to_row(obj: TransactionCreate) -> dict:
+        row = obj.model_dump()
+        row['id'] = generate_transaction_id(obj.bank_email, obj.value, obj.date)
+        return row
+
+    def __saved_meta(self, processed: int, new_count: int) -> Meta:
         self.logger.info(
-            f"{len(transactions)} Emails processed successfully. Created {new_count} new entries in the DB")
+            f"{processed} Emails processed successfully. Created {new_count} new entries in the DB")
 
         meta = Meta(
             status=HTTPStatus.OK,
-            message=f"{len(transactions)} Emails processed successfully. Created {new_count} new entries in the DB")
+            message=f"{processed} Emails processed successfully. Created {new_count} new entries in the DB")
         return meta
 
-    def __fetch_from_email_by_date(self, client: EmailClient, date_range: DateRange) -> List[TransactionCreate]:
+    def __counter(self, totals: TotalsMode, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None) -> Callable[[], Tuple[Optional[int], float]]:
+        if totals == 'none':
+            return lambda: (None, 0.0)
+        return lambda: self.repository.count_by_date(start, end, estimate=totals == 'estimate')
+
+    def __known_message_ids(self, message_ids: Collection[str]) -> Set[str]:
         """
-        Fetches transaction emails from specified banks within a given date range, parses the emails to extract transaction details,
-        and returns a list of TransactionCreate objects.
+        Returns the Message-IDs that already have a transaction. The async
+        fetch calls this from a worker thread, so access to the session is
+        serialized.
+        """
+        if not message_ids:
+            return set()
+        with self.__db_lock:
+            existing, elapsed_time = self.repository.get_existing_message_ids(
+                message_ids)
+        self.logger.info(
+            f'Skipping already ingested emails\tknown={len(existing)}/{len(message_ids)}\ttime={elapsed_time:.3f}s')
+        return existing
 
-        Args:
-            client (EmailClient): An instance of EmailClient used to connect to the email server and fetch emails.
-            date_range (DateRange): An instance of DateRange specifying the start and end dates for fetching emails.
+    def __parse_routed(self, emails: List[Message]) -> List[TransactionCreate]:
+        """Groups `emails` by the parser registered for their sender and subject, and parses each group."""
+        routed: Dict[Type[BaseMessageParser], List[Message]] = {}
+        for email in emails:
+            parser_class = registry.parser_for(email)
+            if parser_class is None:
+                self.logger.debug(
+                    f'Skipping email that is not a transaction notification\tfrom={email.get("From")}\tsubject={email.get("Subject")}')
+                continue
+            routed.setdefault(parser_class, []).append(email)
 
-        Returns:
-            List[TransactionCreate]: A list of TransactionCreate objects containing the extracted transaction details from the emails.
-        """
-        service = EmailService(
-            client,
-            default_criteria=IMAPSearchCriteria().date_range(
-                date_range.start_date, date_range.end_date)
-        )
-        bac_emails = service.get_mail_from_bank(Bank.BAC)
-        self.logger.info('Fetched the BAC transaction emails')
-        promerica_emails = service.get_mail_from_bank(
-            Bank.PROMERICA, 'Comprobante de')
-        self.logger.info('Fetched the PROMERICA transaction emails')
-        transactions: list[TransactionCreate] = []
-
-        for bank_emails, parser_class in [(bac_emails, BacMessageParser), (promerica_emails, PromericaMessageParser)]:
-            for email in bank_emails:
-                parser = parser_class(email)
-                value, currency = parser.parse_value_and_currency()
-                bank = Bank.BAC if parser_class == BacMessageParser else Bank.PROMERICA
+        transactions: List[TransactionCreate] = []
+        for parser_class, parser_emails in routed.items():
+            transactions += self.__parse_emails(parser_emails, parser_class)
+
+        self.logger.debug(
+            f'Extracted transaction details\temails={len(emails)}\ttransactions={len(transactions)}')
+        return transactions
+
+    def __parse_emails(self, emails: List[Message], parser_class: Type[BaseMessageParser]) -> List[TransactionCreate]:
+        bank = parser_class.bank
+        transactions: List[TransactionCreate] = []
+        for email, fields in zip(emails, self.parse_pool.parse(parser_class, emails)):
+            if fields is None:
+                self.logger.info(
+                    f'Skipping {bank.name} email without a transaction amount\tsubject={email.get("Subject")}')
+                continue
+            date, value, currency, business, business_type, body = fields
+            try:
                 transaction = TransactionCreate(
-                    date=parser.parse_date(),
+                    date=date,
                     value=value,
                     currency=currency,
-                    business=parser.parse_business(),
-                    business_type=parser.parse_business_type(),
+                    business=business,
+                    business_type=business_type,
                     bank_email=bank.email,
                     bank_name=bank.name,
-                    body=parser.body,
+                    body=body,
                     expense_priority=None,
-                    expense_type=None
+                    expense_type=None,
+                    message_id=email.get('Message-ID', '').strip() or None,
+                    uid=getattr(email, 'uid', None)
                 )
-                transactions.append(transaction)
-
-        self.logger.info('Extracted transaction details from emails')
-        self.logger.info(f'Total transactions = {len(transactions)}')
+            except ValidationError as e:
+                self.logger.error(
+                    f'Could not build a transaction from {bank.name} email {email.get("Message-ID")}: {e}')
+                continue
+            transactions.append(transaction)
         return transactions
@@ -1,6 +1,7 @@
 from .dates import DateRange
 from .logging import configure_root_logger
-from .pagination import decode_cursor, encode_cursor
+from .pagination import (TotalsMode, decode_cursor, decode_keyset_key,
+                         encode_cursor, encode_keyset_cursor)
 from .parsers import (BacMessageParser, BaseMessageParser,
                       PromericaMessageParser)
 from .text import strip_excess_whitespace
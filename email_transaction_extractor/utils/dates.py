@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, model_validator
 
 
@@ -43,5 +43,16 @@ class DateRange(BaseModel):
     def duration(self) -> int:
         return (self.end_date - self.start_date).days
 
+    def split(self, days: int) -> List['DateRange']:
+        """Splits the range into consecutive shards of `days` whole days; the last one may be shorter."""
+        shards: List[DateRange] = []
+        start_date = self.start_date
+        while start_date <= self.end_date:
+            shard = DateRange(start_date=start_date,
+                              end_date=min(start_date + timedelta(days=days - 1), self.end_date))
+            shards.append(shard)
+            start_date = shard.start_date + timedelta(days=days)
+        return shards
+
     def __str__(self):
         return f"Date range = {self.start_date:%B %d, %Y} to {self.end_date:%B %d, %Y}"
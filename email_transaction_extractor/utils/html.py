@@ -0,0 +1,165 @@
+import logging
+import os
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Text inside these elements is not page text; BeautifulSoup's get_text skips it too
+SKIPPED_TAGS = frozenset({'script', 'style', 'template'})
+PRESERVE_WHITESPACE_TAGS = frozenset({'pre', 'textarea'})
+ASCII_SPACES = ' \n\t\x0c\r'
+SEPARATOR = '\n'
+
+
+class _TextCollector:
+    """
+    Collects the text nodes of a document the way BeautifulSoup's
+    `get_text(separator)` does: consecutive character data is one node,
+    markup of any kind (tags, comments, declarations) ends the node, and a
+    whitespace-only node outside <pre>/<textarea> collapses to a single
+    newline or space.
+    """
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self.__skipping = 0
+        self.__preserving = 0
+        self.__in_text = False
+
+    def start(self, tag: str, *args):
+        self.boundary()
+        tag = tag.lower()
+        self.__skipping += tag in SKIPPED_TAGS
+        self.__preserving += tag in PRESERVE_WHITESPACE_TAGS
+
+    def end(self, tag: str):
+        self.boundary()
+        tag = tag.lower()
+        if tag in SKIPPED_TAGS and self.__skipping:
+            self.__skipping -= 1
+        if tag in PRESERVE_WHITESPACE_TAGS and self.__preserving:
+            self.__preserving -= 1
+
+    def data(self, data: str):
+        if self.__skipping:
+            return
+        if self.__in_text:
+            self.strings[-1] += data
+        else:
+            self.strings.append(data)
+            self.__in_text = True
+
+    def boundary(self, *args):
+        if self.__in_text and not self.__preserving and not self.strings[-1].strip(ASCII_SPACES):
+            self.strings[-1] = '\n' if '\n' in self.strings[-1] else ' '
+        self.__in_text = False
+
+    comment = pi = doctype = boundary
+
+    def close(self) -> str:
+        self.boundary()
+        return SEPARATOR.join(self.strings).strip()
+
+
+class _StdlibTextParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.collector = _TextCollector()
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+    def handle_comment(self, data):
+        self.collector.boundary()
+
+    def handle_decl(self, decl):
+        self.collector.boundary()
+
+    def handle_pi(self, data):
+        self.collector.boundary()
+
+    def unknown_decl(self, data):
+        self.collector.boundary()
+        if data.startswith('CDATA['):
+            self.collector.data(data[len('CDATA['):])
+            self.collector.boundary()
+
+
+def stdlib_html_to_text(html: str) -> str:
+    """Streams the document through `html.parser.HTMLParser` without building a tree."""
+    parser = _StdlibTextParser()
+    parser.feed(html)
+    parser.close()
+    return parser.collector.close()
+
+
+def lxml_html_to_text(html: str) -> str:
+    """
+    Streams libxml2's HTML parser events into the collector without building
+    a tree. libxml2 normalizes CRLF line breaks to LF, which the BAC patterns
+    depend on, so documents containing CR go through the stdlib parser.
+    """
+    if '\r' in html:
+        return stdlib_html_to_text(html)
+    from lxml import etree
+
+    return etree.fromstring(html, etree.HTMLParser(target=_TextCollector()))
+
+
+def bs4_html_to_text(html: str) -> str:
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html, 'html.parser').get_text(separator=SEPARATOR).strip()
+
+
+BACKENDS: Dict[str, Callable[[str], str]] = {
+    'stdlib': stdlib_html_to_text,
+    'lxml': lxml_html_to_text,
+    'bs4': bs4_html_to_text,
+}
+
+
+def available_backends() -> List[str]:
+    available = ['stdlib']
+    for name, module in (('lxml', 'lxml'), ('bs4', 'bs4')):
+        try:
+            __import__(module)
+            available.append(name)
+        except ImportError:
+            pass
+    return available
+
+
+_backend: Optional[Callable[[str], str]] = None
+
+
+def set_backend(name: str = 'auto'):
+    """
+    Selects the function `html_to_text` uses. 'auto' picks lxml when it is
+    installed and the stdlib parser otherwise.
+    """
+    global _backend
+    if name == 'auto':
+        name = 'lxml' if 'lxml' in available_backends() else 'stdlib'
+    if name not in BACKENDS:
+        raise ValueError(
+            f'Unknown HTML backend {name!r}, expected one of {sorted(BACKENDS)}')
+    if name not in available_backends():
+        logger.warning(
+            f'HTML backend {name!r} is not installed, using the stdlib parser')
+        name = 'stdlib'
+    _backend = BACKENDS[name]
+
+
+def html_to_text(html: str) -> str:
+    """Returns the text of an HTML document, one text node per line, like BeautifulSoup's get_text('\\n')."""
+    if _backend is None:
+        set_backend(os.getenv('HTML_TO_TEXT_BACKEND', 'auto'))
+    return _backend(html)
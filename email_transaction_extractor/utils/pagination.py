@@ -1,6 +1,11 @@
 import base64
 import json
-from typing import Optional
+from datetime import datetime
+from typing import Any, List, Literal, Optional, Sequence
+
+KeysetDirection = Literal['after', 'before']
+# How page totals are computed: counted exactly, estimated, or not at all
+TotalsMode = Literal['exact', 'estimate', 'none']
 
 
 def encode_cursor(page: int, page_size: int) -> str:
@@ -9,6 +14,25 @@ def encode_cursor(page: int, page_size: int) -> str:
     return base64.urlsafe_b64encode(cursor_str.encode()).decode()
 
 
+def encode_keyset_cursor(direction: KeysetDirection, key: Sequence[Any], page_size: int) -> str:
+    """Encodes the sort key of the row a keyset page starts after (or ends before)."""
+    cursor_data = {direction: [value.isoformat() if isinstance(value, datetime) else value for value in key],
+                   "page_size": page_size}
+    cursor_str = json.dumps(cursor_data)
+    return base64.urlsafe_b64encode(cursor_str.encode()).decode()
+
+
+def decode_keyset_key(columns: Sequence[Any], key: Sequence[Any]) -> Optional[List[Any]]:
+    """Converts the JSON values of a keyset cursor back to the Python types of `columns`."""
+    if len(key) != len(columns):
+        return None
+    try:
+        return [datetime.fromisoformat(value) if column.type.python_type is datetime else value
+                for column, value in zip(columns, key)]
+    except (TypeError, ValueError):
+        return None
+
+
 def decode_cursor(cursor: str) -> Optional[dict]:
     try:
         cursor_str = base64.urlsafe_b64decode(cursor.encode()).decode()
@@ -1,3 +1,4 @@
 from .base_parser import BaseMessageParser
+from .registry import ParserRegistry, registry
 from .bac_parser import BacMessageParser
 from .promerica_parser import PromericaMessageParser
@@ -1,27 +1,32 @@
 from email.message import Message
-import re
 from typing import Tuple
+from email_transaction_extractor.models.enums import Bank
 from email_transaction_extractor.utils.parsers import BaseMessageParser
+from email_transaction_extractor.utils.parsers.registry import registry
+from email_transaction_extractor.utils.parsers.spec import ParserSpec
 
 
+@registry.register
 class BacMessageParser(BaseMessageParser):
+    bank = Bank.BAC
+    spec = ParserSpec(
+        business=r'(?s:Comercio:\s*\r\n(?P<business>.+?)\s*\n)',
+        value_and_currency=r'Monto:\s*\r\n\s*(?P<currency>\w+)\s(?P<value>[\d,]+\.\d{2})',
+    )
+
     def __init__(self, msg: Message):
         self.msg = msg
         super().__init__(msg)
 
     def parse_business(self) -> str | None:
-        regex = re.compile(
-            r'Comercio:\s*\r\n(?P<business>.+?)\s*\n', re.DOTALL)
-        match = regex.search(self.body)
+        match = self.fields.get('business')
         return match.group('business').strip() if match else None
 
     def parse_business_type(self) -> str | None:
         return None
 
     def parse_value_and_currency(self) -> Tuple[float, str]:
-        regex = re.compile(
-            r'Monto:\s*\r\n\s*(?P<currency>\w+)\s(?P<value>[\d,]+\.\d{2})')
-        match = regex.search(self.body)
+        match = self.fields.get('value_and_currency')
         if match:
             currency = match.group('currency').strip()
             value = float(match.group('value').replace(',', ''))
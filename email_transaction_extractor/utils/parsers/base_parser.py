@@ -1,22 +1,75 @@
+import hashlib
+import re
 from abc import ABC, abstractmethod
 from datetime import datetime
+from email.header import decode_header, make_header
 from email.message import Message
+from email.utils import parseaddr
+from functools import cached_property
 from logging import getLogger
-from typing import Tuple
+from typing import ClassVar, Dict, Optional, Tuple
 
-from bs4 import BeautifulSoup
 from dateutil.parser import parse as parse_date
 
+from email_transaction_extractor.models.enums import Bank
+from email_transaction_extractor.utils.html import html_to_text
+from email_transaction_extractor.utils.parsers.spec import ParserSpec
+
+
+def sender_address(msg: Message) -> str:
+    """Returns the lowercase address of the From header."""
+    _, address = parseaddr(msg.get('From', ''))
+    return address.lower()
+
 
 class BaseMessageParser(ABC):
+    """
+    Extracts a transaction from one bank notification. Nothing is decoded
+    when the parser is created: the body and the spec fields are computed on
+    first access and cached. `accepts` only reads the headers, so callers can
+    discard other mail from the bank before paying for the body.
+    """
+    bank: ClassVar[Bank]
+    subject_filter: ClassVar[Optional[str]] = None
+    spec: ClassVar[Optional[ParserSpec]] = None
+    # Bump when a change to the parsing code should invalidate cached results
+    version: ClassVar[int] = 1
+
     def __init__(self, msg: Message):
         self.msg = msg
         self.logger = getLogger(self.__class__.__name__)
-        self._body = self.__parse_body()
 
-    @property
+    @classmethod
+    def accepts(cls, msg: Message) -> bool:
+        """True when the sender and subject headers match the bank's transaction notifications."""
+        return sender_address(msg) == cls.bank.email and cls.accepts_subject(msg)
+
+    @classmethod
+    def accepts_subject(cls, msg: Message) -> bool:
+        if cls.subject_filter is None:
+            return True
+        subject = str(make_header(decode_header(msg.get('Subject') or '')))
+        return cls.subject_filter.lower() in subject.lower()
+
+    @classmethod
+    def version_stamp(cls) -> str:
+        """Identifies the parser's behaviour: its name, `version` and a digest of its spec patterns."""
+        patterns = ''.join(f'{name}={pattern.pattern}\n' for name, pattern
+                           in cls.spec.fields.items()) if cls.spec is not None else ''
+        return f'{cls.__name__}:{cls.version}:{hashlib.sha256(patterns.encode()).hexdigest()[:12]}'
+
+    @cached_property
     def body(self) -> str | None:
-        return self._body
+        return self.__parse_body()
+
+    @cached_property
+    def fields(self) -> Dict[str, re.Match]:
+        """The first match of every field of the class `spec` in the body."""
+        return self.spec.scan(self.body) if self.spec is not None else {}
+
+    def is_transaction(self) -> bool:
+        """False for mail from the bank whose body has no transaction amount."""
+        return 'value_and_currency' in self.fields
 
     def __parse_body(self) -> str | None:
         try:
@@ -38,8 +91,7 @@ class BaseMessageParser(ABC):
                             if "text/plain" in content_type:
                                 return body
                             elif "text/html" in content_type:
-                                soup = BeautifulSoup(body, "html.parser")
-                                return soup.get_text(separator='\n').strip()
+                                return html_to_text(body)
                         else:
                             self.logger.debug(
                                 f"No payload to decode in part with content type: {content_type}")
@@ -52,8 +104,7 @@ class BaseMessageParser(ABC):
                     if "text/plain" in content_type:
                         return body
                     elif "text/html" in content_type:
-                        soup = BeautifulSoup(body, "html.parser")
-                        return soup.get_text(separator='\n').strip()
+                        return html_to_text(body)
                 else:
                     self.logger.debug(
                         f"No payload to decode in message with content type: {content_type}")
@@ -0,0 +1,59 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from email.message import Message
+from typing import Any, Optional, Type
+
+from email_transaction_extractor.utils.parsers.base_parser import \
+    BaseMessageParser
+
+MISSING = object()
+
+
+class ParseCache:
+    """
+    Bounded LRU of parse results, so an email seen again by the scheduled
+    sync, a manual refresh or a backfill is not decoded and scanned again.
+    Entries are keyed by the parser's version stamp and the email's
+    Message-ID, or the SHA-256 of its bytes when it has none, so bumping a
+    parser's `version` or editing its spec invalidates its entries. "No
+    transaction" (None) results are cached too.
+    """
+
+    def __init__(self, max_size: int = 10_000):
+        self.max_size = max_size
+        self.hits = self.misses = 0
+        self.__entries: OrderedDict[str, Any] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def key_of(parser_class: Type[BaseMessageParser], msg: Message) -> str:
+        identity = (msg.get('Message-ID') or '').strip() \
+            or hashlib.sha256(msg.as_bytes()).hexdigest()
+        return f'{parser_class.version_stamp()}|{identity}'
+
+    def get(self, key: str) -> Any:
+        """Returns the cached result for `key`, or MISSING."""
+        with self.__lock:
+            value = self.__entries.get(key, MISSING)
+            if value is MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.__entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Optional[Any]):
+        with self.__lock:
+            self.__entries[key] = value
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
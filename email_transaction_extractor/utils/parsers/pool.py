@@ -0,0 +1,124 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from email.message import Message
+from logging import getLogger
+from typing import List, Optional, Sequence, Tuple, Type
+
+from email_transaction_extractor.utils.html import set_backend
+from email_transaction_extractor.utils.parsers.base_parser import \
+    BaseMessageParser
+from email_transaction_extractor.utils.parsers.cache import (MISSING,
+                                                             ParseCache)
+
+logger = getLogger(__name__)
+
+# date, value, currency, business, business_type, body
+ParsedFields = Tuple[datetime, float, str,
+                     Optional[str], Optional[str], Optional[str]]
+
+
+def parse_fields(parser_class: Type[BaseMessageParser], msg: Message) -> Optional[ParsedFields]:
+    """
+    Runs `parser_class` over one email and returns its fields as a plain
+    tuple, or None when the email has no transaction or could not be parsed.
+    """
+    try:
+        parser = parser_class(msg)
+        if not parser.is_transaction():
+            return None
+        value, currency = parser.parse_value_and_currency()
+        return (parser.parse_date(), value, currency, parser.parse_business(),
+                parser.parse_business_type(), parser.body)
+    except Exception as e:
+        logger.exception(
+            f'Failed to parse {parser_class.bank.name} email {msg.get("Message-ID")}: {e}')
+        return None
+
+
+def _parse_job(job: Tuple[Type[BaseMessageParser], Message]) -> Optional[ParsedFields]:
+    return parse_fields(*job)
+
+
+class ParsePool:
+    """
+    Parses batches of emails on a pool of worker processes, so decoding,
+    HTML extraction and the regex scans of a large batch use every core
+    instead of one thread. Emails are pickled to the workers in chunks of
+    `chunk_size` and come back as `ParsedFields` tuples. Messages are pickled
+    rather than serialized with `as_bytes`, which would normalize the CRLF
+    line breaks some bank patterns match on.
+
+    With `workers=0`, or for batches smaller than `min_batch`, emails are
+    parsed in the calling thread; the pool is only started on first use and
+    is reused until `close`. Results found in `cache` are not parsed again.
+    """
+
+    def __init__(self, workers: int = 0, chunk_size: int = 64, min_batch: Optional[int] = None,
+                 html_backend: str = 'auto', cache: Optional[ParseCache] = None):
+        self.workers = workers
+        self.cache = cache
+        self.chunk_size = max(chunk_size, 1)
+        self.min_batch = self.chunk_size if min_batch is None else min_batch
+        self.html_backend = html_backend
+        self.__executor: Optional[ProcessPoolExecutor] = None
+        self.__lock = threading.Lock()
+
+    def parse(self, parser_class: Type[BaseMessageParser], emails: Sequence[Message]) -> List[Optional[ParsedFields]]:
+        """Returns the fields of each email in `emails`, in order, see `parse_fields`."""
+        if self.cache is None:
+            return self.__parse(parser_class, emails)
+        keys = [self.cache.key_of(parser_class, msg) for msg in emails]
+        results = [self.cache.get(key) for key in keys]
+        misses = [i for i, fields in enumerate(results) if fields is MISSING]
+        if len(misses) < len(emails):
+            logger.debug(
+                f'Parse cache hits\tparser={parser_class.__name__}\thits={len(emails) - len(misses)}/{len(emails)}')
+        parsed = self.__parse(parser_class, [emails[i] for i in misses])
+        for i, fields in zip(misses, parsed):
+            results[i] = fields
+            self.cache.put(keys[i], fields)
+        return results
+
+    def __parse(self, parser_class: Type[BaseMessageParser], emails: Sequence[Message]) -> List[Optional[ParsedFields]]:
+        if self.workers <= 0 or len(emails) < self.min_batch:
+            return [parse_fields(parser_class, msg) for msg in emails]
+        jobs = ((parser_class, msg) for msg in emails)
+        return list(self.__get_executor().map(_parse_job, jobs, chunksize=self.chunk_size))
+
+    def close(self):
+        with self.__lock:
+            if self.__executor is not None:
+                self.__executor.shutdown(cancel_futures=True)
+                self.__executor = None
+
+    def __get_executor(self) -> ProcessPoolExecutor:
+        with self.__lock:
+            if self.__executor is None:
+                # spawn rather than fork: the API process runs scheduler and IMAP threads
+                self.__executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=set_backend,
+                    initargs=(self.html_backend,)
+                )
+                logger.info(
+                    f'Started parse pool\tworkers={self.workers}\tchunk_size={self.chunk_size}')
+            return self.__executor
+
+
+_default_pool = ParsePool()
+
+
+def configure(workers: int, chunk_size: int = 64, html_backend: str = 'auto', cache_size: int = 0) -> ParsePool:
+    """Replaces the pool `TransactionService` uses by default. A `cache_size` of 0 disables the parse cache."""
+    global _default_pool
+    _default_pool.close()
+    _default_pool = ParsePool(workers, chunk_size, html_backend=html_backend,
+                              cache=ParseCache(cache_size) if cache_size > 0 else None)
+    return _default_pool
+
+
+def default_pool() -> ParsePool:
+    return _default_pool
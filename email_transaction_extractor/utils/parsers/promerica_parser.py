@@ -1,36 +1,45 @@
-import re
 from email.message import Message
 from typing import Tuple
 
+from email_transaction_extractor.models.enums import Bank
 from email_transaction_extractor.utils.parsers import BaseMessageParser
+from email_transaction_extractor.utils.parsers.registry import registry
+from email_transaction_extractor.utils.parsers.spec import ParserSpec
 from email_transaction_extractor.utils.text import strip_excess_whitespace
 
 
+@registry.register
 class PromericaMessageParser(BaseMessageParser):
+    bank = Bank.PROMERICA
+    subject_filter = 'Comprobante de'
+    spec = ParserSpec(
+        business_type=r'Tipo de Comercio\s+(?P<business_type>[A-Z\s]+)',
+        business=r'Comercio\s+(?P<business>[A-Z\s]+)',
+        value_and_currency=r'Monto\s+\n (?P<currency>\w+): (?P<value>[\d,]+.\d{2})',
+    )
+
     def __init__(self, msg: Message):
         self.msg = msg
         super().__init__(msg)
 
     def parse_business(self) -> str | None:
-        business_match = re.search(r"Comercio\s+([A-Z\s]+)", self.body)
+        business_match = self.fields.get('business')
         if business_match:
-            business = business_match.group(1).strip()
+            business = business_match.group('business').strip()
             return ', '.join(strip_excess_whitespace(business))
         return None
 
     def parse_business_type(self) -> str | None:
-        business_type_match = re.search(
-            r"Tipo de Comercio\s+([A-Z\s]+)", self.body)
+        business_type_match = self.fields.get('business_type')
         if business_type_match:
-            business_type = business_type_match.group(1).strip()
+            business_type = business_type_match.group('business_type').strip()
             return ', '.join(strip_excess_whitespace(business_type))
         return None
 
     def parse_value_and_currency(self) -> Tuple[float, str]:
-        value_currency_match = re.search(
-            r"Monto\s+\n (\w+): ([\d,]+.\d{2})", self.body)
+        value_currency_match = self.fields.get('value_and_currency')
         if value_currency_match:
-            currency = value_currency_match.group(1)
-            value = float(value_currency_match.group(2).replace(',', ''))
+            currency = value_currency_match.group('currency')
+            value = float(value_currency_match.group('value').replace(',', ''))
             return value, currency
         return 0.0, ''
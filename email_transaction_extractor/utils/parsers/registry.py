@@ -0,0 +1,50 @@
+from email.message import Message
+from typing import Dict, Iterator, List, Optional, Tuple, Type
+
+from email_transaction_extractor.utils.parsers.base_parser import (
+    BaseMessageParser, sender_address)
+
+
+class ParserRegistry:
+    """
+    Maps the sender address of bank notifications to the parsers that handle
+    them. A sender can have several parsers with different subject filters;
+    a message goes to the first one whose filter matches, looked up by its
+    From address in a dict.
+    """
+
+    def __init__(self):
+        self.__by_sender: Dict[str, List[Type[BaseMessageParser]]] = {}
+
+    def register(self, parser_class: Type[BaseMessageParser]) -> Type[BaseMessageParser]:
+        """Registers `parser_class` under its bank's address. Usable as a class decorator."""
+        sender = parser_class.bank.email.lower()
+        if not sender:
+            raise ValueError(
+                f'{parser_class.__name__} cannot be registered, {parser_class.bank.name} has no sender address')
+        self.__by_sender.setdefault(sender, []).append(parser_class)
+        return parser_class
+
+    @property
+    def senders(self) -> List[str]:
+        return list(self.__by_sender)
+
+    def sources(self) -> List[Tuple[str, Optional[str]]]:
+        """The (sender, subject filter) pair of every registered parser, as searched on the mailbox."""
+        return [(parser_class.bank.email, parser_class.subject_filter) for parser_class in self]
+
+    def parser_for(self, msg: Message) -> Optional[Type[BaseMessageParser]]:
+        for parser_class in self.__by_sender.get(sender_address(msg), ()):
+            if parser_class.accepts_subject(msg):
+                return parser_class
+        return None
+
+    def __iter__(self) -> Iterator[Type[BaseMessageParser]]:
+        for parser_classes in self.__by_sender.values():
+            yield from parser_classes
+
+    def __len__(self) -> int:
+        return sum(len(parser_classes) for parser_classes in self.__by_sender.values())
+
+
+registry = ParserRegistry()
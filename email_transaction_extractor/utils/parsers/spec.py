@@ -0,0 +1,32 @@
+import re
+from typing import Dict, Optional
+
+
+class ParserSpec:
+    """
+    Declarative description of the fields of a bank notification: one regular
+    expression per field, with named groups for the values to extract. The
+    patterns are compiled once, when the spec is defined at import time.
+    Use scoped flags, e.g. `(?s:...)`, for flags that only apply to one field.
+
+    Fields are searched one pattern at a time rather than as one combined
+    alternation. Each pattern starts with a literal label, which lets `re`
+    jump between label occurrences with its literal prefix search; a single
+    combined scan defeats that optimisation and benchmarks an order of
+    magnitude slower (see benchmarks/bench_parsers.py).
+    """
+
+    def __init__(self, **fields: str):
+        self.fields: Dict[str, re.Pattern] = {
+            name: re.compile(pattern) for name, pattern in fields.items()}
+
+    def scan(self, text: Optional[str]) -> Dict[str, re.Match]:
+        """Returns the first match of each field found in `text`, keyed by field name."""
+        if not text:
+            return {}
+        found: Dict[str, re.Match] = {}
+        for name, pattern in self.fields.items():
+            match = pattern.search(text)
+            if match:
+                found[name] = match
+        return found
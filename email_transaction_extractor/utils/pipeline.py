@@ -0,0 +1,89 @@
+import asyncio
+import queue
+import threading
+from contextlib import suppress
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, TypeVar
+
+T = TypeVar('T')
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def prefetch(iterable: Iterable[T], maxsize: int, name: str = 'prefetch') -> Iterator[T]:
+    """
+    Consumes `iterable` on a background thread and yields its items, with at
+    most `maxsize` items buffered in between. Chaining stages through
+    `prefetch` lets network, CPU and DB work overlap while the bounded queue
+    keeps a slow consumer from letting a fast producer run ahead, so memory
+    stays flat. Exceptions raised by the producer are re-raised to the
+    consumer; closing the returned generator early stops the producer.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=max(maxsize, 1))
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Failure(e))
+            return
+        put(_DONE)
+
+    producer = threading.Thread(target=produce, name=name, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
+        producer.join()
+
+
+async def prefetch_async(iterable: AsyncIterable[T], maxsize: int) -> AsyncIterator[T]:
+    """Same as `prefetch` for an async iterable, consumed by a task on the running loop."""
+    buffer: asyncio.Queue = asyncio.Queue(maxsize=max(maxsize, 1))
+
+    async def produce():
+        try:
+            async for item in iterable:
+                await buffer.put(item)
+        except Exception as e:
+            await buffer.put(_Failure(e))
+            return
+        await buffer.put(_DONE)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        producer.cancel()
+        with suppress(asyncio.CancelledError):
+            await producer
@@ -0,0 +1,36 @@
+from email_transaction_extractor.email.archive import (iter_archive,
+                                                       iter_archive_messages)
+
+MBOX = (b'From MAILER-DAEMON Mon Jul  1 10:00:00 2024\n'
+        b'From: BAC <notificacion@notificacionesbaccr.com>\n'
+        b'Subject: Compra\n\n'
+        b'Comercio: SUPER\n'
+        b'>From the statement\n\n'
+        b'From 123@xxx Mon Jul  1 11:00:00 2024\n'
+        b'From: friend@example.com\n'
+        b'Subject: Hello\n\n'
+        b'Hi\n')
+
+
+def test_iter_archive_splits_mbox_and_unquotes_from_lines(tmp_path):
+    mbox = tmp_path / 'Takeout.mbox'
+    mbox.write_bytes(MBOX)
+
+    messages = list(iter_archive(str(mbox)))
+
+    assert len(messages) == 2
+    assert messages[0].endswith(b'Comercio: SUPER\nFrom the statement\n')
+    assert messages[1].startswith(b'From: friend@example.com\n')
+
+
+def test_iter_archive_messages_filters_by_sender(tmp_path):
+    (tmp_path / 'mbox').write_bytes(MBOX)
+    (tmp_path / 'eml').mkdir()
+    (tmp_path / 'eml' / 'receipt.eml').write_bytes(
+        b'From: info@promerica.fi.cr\r\nSubject: Comprobante de compra\r\n\r\nMonto\r\n')
+
+    senders = ['notificacion@notificacionesbaccr.com', 'info@promerica.fi.cr']
+    subjects = [msg['Subject'] for path in ('mbox', 'eml')
+                for msg in iter_archive_messages(str(tmp_path / path), senders)]
+
+    assert subjects == ['Compra', 'Comprobante de compra']
@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+from email_transaction_extractor.email import (AsyncEmailClient,
+                                               IMAPSearchCriteria)
+from email_transaction_extractor.email import async_client
+from email_transaction_extractor.email.async_client import AsyncIMAPError
+
+MESSAGES = {
+    1: b'From: no-reply@bank.com\r\nSubject: First\r\n\r\nTransaction details\r\n',
+    2: b'From: no-reply@bank.com\r\nSubject: Second\r\n\r\nTransaction details\r\n',
+}
+
+
+async def handle_imap_session(reader, writer):
+    writer.write(b'* OK fake IMAP ready\r\n')
+    while line := await reader.readline():
+        tag, command, *args = line.decode().rstrip('\r\n').split(' ')
+        if command == 'SELECT':
+            writer.write(b'* 2 EXISTS\r\n* OK [UIDVALIDITY 42] UIDs valid\r\n')
+        elif command == 'SEARCH':
+            writer.write(b'* SEARCH 1 2\r\n')
+        elif command == 'FETCH':
+            for email_id, raw in MESSAGES.items():
+                writer.write(
+                    f'* {email_id} FETCH (UID {email_id + 100} BODY[] {{{len(raw)}}}\r\n'.encode())
+                writer.write(raw + b')\r\n')
+        elif command == 'LOGOUT':
+            writer.write(b'* BYE logging out\r\n')
+        writer.write(f'{tag} OK {command} completed\r\n'.encode())
+        await writer.drain()
+        if command == 'LOGOUT':
+            break
+    writer.close()
+
+
+def test_async_client_searches_and_fetches(monkeypatch):
+    open_connection = asyncio.open_connection
+
+    async def plain_open_connection(host, port, ssl=None, **kwargs):
+        return await open_connection(host, port, **kwargs)
+
+    monkeypatch.setattr(async_client.asyncio,
+                        'open_connection', plain_open_connection)
+
+    async def run():
+        server = await asyncio.start_server(handle_imap_session, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            async with AsyncEmailClient('user', 'pass', '127.0.0.1', port=port, partial_fetch=False) as client:
+                ids = await client.fetch_email_ids(IMAPSearchCriteria().all())
+                emails = await client.get_emails(ids)
+                return client.uid_validity, ids, emails
+
+    uid_validity, ids, emails = asyncio.run(run())
+
+    assert uid_validity == 42
+    assert ids == [b'1', b'2']
+    assert [(msg.uid, msg['Subject']) for msg in emails] == [
+        (101, 'First'), (102, 'Second')]
+
+
+async def handle_idle_session(reader, writer):
+    writer.write(b'* OK fake IMAP ready\r\n')
+    while line := await reader.readline():
+        tag, command, *args = line.decode().rstrip('\r\n').split(' ')
+        if command == 'CAPABILITY':
+            writer.write(b'* CAPABILITY IMAP4rev1 IDLE\r\n')
+        elif command == 'IDLE':
+            writer.write(b'+ idling\r\n')
+            await writer.drain()
+            await asyncio.sleep(0.05)
+            writer.write(b'* 3 EXISTS\r\n')
+            await writer.drain()
+            await reader.readline()
+        elif command == 'LOGOUT':
+            writer.write(b'* BYE logging out\r\n')
+        writer.write(f'{tag} OK {command} completed\r\n'.encode())
+        await writer.drain()
+        if command == 'LOGOUT':
+            break
+    writer.close()
+
+
+def test_idle_reports_new_mail(monkeypatch):
+    open_connection = asyncio.open_connection
+
+    async def plain_open_connection(host, port, ssl=None, **kwargs):
+        return await open_connection(host, port, **kwargs)
+
+    monkeypatch.setattr(async_client.asyncio,
+                        'open_connection', plain_open_connection)
+
+    async def run():
+        server = await asyncio.start_server(handle_idle_session, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            async with AsyncEmailClient('user', 'pass', '127.0.0.1', port=port) as client:
+                return await client.capabilities(), await client.idle(timeout=5)
+
+    capabilities, has_new_mail = asyncio.run(run())
+
+    assert 'IDLE' in capabilities
+    assert has_new_mail
+
+
+def refusing_session(refused_command):
+    async def handle(reader, writer):
+        writer.write(b'* OK fake IMAP ready\r\n')
+        while line := await reader.readline():
+            tag, command, *args = line.decode().rstrip('\r\n').split(' ')
+            status = 'NO' if command == refused_command else 'OK'
+            writer.write(f'{tag} {status} {command} completed\r\n'.encode())
+            await writer.drain()
+        writer.close()
+    return handle
+
+
+@pytest.mark.parametrize('command', ['LOGIN', 'SELECT'])
+def test_connect_fails_when_login_or_select_is_refused(monkeypatch, command):
+    open_connection = asyncio.open_connection
+
+    async def plain_open_connection(host, port, ssl=None, **kwargs):
+        return await open_connection(host, port, **kwargs)
+
+    monkeypatch.setattr(async_client.asyncio,
+                        'open_connection', plain_open_connection)
+
+    async def run():
+        server = await asyncio.start_server(refusing_session(command), '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            client = AsyncEmailClient('user', 'pass', '127.0.0.1', port=port)
+            try:
+                with pytest.raises(AsyncIMAPError, match=command):
+                    await client.connect()
+                return client.connected
+            finally:
+                await client.disconnect()
+
+    assert asyncio.run(run()) is False
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from email_transaction_extractor.database import Base
+from email_transaction_extractor.models.enums import BackfillStatus
+from email_transaction_extractor.services.backfill_service import \
+    BackfillService
+from email_transaction_extractor.utils.dates import DateRange
+
+
+class FakeEmailClient:
+    mailbox = 'inbox'
+    uid_validity = None
+
+    def __init__(self, searches, failing_date=None):
+        self.searches = searches
+        self.failing_date = failing_date
+
+    def spawn(self):
+        return self
+
+    def fetch_email_ids(self, criteria):
+        query = criteria.build()
+        self.searches.append(query)
+        if self.failing_date and self.failing_date in query:
+            raise ConnectionError('connection dropped')
+        return []
+
+    def iter_emails(self, email_ids, uid=False):
+        return iter(())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+def test_date_range_split_into_shards():
+    date_range = DateRange(start_date=datetime(2024, 1, 1),
+                           end_date=datetime(2024, 1, 17))
+
+    shards = date_range.split(7)
+
+    assert [(shard.start_date.day, shard.end_date.day) for shard in shards] == [
+        (1, 7), (8, 14), (15, 17)]
+    assert shards[-1].end_date == date_range.end_date
+
+
+def test_backfill_resumes_only_unfinished_shards(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/backfill.db')
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = session_factory()
+    service = BackfillService(db, session_factory)
+    job = service.create_job(DateRange(start_date=datetime(2024, 1, 1),
+                                       end_date=datetime(2024, 1, 21)), shard_days=7).data.item
+
+    searches = []
+    first_run = service.run(job.id, FakeEmailClient(
+        searches, failing_date='SINCE "08-Jan-2024"'), workers=2).data.item
+
+    assert first_run.status == BackfillStatus.FAILED
+    assert (first_run.done_shards, first_run.failed_shards) == (2, 1)
+
+    searches.clear()
+    db.expire_all()
+    second_run = service.run(job.id, FakeEmailClient(searches), workers=2).data.item
+
+    assert second_run.status == BackfillStatus.DONE
+    assert second_run.done_shards == 3
+    assert searches and all('SINCE "08-Jan-2024"' in query for query in searches)
+    db.close()
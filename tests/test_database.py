@@ -0,0 +1,24 @@
+from email_transaction_extractor.database import (DatabaseSettings,
+                                                  create_database_engine,
+                                                  engine_options)
+
+
+def test_tuned_sqlite_engine_uses_wal_and_a_sized_pool(tmp_path):
+    settings = DatabaseSettings(DATABASE_URL=f'sqlite:///{tmp_path}/tuned.db', DB_POOL_SIZE=3,
+                                DB_SQLITE_BUSY_TIMEOUT_MS=2000)
+    engine = create_database_engine(settings)
+    with engine.connect() as connection:
+        pragmas = [connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+                   for name in ('journal_mode', 'synchronous', 'busy_timeout')]
+    assert pragmas == ['wal', 1, 2000]
+    assert engine.pool.size() == 3
+    engine.dispose()
+
+
+def test_engine_options_by_profile_and_dialect():
+    postgres = engine_options(DatabaseSettings(DATABASE_URL='postgresql://user@host/db',
+                                               DB_STATEMENT_TIMEOUT_MS=1500))
+    assert postgres['pool_pre_ping'] and postgres['pool_recycle'] == 1800
+    assert postgres['connect_args'] == {'options': '-c statement_timeout=1500'}
+    assert engine_options(DatabaseSettings(DATABASE_URL='sqlite://')) == {'pool_pre_ping': True}
+    assert engine_options(DatabaseSettings(DATABASE_URL='postgresql://user@host/db', DB_PROFILE='default')) == {}
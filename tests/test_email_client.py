@@ -0,0 +1,158 @@
+from email_transaction_extractor.email import EmailClient, IMAPSearchCriteria
+from email_transaction_extractor.email.bodystructure import find_text_part
+from email_transaction_extractor.email.client import build_message_set
+from email_transaction_extractor.email.imap_response import (
+    parse_fetch_response, tokenize)
+from email_transaction_extractor.models.enums import Bank
+from email_transaction_extractor.services.email_service import EmailService
+
+
+def make_raw_email(subject: str) -> bytes:
+    return (f"From: no-reply@bank.com\r\nSubject: {subject}\r\n\r\n"
+            "Transaction details\r\n").encode()
+
+
+def expand_message_set(message_set: str):
+    for chunk in message_set.split(','):
+        start, _, end = chunk.partition(':')
+        yield from range(int(start), int(end or start) + 1)
+
+
+class FakeConnection:
+    def __init__(self, messages, structures=None, sections=None):
+        self.messages = messages
+        self.structures = structures or {}
+        self.sections = sections or {}
+        self.fetch_calls = []
+
+    def search(self, charset, criteria):
+        return 'OK', [' '.join(str(email_id) for email_id in self.messages).encode()]
+
+    def fetch(self, message_set, parts):
+        self.fetch_calls.append((message_set, parts))
+        data = []
+        for email_id in expand_message_set(message_set):
+            if parts == '(UID BODY.PEEK[HEADER.FIELDS (MESSAGE-ID)])':
+                data.append((f'{email_id} (UID {email_id} BODY[HEADER.FIELDS (MESSAGE-ID)] {{0}}'.encode(),
+                             f'Message-ID: <{email_id}@bank.com>\r\n\r\n'.encode()))
+                data.append(b')')
+            elif parts == '(UID BODY.PEEK[])':
+                data.append((f'{email_id} (UID {email_id} BODY[] {{0}}'.encode(),
+                             self.messages[email_id]))
+                data.append(b')')
+            elif parts == '(UID BODYSTRUCTURE)':
+                data.append(
+                    f'{email_id} (UID {email_id} BODYSTRUCTURE {self.structures[email_id]})'.encode())
+            else:
+                header, section = self.sections[email_id]
+                data.append((f'{email_id} (UID {email_id} BODY[HEADER] {{0}}'.encode(),
+                             header))
+                data.append((b' BODY[1] {0}', section))
+                data.append(b')')
+        return 'OK', data
+
+
+def test_build_message_set_collapses_ranges():
+    assert build_message_set([b'1', b'2', b'3', b'7', b'9', b'10']) == '1:3,7,9:10'
+    assert build_message_set(['5']) == '5'
+    assert build_message_set([]) == ''
+
+
+def test_get_emails_fetches_in_batches():
+    messages = {i: make_raw_email(f'Email {i}') for i in range(1, 6)}
+    client = EmailClient('user', 'pass', 'server',
+                         batch_size=2, partial_fetch=False)
+    client.connection = FakeConnection(messages)
+
+    emails = client.get_emails([str(i).encode() for i in range(1, 6)])
+
+    assert [call[0] for call in client.connection.fetch_calls] == [
+        '1:2', '3:4', '5']
+    assert [msg['Subject'] for msg in emails] == [
+        f'Email {i}' for i in range(1, 6)]
+    assert [msg.uid for msg in emails] == [1, 2, 3, 4, 5]
+
+
+def test_parse_fetch_response_reads_uid_before_or_after_literal():
+    msg_data = [
+        (b'1 (UID 101 BODY[] {5}', b'first'),
+        b')',
+        (b'2 (BODY[] {6}', b'second'),
+        b' UID 102)',
+    ]
+
+    assert list(parse_fetch_response(msg_data)) == [
+        (1, {b'UID': 101, b'BODY[]': b'first'}),
+        (2, {b'BODY[]': b'second', b'UID': 102}),
+    ]
+
+
+def test_tokenize_keeps_section_specifiers_whole():
+    tokens = list(tokenize(b'BODY[HEADER.FIELDS (MESSAGE-ID)] "a \\"b\\"" NIL'))
+
+    assert tokens == [b'BODY[HEADER.FIELDS (MESSAGE-ID)]', b'a "b"', None]
+
+
+MULTIPART_STRUCTURE = (
+    '((("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "QUOTED-PRINTABLE" 120 4 NIL NIL NIL NIL)'
+    '("TEXT" "HTML" ("CHARSET" "utf-8") NIL NIL "BASE64" 900 12 NIL NIL NIL NIL) "ALTERNATIVE" '
+    '("BOUNDARY" "alt") NIL NIL NIL)'
+    '("APPLICATION" "PDF" ("NAME" "receipt.pdf") NIL NIL "BASE64" 48000 NIL '
+    '("ATTACHMENT" ("FILENAME" "receipt.pdf")) NIL NIL) "MIXED" ("BOUNDARY" "mixed") NIL NIL NIL)'
+)
+
+
+def test_find_text_part_skips_attachments_and_containers():
+    _, items = next(parse_fetch_response(
+        [f'1 (UID 7 BODYSTRUCTURE {MULTIPART_STRUCTURE})'.encode()]))
+
+    text_part = find_text_part(items[b'BODYSTRUCTURE'])
+
+    assert text_part.section == '1.1'
+    assert text_part.subtype == 'plain'
+    assert text_part.charset == 'utf-8'
+    assert text_part.encoding == 'quoted-printable'
+
+
+def test_partial_fetch_downloads_header_and_text_section_only():
+    structure = ('("TEXT" "PLAIN" ("CHARSET" "iso-8859-1") NIL NIL '
+                 '"QUOTED-PRINTABLE" 20 1 NIL NIL NIL NIL)')
+    header = (b'From: no-reply@bank.com\r\nSubject: Compra\r\n'
+              b'Content-Type: text/plain; charset="iso-8859-1"\r\n'
+              b'Content-Transfer-Encoding: quoted-printable\r\n\r\n')
+    client = EmailClient('user', 'pass', 'server')
+    client.connection = FakeConnection(
+        {}, structures={1: structure}, sections={1: (header, b'Caf=E9 Monto\r\n')})
+
+    [msg] = client.get_emails([b'1'])
+
+    assert [call[1] for call in client.connection.fetch_calls] == [
+        '(UID BODYSTRUCTURE)', '(UID BODY.PEEK[HEADER] BODY.PEEK[1])']
+    assert msg['Subject'] == 'Compra'
+    assert msg.get_payload(decode=True).decode(
+        msg.get_content_charset()) == 'Café Monto\r\n'
+
+
+def test_email_service_skips_already_ingested_messages():
+    messages = {i: make_raw_email(f'Email {i}') for i in range(1, 4)}
+    client = EmailClient('user', 'pass', 'server', partial_fetch=False)
+    client.connection = FakeConnection(messages)
+    service = EmailService(
+        client, known_message_ids=lambda message_ids: {'<2@bank.com>'} & set(message_ids))
+
+    emails = service.get_mail_from_bank(Bank.BAC)
+
+    assert client.connection.fetch_calls == [
+        ('1:3', '(UID BODY.PEEK[HEADER.FIELDS (MESSAGE-ID)])'), ('1,3', '(UID BODY.PEEK[])')]
+    assert [msg['Subject'] for msg in emails] == ['Email 1', 'Email 3']
+
+
+def test_email_service_searches_all_senders_at_once():
+    service = EmailService(EmailClient('user', 'pass', 'server'),
+                           default_criteria=IMAPSearchCriteria().unseen())
+
+    criteria = service.sources_criteria(
+        [('a@bank.com', None), ('b@bank.com', 'Compra'), ('c@bank.com', None)])
+
+    assert criteria.build() == (
+        'UNSEEN (OR (FROM "a@bank.com") (OR (FROM "b@bank.com" SUBJECT "Compra") (FROM "c@bank.com")))')
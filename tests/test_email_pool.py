@@ -0,0 +1,85 @@
+import imaplib
+
+import pytest
+
+from email_transaction_extractor.email import EmailClient, IMAPSearchCriteria
+from email_transaction_extractor.email.pool import IMAPSession, IMAPSessionPool
+
+
+class FakeConnection:
+    def __init__(self, name):
+        self.name = name
+        self.alive = True
+        self.logged_out = False
+
+    def noop(self):
+        if not self.alive:
+            raise imaplib.IMAP4.abort('BYE')
+        return 'OK', [b'']
+
+    def search(self, charset, criteria):
+        if not self.alive:
+            raise imaplib.IMAP4.abort('BYE')
+        return 'OK', [b'1 2']
+
+    def logout(self):
+        self.logged_out = True
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    opened = []
+
+    def fake_open(cls, server, email_user, email_pass, mailbox="inbox"):
+        opened.append(FakeConnection(len(opened)))
+        return cls(opened[-1], uid_validity=1)
+
+    monkeypatch.setattr(IMAPSession, 'open', classmethod(fake_open))
+    return opened
+
+
+def make_pool(**kwargs) -> IMAPSessionPool:
+    return IMAPSessionPool('user', 'pass', 'server', **kwargs)
+
+
+def test_pool_reuses_released_sessions(opened):
+    pool = make_pool(max_size=2)
+
+    session = pool.acquire()
+    pool.release(session)
+
+    assert pool.acquire() is session
+    assert len(opened) == 1
+
+
+def test_pool_is_bounded(opened):
+    pool = make_pool(max_size=1)
+    pool.acquire()
+
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.01)
+
+
+def test_pool_replaces_sessions_that_fail_health_check(opened):
+    pool = make_pool(keepalive_interval=0)
+    session = pool.acquire()
+    pool.release(session)
+    session.connection.alive = False
+
+    replacement = pool.acquire()
+
+    assert replacement is not session
+    assert session.connection.logged_out
+    assert pool.size == 1
+
+
+def test_client_reconnects_after_bye(opened):
+    pool = make_pool()
+    with EmailClient('user', 'pass', 'server', pool=pool) as client:
+        client.connection.alive = False
+
+        assert client.fetch_email_ids(IMAPSearchCriteria().all()) == [b'1', b'2']
+        assert client.connection is opened[1]
+
+    assert pool.size == 1
+
@@ -0,0 +1,29 @@
+from pathlib import Path
+
+import pytest
+
+from email_transaction_extractor.utils.html import (BACKENDS,
+                                                    available_backends)
+
+FIXTURES = sorted((Path(__file__).parent / 'fixtures').glob('*.html'))
+
+
+@pytest.mark.parametrize('fixture', FIXTURES, ids=lambda path: path.stem)
+@pytest.mark.parametrize('backend', [name for name in available_backends() if name != 'bs4'])
+def test_backends_match_beautifulsoup_text(backend, fixture):
+    html = fixture.read_text(encoding='utf-8')
+
+    assert BACKENDS[backend](html) == BACKENDS['bs4'](html)
+
+
+@pytest.mark.parametrize('backend', [name for name in available_backends() if name != 'bs4'])
+def test_backends_keep_crlf_line_breaks(backend):
+    html = '<table><tr><td>Comercio:\r\nAUTOMERCADO\n</td></tr><tr><td>Monto:\r\n CRC 1.00\r\n</td></tr></table>'
+
+    assert BACKENDS[backend](html) == BACKENDS['bs4'](html)
+
+
+def test_stdlib_backend_skips_scripts_and_collapses_blank_nodes():
+    html = '<p>Monto</p>\n   <script>var x = "<b>1</b>";</script><td>CRC&nbsp;5.00</td><!-- -->end'
+
+    assert BACKENDS['stdlib'](html) == 'Monto\n\n\nCRC\xa05.00\nend'
@@ -0,0 +1,112 @@
+import email
+
+from email_transaction_extractor.utils.parsers import (BacMessageParser,
+                                                       PromericaMessageParser,
+                                                       registry)
+from email_transaction_extractor.utils.parsers.cache import ParseCache
+from email_transaction_extractor.utils.parsers.pool import ParsePool
+from email_transaction_extractor.utils.parsers.spec import ParserSpec
+
+
+def make_message(sender: str, subject: str, body: str):
+    return email.message_from_string(
+        f'From: {sender}\nSubject: {subject}\nDate: Mon, 1 Jul 2024 10:00:00 -0600\n'
+        f'Content-Type: text/plain; charset="utf-8"\n\n{body}')
+
+
+def test_parser_spec_returns_first_match_per_field():
+    spec = ParserSpec(label=r'Label:\s*(?P<label>\w+)',
+                      amount=r'Amount:\s*(?P<amount>\d+)')
+
+    fields = spec.scan('Label: first\nAmount: 10\nLabel: second\n')
+
+    assert fields['label'].group('label') == 'first'
+    assert fields['amount'].group('amount') == '10'
+    assert spec.scan(None) == {}
+
+
+def test_bank_parsers_extract_fields_from_spec():
+    bac = BacMessageParser(make_message(
+        'notificacion@notificacionesbaccr.com', 'Notificacion',
+        'Comercio:\r\nAUTOMERCADO\nMonto:\r\n CRC 1,500.00\r\n'))
+    promerica = PromericaMessageParser(make_message(
+        'info@promerica.fi.cr', 'Comprobante de compra',
+        'Comercio  WALMART ESCAZU\nTipo de Comercio  SUPERMERCADOS\nfecha 01/07/2024\nMonto  \n CRC: 12,345.67\n'))
+
+    assert (bac.parse_business(), bac.parse_value_and_currency()) == (
+        'AUTOMERCADO', (1500.0, 'CRC'))
+    assert promerica.parse_business() == 'WALMART ESCAZU'
+    assert promerica.parse_business_type() == 'SUPERMERCADOS'
+    assert promerica.parse_value_and_currency() == (12345.67, 'CRC')
+
+
+def test_accepts_checks_headers_without_decoding_the_body():
+    receipt = make_message('Promerica <info@promerica.fi.cr>',
+                           '=?utf-8?q?Comprobante_de_compra?=', 'Monto  \n CRC: 1.00\n')
+    newsletter = make_message('info@promerica.fi.cr', 'Promociones', 'Hola')
+    other_sender = make_message('someone@example.com', 'Comprobante de pago', '')
+
+    assert PromericaMessageParser.accepts(receipt)
+    assert not PromericaMessageParser.accepts(newsletter)
+    assert not PromericaMessageParser.accepts(other_sender)
+
+    parser = PromericaMessageParser(receipt)
+    assert 'body' not in vars(parser)
+    assert parser.is_transaction()
+    assert 'body' in vars(parser)
+
+
+def test_bank_mail_without_an_amount_is_not_a_transaction():
+    marketing = BacMessageParser(make_message(
+        'notificacion@notificacionesbaccr.com', 'Conozca nuestras promociones', 'Sin monto'))
+
+    assert not marketing.is_transaction()
+
+
+def test_parse_pool_matches_in_process_parsing():
+    emails = [
+        make_message('notificacion@notificacionesbaccr.com', 'Notificacion',
+                     'Comercio:\r\nAUTOMERCADO\nMonto:\r\n CRC 1,500.00\r\n'),
+        make_message('notificacion@notificacionesbaccr.com', 'Notificacion', 'Sin monto'),
+    ] * 3
+    pool = ParsePool(workers=2, chunk_size=2, min_batch=0)
+    try:
+        pooled = pool.parse(BacMessageParser, emails)
+    finally:
+        pool.close()
+
+    assert pooled == ParsePool().parse(BacMessageParser, emails)
+    assert pooled[0][1:4] == (1500.0, 'CRC', 'AUTOMERCADO')
+    assert pooled[1] is None
+
+
+def test_registry_routes_messages_by_sender_and_subject():
+    bac = make_message('BAC <notificacion@notificacionesbaccr.com>', 'Notificacion', '')
+    promerica = make_message('info@promerica.fi.cr', 'Comprobante de compra', '')
+    promotion = make_message('info@promerica.fi.cr', 'Promociones', '')
+    unknown = make_message('someone@example.com', 'Comprobante de compra', '')
+
+    assert registry.parser_for(bac) is BacMessageParser
+    assert registry.parser_for(promerica) is PromericaMessageParser
+    assert registry.parser_for(promotion) is None
+    assert registry.parser_for(unknown) is None
+    assert set(registry.senders) == {'notificacion@notificacionesbaccr.com', 'info@promerica.fi.cr'}
+
+
+def test_parse_cache_skips_seen_emails_until_the_parser_changes(monkeypatch):
+    msg = make_message('notificacion@notificacionesbaccr.com', 'Notificacion',
+                       'Comercio:\r\nAUTOMERCADO\nMonto:\r\n CRC 1,500.00\r\n')
+    msg['Message-ID'] = '<1@bank.com>'
+    cache = ParseCache(max_size=10)
+    pool = ParsePool(cache=cache)
+
+    [first] = pool.parse(BacMessageParser, [msg])
+    [second] = pool.parse(BacMessageParser, [msg])
+
+    assert first == second and first[1] == 1500.0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    monkeypatch.setattr(BacMessageParser, 'version', BacMessageParser.version + 1)
+    pool.parse(BacMessageParser, [msg])
+
+    assert (cache.hits, cache.misses, len(cache)) == (1, 2, 2)
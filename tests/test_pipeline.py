@@ -0,0 +1,34 @@
+import time
+
+import pytest
+
+from email_transaction_extractor.utils.pipeline import prefetch
+
+
+def test_prefetch_keeps_the_producer_at_most_maxsize_ahead():
+    produced = []
+
+    def source():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    items = prefetch(source(), maxsize=3)
+    assert next(items) == 0
+    # the producer blocks once the queue is full: 3 buffered plus 1 waiting to be put
+    time.sleep(0.3)
+    assert len(produced) <= 5
+
+    assert list(items) == list(range(1, 100))
+
+
+def test_prefetch_reraises_producer_errors():
+    def source():
+        yield 1
+        raise ConnectionError('connection dropped')
+
+    items = prefetch(source(), maxsize=2)
+
+    assert next(items) == 1
+    with pytest.raises(ConnectionError):
+        next(items)
@@ -0,0 +1,93 @@
+"""
+Checks that the queries behind the transactions endpoints are answered from
+the indexes on `transactions` rather than a full scan or a sort. Runs on
+SQLite, and on Postgres as well when TEST_POSTGRES_URL points at a scratch
+database.
+"""
+import os
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import and_, create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from email_transaction_extractor.database import Base
+from email_transaction_extractor.models.transaction import TransactionTable
+from email_transaction_extractor.services.transaction_service import \
+    TransactionService
+from email_transaction_extractor.utils.dates import DateRange
+
+from .test_transactions import make_row
+
+# Plan lines that mean the index was not used
+AVOIDED = {
+    'sqlite': re.compile(r'SCAN transactions(?! USING)|USE TEMP B-TREE'),
+    'postgresql': re.compile(r'Seq Scan on transactions|^\s*(->\s*)?Sort\b', re.MULTILINE),
+}
+DAY = DateRange(start_date=datetime(2024, 7, 1), end_date=datetime(2024, 7, 1))
+RANGE = and_(TransactionTable.date >= datetime(2024, 7, 1, 10, 5),
+             TransactionTable.date <= datetime(2024, 7, 1, 10, 20))
+
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def service(request, tmp_path):
+    if request.param == 'sqlite':
+        engine = create_engine(f'sqlite:///{tmp_path}/plans.db')
+    elif os.getenv('TEST_POSTGRES_URL'):
+        # The planner would rather scan a table this small; make it show whether the indexes can be used
+        engine = create_engine(os.environ['TEST_POSTGRES_URL'],
+                               connect_args={'options': '-c enable_seqscan=off'})
+    else:
+        pytest.skip('TEST_POSTGRES_URL is not set')
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    service = TransactionService(db)
+    service.repository.insert_ignoring_duplicates([make_row(i) for i in range(50)])
+    yield service
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def plans_of(service: TransactionService, call) -> list:
+    """Runs `call` and returns the plans of the SELECTs it issued against `transactions`."""
+    connection = service.repository.db.connection()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith('SELECT') and re.search(r'FROM transactions\b', statement):
+            statements.append((statement, parameters))
+
+    event.listen(connection.engine, 'before_cursor_execute', record)
+    try:
+        call()
+    finally:
+        event.remove(connection.engine, 'before_cursor_execute', record)
+    assert statements, 'no query on transactions was issued'
+    explain = 'EXPLAIN QUERY PLAN ' if connection.dialect.name == 'sqlite' else 'EXPLAIN '
+    return ['\n'.join(str(row[-1]) for row in connection.exec_driver_sql(explain + statement, parameters))
+            for statement, parameters in statements]
+
+
+@pytest.mark.parametrize('call, index', [
+    (lambda service: service.get_paginated(5, keyset=True), 'ix_transactions_date_id'),
+    (lambda service: service.get_paginated(
+        5, service.get_paginated(5, keyset=True).data.pagination.next_cursor), 'ix_transactions_date_id'),
+    (lambda service: service.get_by_date(5, DAY, keyset=True), 'ix_transactions_date_id'),
+    (lambda service: service.get_by_date(
+        5, DAY, service.get_by_date(5, DAY).data.pagination.next_cursor), 'ix_transactions_date_id'),
+    (lambda service: service.repository.count_by_date(
+        datetime(2024, 7, 1, 10, 3), datetime(2024, 7, 3, 10)), 'ix_transactions_date_id'),
+    (lambda service: service.repository.count(and_(TransactionTable.bank_name == 'BAC', RANGE)),
+     'ix_transactions_bank_name_date'),
+    (lambda service: service.repository.count(and_(TransactionTable.currency == 'USD', RANGE)),
+     'ix_transactions_currency_date'),
+    (lambda service: service.repository.count(TransactionTable.business == 'Store 7'), 'ix_transactions_business'),
+], ids=['keyset', 'keyset-next', 'by-date-keyset', 'by-date-offset', 'count-partial-days', 'bank', 'currency',
+        'business'])
+def test_transactions_queries_use_an_index(service, call, index):
+    dialect = service.repository.db.get_bind().dialect.name
+    for plan in plans_of(service, lambda: call(service)):
+        assert index in plan, plan
+        assert not AVOIDED[dialect].search(plan), plan
@@ -0,0 +1,33 @@
+from email_transaction_extractor.email import EmailClient
+from email_transaction_extractor.email.raw_store import RawMessageStore
+
+from tests.test_email_client import FakeConnection, make_raw_email
+
+
+def test_raw_store_deduplicates_and_indexes_messages(tmp_path):
+    store = RawMessageStore(str(tmp_path))
+    first = make_raw_email('First')
+
+    digest = store.put(first, message_id='<1@bank.com>', uid_validity=7, uid=101)
+    assert store.put(first, message_id='<1@bank.com>', uid_validity=7, uid=101) == digest
+    store.put(make_raw_email('Second'), uid_validity=7, uid=102)
+
+    assert len(store) == 2
+    assert store.get(digest) == first
+    assert store.get_by_message_id('<1@bank.com>') == first
+    assert store.get_by_uid(7, 102) == make_raw_email('Second')
+    assert list(store.iter_messages()) == [first, make_raw_email('Second')]
+
+
+def test_email_client_archives_fetched_messages(tmp_path):
+    store = RawMessageStore(str(tmp_path))
+    client = EmailClient('user', 'pass', 'server',
+                         partial_fetch=False, raw_store=store)
+    client.connection = FakeConnection(
+        {i: make_raw_email(f'Email {i}') for i in range(1, 3)})
+    client.uid_validity = 9
+
+    client.get_emails([b'1', b'2'])
+
+    assert len(store) == 2
+    assert b'Subject: Email 2' in store.get_by_uid(9, 2)
@@ -1,12 +1,33 @@
+import base64
+from datetime import datetime
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import LargeBinary, create_engine, event, type_coerce
 from sqlalchemy.orm import sessionmaker
 from email_transaction_extractor.database import Base
 from email_transaction_extractor.models.enums import Bank
+from email_transaction_extractor.models.mailbox_sync_state import \
+    MailboxSyncStateTable
+from email_transaction_extractor.models.transaction_body import \
+    TransactionBodyTable
+from email_transaction_extractor.models.transaction_daily_count import \
+    TransactionDailyCountTable
+from email_transaction_extractor.models.transaction import (
+    TransactionTable, generate_transaction_id)
+from email_transaction_extractor.repositories.transaction_repository import \
+    TransactionRepository
 from email_transaction_extractor.services.transaction_service import TransactionService
-from email_transaction_extractor.schemas.transaction import TransactionCreate
+from email_transaction_extractor.schemas.transaction import Transaction, TransactionCreate
 from email_transaction_extractor.email import EmailClient
-import email
+from email_transaction_extractor.email.raw_store import RawMessageStore
+from email_transaction_extractor.exceptions import (MessageIDExistsError,
+                                                     TransactionIDExistsError)
+from email_transaction_extractor.utils.dates import DateRange
+from email_transaction_extractor.utils.parsers.bac_parser import BacMessageParser
+from email_transaction_extractor.utils.parsers.spec import ParserSpec
+import email.utils
+
+from .test_email_client import FakeConnection, expand_message_set
 
 DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(DATABASE_URL)
@@ -25,6 +46,18 @@ def test_db():
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def tmp_db(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/test.db')
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+        engine.dispose()
+
+
 def test_create_transaction(test_db):
     service = TransactionService(test_db)
     transaction_data = TransactionCreate(
@@ -79,3 +112,244 @@ Body: Transaction details
     assert transactions[0].business == "Store"
     assert transactions[0].value == 100.0
     assert transactions[0].currency == "USD"
+
+
+def make_row(index: int) -> dict:
+    transaction = TransactionCreate(
+        date=datetime(2024, 7, 1, 10, index), value=100.0 + index, currency='CRC',
+        business=f'Store {index}', bank_name=Bank.BAC.name, bank_email=Bank.BAC.email,
+        body='Transaction details', message_id=f'<{index}@bank.com>')
+    return {**transaction.model_dump(),
+            'id': generate_transaction_id(transaction.bank_email, transaction.value, transaction.date)}
+
+
+def test_bulk_insert_skips_existing_rows_in_one_statement(tmp_db):
+    repository = TransactionRepository(tmp_db)
+    statements = []
+    event.listen(tmp_db.get_bind(), 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    first, _ = repository.insert_ignoring_duplicates([make_row(i) for i in range(3)])
+    statements.clear()
+    second, _ = repository.insert_ignoring_duplicates(
+        [make_row(2), make_row(3), make_row(3), make_row(4)])
+
+    assert len(first) == 3
+    assert sorted(second) == sorted([make_row(3)['id'], make_row(4)['id']])
+    assert len([statement for statement in statements if statement.startswith('INSERT INTO transactions ')]) == 1
+    assert tmp_db.query(TransactionTable).count() == 5
+
+
+def test_keyset_pages_stay_stable_while_rows_are_inserted(tmp_db):
+    repository = TransactionRepository(tmp_db)
+    service = TransactionService(tmp_db)
+    repository.insert_ignoring_duplicates([make_row(i) for i in range(12)])
+
+    pages, cursor = [], None
+    for inserted in range(40, 44):
+        page = service.get_paginated(5, cursor, keyset=True).data
+        pages.append([item.id for item in page.items])
+        repository.insert_ignoring_duplicates([make_row(inserted)])
+        cursor = page.pagination.next_cursor
+        if cursor is None:
+            break
+
+    expected = [make_row(i)['id'] for i in reversed(range(12))]
+    assert pages == [expected[:5], expected[5:10], expected[10:]]
+    assert page.pagination.total_items is None
+
+    second = service.get_paginated(5, service.get_paginated(5, keyset=True).data.pagination.next_cursor).data
+    previous = service.get_paginated(5, second.pagination.prev_cursor).data
+    assert [item.id for item in previous.items] == [make_row(i)['id'] for i in (42, 41, 40, 11, 10)]
+    assert previous.pagination.prev_cursor is None
+
+
+def test_daily_counts_follow_inserts_updates_and_deletes(tmp_db):
+    repository = TransactionRepository(tmp_db)
+    service = TransactionService(tmp_db)
+    rows = [{**make_row(i), 'date': datetime(2024, 7, 1 + i % 5, i % 24, 30)} for i in range(40)]
+    repository.insert_ignoring_duplicates(rows)
+    repository.insert_ignoring_duplicates(rows[:10])
+    repository.update(rows[0]['id'], {'date': datetime(2024, 8, 1, 9)})
+    repository.delete(rows[1]['id'])
+    repository.create(TransactionTable(**{**make_row(50), 'date': datetime(2024, 7, 3, 23, 59)}))
+
+    def counted(start, end):
+        return repository.count(TransactionTable.date.between(start, end))[0]
+
+    ranges = [(datetime(2024, 7, 2), datetime(2024, 7, 4, 23, 59, 59, 999999)),
+              (datetime(2024, 7, 1, 12), datetime(2024, 7, 3, 23, 59)),
+              (datetime(2024, 7, 3, 6), datetime(2024, 7, 3, 18)),
+              (datetime(2024, 6, 1), datetime(2024, 12, 31))]
+    for start, end in ranges:
+        assert repository.count_by_date(start, end)[0] == counted(start, end)
+    assert repository.count_by_date()[0] == 40
+    assert repository.count_by_date(datetime(2024, 7, 1, 12), datetime(2024, 7, 1, 13), estimate=True)[0] == \
+        counted(datetime(2024, 7, 1), datetime(2024, 7, 1, 23, 59, 59))
+
+    pagination = service.get_paginated(15, totals='none').data.pagination
+    assert (pagination.total_items, pagination.next_cursor is not None) == (None, True)
+    assert service.get_paginated(15).data.pagination.total_pages == 3
+
+    before = tmp_db.query(TransactionDailyCountTable.day, TransactionDailyCountTable.bank_name,
+                          TransactionDailyCountTable.count).order_by('day').all()
+    repository.daily_counts.rebuild()
+    assert tmp_db.query(TransactionDailyCountTable.day, TransactionDailyCountTable.bank_name,
+                        TransactionDailyCountTable.count).order_by('day').all() == before
+
+
+def test_bodies_are_stored_compressed_and_only_loaded_on_request(tmp_db):
+    repository = TransactionRepository(tmp_db)
+    service = TransactionService(tmp_db)
+    body = 'Estimado cliente, le informamos sobre la transaccion realizada.\n' * 40
+    repository.insert_ignoring_duplicates([{**make_row(i), 'body': body} for i in range(5)])
+    statements = []
+    event.listen(tmp_db.get_bind(), 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    page = service.get_paginated(10, keyset=True).data
+    assert [item.body for item in page.items] == [None] * 5
+    assert not any('transaction_bodies' in statement for statement in statements)
+    page = service.get_paginated(10, keyset=True, include_body=True).data
+    assert [item.body for item in page.items] == [body] * 5
+    assert service.get(make_row(0)['id']).data.item.body == body
+
+    stored = tmp_db.execute(TransactionBodyTable.__table__.select().with_only_columns(
+        type_coerce(TransactionBodyTable.body, LargeBinary))).scalars().all()
+    assert len(stored) == 5 and all(len(value) < len(body) / 10 for value in stored)
+    repository.delete(make_row(0)['id'])
+    assert tmp_db.query(TransactionBodyTable).count() == 4
+
+
+def make_bac_email(index: int) -> bytes:
+    return (f'From: BAC <{Bank.BAC.email}>\r\nSubject: Notificacion de transaccion\r\n'
+            f'Message-ID: <{index}@bank.com>\r\nDate: Mon, 1 Jul 2024 10:{index:02d}:00 -0600\r\n'
+            'Content-Type: text/plain; charset=utf-8\r\nContent-Transfer-Encoding: base64\r\n\r\n').encode() + \
+        base64.encodebytes(f'Comercio:\r\nSHOP {index}\nMonto:\r\n CRC {index},500.00\r\n'.encode())
+
+
+class FakeUidConnection(FakeConnection):
+    def __init__(self, messages, failing_uids=()):
+        super().__init__(messages)
+        self.failing_uids = set(failing_uids)
+
+    def uid(self, command, message_set, items):
+        if self.failing_uids & set(expand_message_set(message_set)):
+            raise ConnectionError('connection dropped')
+        return self.fetch(message_set, items)
+
+
+class FakeUidClient(EmailClient):
+    def fetch_email_uids(self, criteria):
+        return sorted(self.connection.messages)
+
+    def fetch_message_ids(self, email_ids, uid=False):
+        return {int(email_id): f'<{int(email_id)}@bank.com>' for email_id in email_ids}
+
+
+def test_sync_marks_stop_below_messages_that_failed_to_download(tmp_db):
+    service = TransactionService(tmp_db)
+    messages = {uid: make_bac_email(uid) for uid in range(1, 10)}
+    fallback_range = DateRange(start_date=datetime(2024, 7, 1), end_date=datetime(2024, 7, 2))
+
+    client = FakeUidClient('user', 'pass', 'server', batch_size=3, partial_fetch=False)
+    client.connection, client.uid_validity = FakeUidConnection(messages, failing_uids=[5]), 7
+    assert 'Fetched per bank: BAC=6 emails in' in service.sync_new_emails(client, fallback_range).meta.message
+
+    marks = {state.last_uid for state in tmp_db.query(MailboxSyncStateTable)}
+    assert marks == {3}
+    assert tmp_db.query(TransactionTable).count() == 6
+
+    client.connection = FakeUidConnection(messages)
+    service.sync_new_emails(client, fallback_range)
+
+    tmp_db.expire_all()
+    assert {state.last_uid for state in tmp_db.query(MailboxSyncStateTable)} == {9}
+    assert sorted(uid for uid, in tmp_db.query(TransactionTable.uid)) == list(range(1, 10))
+
+
+def test_reparse_updates_the_row_of_each_message_after_a_parser_fix(tmp_db, monkeypatch):
+    service = TransactionService(tmp_db)
+    emails = [email.message_from_bytes(make_bac_email(index)) for index in range(1, 4)]
+
+    # The value pattern stops at the thousands separator, 'CRC 2,500.00' is read as 2
+    fixed_spec = BacMessageParser.spec
+    monkeypatch.setattr(BacMessageParser, 'spec', ParserSpec(
+        business=fixed_spec.fields['business'].pattern,
+        value_and_currency=r'Monto:\s*\r\n\s*(?P<currency>\w+)\s(?P<value>\d+)'))
+    service.import_emails(emails)
+    assert sorted(value for value, in tmp_db.query(TransactionTable.value)) == [1.0, 2.0, 3.0]
+    counts = tmp_db.query(TransactionDailyCountTable.day, TransactionDailyCountTable.count).all()
+
+    monkeypatch.setattr(BacMessageParser, 'spec', fixed_spec)
+    message = service.reparse_emails(emails).meta.message
+    assert 'updated 3 and skipped 0' in message
+
+    tmp_db.expire_all()
+    rows = tmp_db.query(TransactionTable).options(*TransactionRepository.WITH_BODY) \
+        .order_by(TransactionTable.value).all()
+    assert [(row.message_id, row.value) for row in rows] == \
+        [(f'<{index}@bank.com>', index * 1000 + 500.0) for index in range(1, 4)]
+    assert [row.id for row in rows] == \
+        [generate_transaction_id(row.bank_email, row.value, email.utils.parsedate_to_datetime(message['Date']))
+         for row, message in zip(rows, emails)]
+    assert all('Monto' in row.body for row in rows)
+    assert tmp_db.query(TransactionBodyTable).count() == 3
+    assert tmp_db.query(TransactionDailyCountTable.day, TransactionDailyCountTable.count).all() == counts
+
+
+@pytest.mark.parametrize('partial_fetch', [False, True])
+def test_reparse_from_the_archive_keeps_crlf_line_breaks(tmp_db, tmp_path, partial_fetch):
+    header = (f'From: BAC <{Bank.BAC.email}>\r\nSubject: Notificacion de transaccion\r\n'
+              'Message-ID: <1@bank.com>\r\nDate: Mon, 1 Jul 2024 10:00:00 -0600\r\n'
+              'Content-Type: text/plain; charset=utf-8\r\nContent-Transfer-Encoding: 7bit\r\n\r\n').encode()
+    body = b'Comercio:\r\nAUTOMERCADO\nMonto:\r\n CRC 1,500.00\r\n'
+    structure = '("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "7BIT" 49 4 NIL NIL NIL NIL)'
+    store = RawMessageStore(str(tmp_path / 'raw'))
+    client = EmailClient('user', 'pass', 'server', partial_fetch=partial_fetch, raw_store=store)
+    client.connection = FakeConnection({1: header + body}, structures={1: structure}, sections={1: (header, body)})
+    client.uid_validity = 7
+    service = TransactionService(tmp_db)
+    service.import_emails(client.get_emails([b'1']))
+
+    [archived] = [email.message_from_bytes(raw) for raw in store.iter_messages()]
+    assert BacMessageParser(archived).is_transaction()
+    assert 'Created 0, updated 1 and skipped 0' in service.reparse_emails([archived]).meta.message
+    assert [(row.business, row.value) for row in tmp_db.query(TransactionTable)] == [('AUTOMERCADO', 1500.0)]
+    store.close()
+
+
+def test_import_saves_new_emails_with_one_bulk_insert(tmp_db):
+    service = TransactionService(tmp_db)
+    emails = [email.message_from_bytes(make_bac_email(index)) for index in range(1, 31)]
+    statements = []
+    event.listen(tmp_db.get_bind(), 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    assert 'Created 30, updated 0 and skipped 0' in service.import_emails(emails).meta.message
+    assert len([statement for statement in statements if statement.startswith('INSERT INTO transactions ')]) == 1
+    assert 'Created 0, updated 0 and skipped 30' in service.import_emails(emails).meta.message
+    assert tmp_db.query(TransactionTable).count() == 30
+
+
+def test_id_and_message_id_collisions_are_told_apart(tmp_db):
+    service = TransactionService(tmp_db)
+    stored = email.message_from_bytes(make_bac_email(1))
+    # A different email with the same bank, value and date, hence the same id
+    twin = email.message_from_bytes(make_bac_email(1).replace(b'<1@bank.com>', b'<twin@bank.com>'))
+
+    message = service.import_emails([stored, twin]).meta.message
+    assert 'Created 1, updated 0 and skipped 0' in message
+    assert '1 conflicted with another email and 0 failed' in message
+    assert [message_id for message_id, in tmp_db.query(TransactionTable.message_id)] == ['<1@bank.com>']
+
+    [row] = tmp_db.query(TransactionTable).all()
+    same_id = TransactionCreate(**{**Transaction.model_validate(row).model_dump(), 'message_id': '<twin@bank.com>',
+                                   'date': email.utils.parsedate_to_datetime(stored['Date'])})
+    tmp_db.expunge_all()
+    with pytest.raises(TransactionIDExistsError):
+        service.create(same_id)
+    same_message = TransactionCreate(**{**same_id.model_dump(), 'value': 1.0, 'message_id': '<1@bank.com>'})
+    with pytest.raises(MessageIDExistsError) as raised:
+        service.create(same_message)
+    assert raised.value.transaction_id == row.id